@@ -0,0 +1,255 @@
+"""
+Ordonnanceur d'admission - Phase 3 Python Bridges
+Remplace le sémaphore global : classes de priorité, équité par utilisateur,
+file bornée, échéances et rejet rapide avec Retry-After
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from loguru import logger
+
+
+# Plus la valeur est basse, plus la classe est servie tôt
+PRIORITIES = {
+    "interactive": 0,  # voix, chat en direct
+    "normal": 1,
+    "batch": 2,  # tâches de fond, pré-calculs
+}
+
+
+class AdmissionRejected(Exception):
+    """Requête refusée par l'ordonnanceur"""
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class QueueFull(AdmissionRejected):
+    """File globale (503) ou quota utilisateur (429) atteint"""
+
+
+class DeadlineExceeded(AdmissionRejected):
+    """Échéance dépassée avant d'obtenir un slot (504)"""
+
+
+@dataclass
+class _Ticket:
+    user: str
+    priority: int
+    deadline: Optional[float]
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+    def expired(self, now: float) -> bool:
+        return self.deadline is not None and now >= self.deadline
+
+
+class AdmissionScheduler:
+    """
+    Contrôle d'admission des tâches lourdes
+
+    - `concurrency` tâches s'exécutent en même temps
+    - les suivantes attendent dans une file par priorité, servie en tourniquet
+      entre utilisateurs (un utilisateur bavard ne bloque pas les autres)
+    - file bornée globalement et par utilisateur : rejet immédiat avec un
+      Retry-After estimé à partir du débit de service mesuré
+    - une requête dont l'échéance est passée est abandonnée avant exécution
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        max_queue: int = 64,
+        max_queue_per_user: int = 8,
+        initial_service_time: float = 5.0,
+        ewma_alpha: float = 0.2,
+    ):
+        """
+        Args:
+            concurrency: Tâches simultanées
+            max_queue: Profondeur max de la file (toutes priorités)
+            max_queue_per_user: Requêtes en attente max par utilisateur
+            initial_service_time: Durée de service supposée avant toute mesure (secondes)
+            ewma_alpha: Poids de la dernière mesure de durée de service
+        """
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.ewma_alpha = ewma_alpha
+        self.service_time = initial_service_time
+
+        self.active = 0
+        self.queued = 0
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Ticket]]"] = {p: OrderedDict() for p in PRIORITIES.values()}
+        self._queued_by_user: Dict[str, int] = {}
+
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user: str = "anonymous",
+        priority: str = "interactive",
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[None]:
+        """
+        Obtenir un slot d'exécution
+
+        Args:
+            user: Identifiant utilisé pour l'équité
+            priority: Classe de priorité (voir PRIORITIES)
+            deadline: Échéance absolue (time.monotonic()), None = aucune
+
+        Raises:
+            QueueFull, DeadlineExceeded
+        """
+        await self.acquire(user, priority, deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def check(self, user: str = "anonymous", priority: str = "interactive"):
+        """Vérifier sans attendre qu'une requête serait admise en file (rejet rapide)"""
+        self._priority_level(priority)
+        if self.active < self.concurrency and self.queued == 0:
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull("Queue is full", status_code=503, retry_after=self.retry_after())
+        if self._queued_by_user.get(user, 0) >= self.max_queue_per_user:
+            self.rejected += 1
+            raise QueueFull("Too many queued requests for this user", status_code=429, retry_after=self.retry_after())
+
+    async def acquire(self, user: str = "anonymous", priority: str = "interactive", deadline: Optional[float] = None):
+        """Attendre un slot (voir slot())"""
+        level = self._priority_level(priority)
+        if deadline is not None and time.monotonic() >= deadline:
+            self.expired += 1
+            raise DeadlineExceeded("Deadline exceeded before admission", status_code=504)
+
+        if self.active < self.concurrency and self.queued == 0:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        self.check(user, priority)
+        ticket = _Ticket(user=user, priority=level, deadline=deadline)
+        self._enqueue(ticket)
+
+        try:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(ticket)
+            self.expired += 1
+            raise DeadlineExceeded("Deadline exceeded while queued", status_code=504)
+        except BaseException:
+            # Annulation du demandeur, ou DeadlineExceeded posée par _dispatch()
+            self._abandon(ticket)
+            raise
+
+    def release(self, service_seconds: Optional[float] = None):
+        """Libérer un slot et servir la file"""
+        if service_seconds is not None:
+            self.service_time += self.ewma_alpha * (service_seconds - self.service_time)
+        self.active -= 1
+        self._dispatch()
+
+    def retry_after(self) -> int:
+        """Secondes estimées avant qu'une nouvelle requête puisse être servie"""
+        service_rate = self.concurrency / max(self.service_time, 1e-3)  # requêtes/s
+        return max(1, math.ceil((self.queued + 1) / service_rate))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "queued": self.queued,
+            "queued_by_priority": {
+                name: sum(len(q) for q in self._queues[level].values()) for name, level in PRIORITIES.items()
+            },
+            "max_queue": self.max_queue,
+            "service_time_ms": round(self.service_time * 1000, 1),
+            "retry_after": self.retry_after(),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
+
+    # ------------------------------------------------------------------
+    # File interne
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _priority_level(priority: str) -> int:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Invalid priority: {priority}. Allowed: {list(PRIORITIES)}")
+        return PRIORITIES[priority]
+
+    def _enqueue(self, ticket: _Ticket):
+        self._queues[ticket.priority].setdefault(ticket.user, deque()).append(ticket)
+        self._queued_by_user[ticket.user] = self._queued_by_user.get(ticket.user, 0) + 1
+        self.queued += 1
+
+    def _remove(self, ticket: _Ticket) -> bool:
+        users = self._queues[ticket.priority]
+        queue = users.get(ticket.user)
+        if queue is None or ticket not in queue:
+            return False
+        queue.remove(ticket)
+        if not queue:
+            del users[ticket.user]
+        self._queued_by_user[ticket.user] -= 1
+        if not self._queued_by_user[ticket.user]:
+            del self._queued_by_user[ticket.user]
+        self.queued -= 1
+        return True
+
+    def _abandon(self, ticket: _Ticket):
+        """Le demandeur est parti : retirer son ticket ou rendre le slot déjà accordé"""
+        if not self._remove(ticket) and ticket.future.done() and ticket.future.exception() is None:
+            self.release()
+
+    def _next(self) -> Optional[_Ticket]:
+        """Prochain ticket : priorité la plus haute, tourniquet entre utilisateurs"""
+        for level in sorted(self._queues):
+            users = self._queues[level]
+            if users:
+                user, queue = next(iter(users.items()))
+                ticket = queue[0]
+                self._remove(ticket)
+                if user in users:
+                    users.move_to_end(user)
+                return ticket
+        return None
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while self.active < self.concurrency:
+            ticket = self._next()
+            if ticket is None:
+                return
+            if ticket.expired(now):
+                # Abandon avant d'atteindre le modèle
+                self.expired += 1
+                ticket.future.set_exception(DeadlineExceeded("Deadline exceeded while queued", status_code=504))
+                logger.debug(f" Admission: dropped expired request from {ticket.user}")
+                continue
+            self.active += 1
+            self.admitted += 1
+            ticket.future.set_result(None)
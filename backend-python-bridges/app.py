@@ -1,29 +1,90 @@
 from fastapi import FastAPI, Request, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 import os
-import base64
-import numpy as np
+import json
+import time
 import jwt
 from datetime import datetime, timedelta
 from loguru import logger
+from contextlib import asynccontextmanager
 import traceback
 
 # Clients IA (à adapter pour l'async si nécessaire)
-from ollama_client import get_ollama_client
-# Whisper et Piper restent sync car ils sont gourmands en CPU/GPU et tournent en local
-from whisper_client import get_whisper_client
-from piper_client import get_piper_client
+from ollama_client import get_ollama_client, close_ollama
+# Piper reste sync car il est gourmand en CPU/GPU et tourne en local
+from piper_client import PiperClient, use_piper_client
+from piper_pool import PiperUnavailableError
+from singleflight import SingleFlight
+from admission import AdmissionScheduler, AdmissionRejected
+from model_warmup import ModelWarmer
+from disconnect import cancel_on_disconnect, ClientDisconnected
+from model_registry import get_model_registry
+from tts_stream import split_sentences, synthesize_in_order
+from tts_cache import get_tts_cache, load_prewarm_phrases
+from audio_encoding import (
+    MEDIA_TYPES, UnsupportedAudioFormat, content_length, encode_base64, encode_stream, negotiate_format, opus_available
+)
 
 import asyncio
 
-# Limiter la concurrence pour les tâches lourdes (LLM, STT, TTS)
+# Limiter la concurrence pour les générations LLM
 # Ajustez cette valeur selon votre GPU/CPU (ex: 1 pour un petit GPU, 4 pour un gros serveur)
 AI_CONCURRENCY_LIMIT = int(os.environ.get("AI_CONCURRENCY_LIMIT", "2"))
-ai_semaphore = asyncio.Semaphore(AI_CONCURRENCY_LIMIT)
+# Au-delà, les requêtes attendent par priorité puis par utilisateur ; file pleine = 503/429 immédiat
+llm_scheduler = AdmissionScheduler(
+    concurrency=AI_CONCURRENCY_LIMIT,
+    max_queue=int(os.environ.get("LLM_QUEUE_MAX", "32")),
+    max_queue_per_user=int(os.environ.get("LLM_QUEUE_MAX_PER_USER", "4")),
+)
+
+# Les requêtes LLM identiques simultanées partagent une seule génération (et un seul slot)
+llm_flight = SingleFlight()
+
+# Préchauffage des modèles et maintien en mémoire (keep_alive)
+model_warmer: Optional[ModelWarmer] = None
+
+# Déchargement des modèles locaux (Whisper, embeddings, Piper) inactifs
+MODEL_SWEEP_INTERVAL = float(os.environ.get("MODEL_SWEEP_INTERVAL", "60"))
+
+async def sweep_idle_models():
+    while True:
+        await asyncio.sleep(MODEL_SWEEP_INTERVAL)
+        await asyncio.to_thread(get_model_registry().evict_idle)
+
+def prewarm_tts_cache():
+    """Synthétiser au démarrage les phrases récurrentes absentes du cache (mémoire et disque)"""
+    if get_tts_cache() is None:
+        return
+    try:
+        phrases = load_prewarm_phrases(os.environ.get("TTS_CACHE_PREWARM_FILE"))
+        with use_piper_client(os.environ.get("PIPER_VOICE", "fr_FR-upmc-medium")) as client:
+            synthesized = client.prewarm(phrases)
+        logger.info(f" TTS cache prewarmed: {len(phrases)} phrases ({synthesized} synthesized)")
+    except Exception as e:
+        logger.warning(f" TTS cache prewarm failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global model_warmer
+    # Health check actif des nœuds Ollama (réadmission, modèles chargés)
+    get_ollama_client().start_health_checks()
+    if os.environ.get("OLLAMA_WARMUP_ENABLED", "true").lower() in ("1", "true", "yes"):
+        model_warmer = ModelWarmer(get_ollama_client())
+        model_warmer.start()
+    model_sweeper = asyncio.create_task(sweep_idle_models())
+    tts_prewarm = asyncio.create_task(asyncio.to_thread(prewarm_tts_cache))
+    yield
+    model_sweeper.cancel()
+    tts_prewarm.cancel()
+    if model_warmer is not None:
+        await model_warmer.stop()
+    # Fermer proprement le pool de connexions Ollama
+    await close_ollama()
 
-app = FastAPI(title="Jarvis Python Bridges", version="1.4.0")
+app = FastAPI(title="Jarvis Python Bridges", version="1.4.0", lifespan=lifespan)
 
 # CORS
 cors_origins = os.environ.get("CORS_ORIGINS", "http://localhost:3000,http://localhost:8100").split(",")
@@ -44,11 +105,17 @@ class ChatRequest(BaseModel):
     system_prompt: Optional[str] = None
     temperature: Optional[float] = 0.7
     max_tokens: Optional[int] = 512
+    priority: Literal["interactive", "normal", "batch"] = "interactive"
+    deadline_ms: Optional[int] = None  # abandon si aucun slot obtenu avant ce délai
+
+class ChatSessionRequest(ChatRequest):
+    session_id: Optional[str] = None  # None = nouvelle conversation
 
 class TTSRequest(BaseModel):
     text: str
     voice: Optional[str] = "fr_FR-upmc-medium"
     speed: Optional[float] = 1.0
+    format: Optional[Literal["json", "pcm", "wav", "opus"]] = None  # None = en-tête Accept, sinon JSON
 
 # Auth dependency
 async def verify_token(request: Request):
@@ -63,42 +130,386 @@ async def verify_token(request: Request):
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+def user_key(user: Dict[str, Any]) -> str:
+    return str(user.get("user_id") or user.get("sub") or user.get("username") or "anonymous")
+
+def request_deadline(req: ChatRequest) -> Optional[float]:
+    return time.monotonic() + req.deadline_ms / 1000 if req.deadline_ms else None
+
+def flight_key(client, req: ChatRequest) -> str:
+    """
+    Clé de coalescence : la requête et son traitement d'admission. Un appel rattaché
+    garde sa classe de priorité (file, hedging) et, à délai égal, une échéance au plus
+    aussi lointaine que la sienne puisque la génération partagée a démarré avant lui
+    """
+    key = client.request_key(req.prompt, req.system_prompt, req.temperature, max_tokens=req.max_tokens)
+    return f"{key}:{req.priority}:{req.deadline_ms or 0}"
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)}, headers=headers)
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected(request: Request, exc: ClientDisconnected):
+    # Personne ne lira cette réponse : 499 (convention nginx) pour les logs d'accès
+    return JSONResponse(status_code=499, content={"detail": "Client disconnected"})
+
 @app.get("/health")
 async def health():
     ollama_ok = await get_ollama_client().health_check()
     return {"status": "healthy" if ollama_ok else "degraded", "services": {"ollama": ollama_ok}}
 
+@app.get("/ready")
+async def ready():
+    """Prêt à servir : modèles préchargés (503 tant que le préchauffage n'est pas terminé)"""
+    if model_warmer is not None and not model_warmer.ready:
+        return JSONResponse(status_code=503, content={"status": "warming", "models": model_warmer.models})
+    return {"status": "ready"}
+
+def llm_response(result) -> Dict[str, Any]:
+    return {
+        "text": result.text,
+        "model": result.model,
+        "duration_ms": result.duration_ms,
+        "cached": result.cached
+    }
+
 @app.post("/api/llm/generate")
-async def llm_generate(req: ChatRequest, user=Depends(verify_token)):
-    async with ai_semaphore:
-        try:
-            client = get_ollama_client()
-            result = await client.generate(
+async def llm_generate(req: ChatRequest, request: Request, user=Depends(verify_token)):
+    client = get_ollama_client()
+    # Les réponses en cache ne consomment pas de slot de concurrence
+    cached = client.get_cached(req.prompt, req.system_prompt, req.temperature, max_tokens=req.max_tokens)
+    if cached is not None:
+        return llm_response(cached)
+
+    deadline = request_deadline(req)
+    # Chaque appelant, même rattaché à une génération en cours, passe par son propre quota
+    llm_scheduler.check(user_key(user), req.priority)
+
+    async def run_generation():
+        async with llm_scheduler.slot(user_key(user), req.priority, deadline):
+            return await client.generate(
                 prompt=req.prompt,
                 system_prompt=req.system_prompt,
                 temperature=req.temperature,
+                max_tokens=req.max_tokens,
+                check_cache=False,
+                hedge=req.priority == "interactive"
+            )
+
+    try:
+        key = flight_key(client, req)
+        # Déconnexion : on quitte la génération partagée, annulée si plus personne ne l'attend
+        async with cancel_on_disconnect(request):
+            result = await llm_flight.do(key, run_generation)
+        return llm_response(result)
+    except (AdmissionRejected, ClientDisconnected):
+        raise
+    except Exception as e:
+        logger.error(f"LLM Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/llm/cache")
+async def llm_cache_stats(user=Depends(verify_token)):
+    cache = get_ollama_client().cache
+    return cache.stats() if cache else {"enabled": False}
+
+@app.get("/api/llm/stats")
+async def llm_stats(user=Depends(verify_token)):
+    client = get_ollama_client()
+    return {
+        "cache": client.cache.stats() if client.cache else {"enabled": False},
+        "coalescing": llm_flight.stats(),
+        "scheduler": llm_scheduler.stats(),
+        "sessions": client.sessions.stats(),
+        "hedging": client.hedging.stats() if client.hedging else {"enabled": False},
+        "warmup": model_warmer.stats() if model_warmer else {"enabled": False},
+        "balancer": client.balancer.stats()
+    }
+
+@app.get("/api/models/stats")
+async def models_stats(user=Depends(verify_token)):
+    """Modèles locaux résidents, chargements et déchargements"""
+    return get_model_registry().stats()
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Formater un évènement Server-Sent Events"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_done(result, first_token_ms: Optional[float], **extra) -> str:
+    return sse_event({
+        "model": result.model,
+        "stop_reason": result.stop_reason,
+        "tokens_generated": result.tokens_generated,
+        "first_token_ms": first_token_ms,
+        "duration_ms": result.duration_ms,
+        "cached": result.cached,
+        **extra
+    }, event="done")
+
+@app.post("/api/llm/stream")
+async def llm_stream(req: ChatRequest, request: Request, user=Depends(verify_token)):
+    """Génération en streaming SSE : un évènement par token, puis `done` avec les statistiques"""
+    client = get_ollama_client()
+    cached = client.get_cached(req.prompt, req.system_prompt, req.temperature, max_tokens=req.max_tokens)
+    deadline = request_deadline(req)
+    if cached is None:
+        # Rejet immédiat (429/503) tant que les en-têtes HTTP ne sont pas envoyés
+        llm_scheduler.check(user_key(user), req.priority)
+
+    async def events():
+        if cached is not None:
+            yield sse_event({"token": cached.text})
+            yield sse_done(cached, first_token_ms=cached.duration_ms)
+            return
+
+        async def upstream():
+            async with llm_scheduler.slot(user_key(user), req.priority, deadline):
+                async for chunk in client.stream(
+                    prompt=req.prompt,
+                    system_prompt=req.system_prompt,
+                    temperature=req.temperature,
+                    max_tokens=req.max_tokens,
+                    check_cache=False,
+                    hedge=req.priority == "interactive"
+                ):
+                    yield chunk
+
+        start = time.perf_counter()
+        first_token_ms = None
+        try:
+            key = flight_key(client, req)
+            # Sans écriture en attente (file d'admission, premier token), la déconnexion
+            # ne serait vue qu'au prochain envoi : on la surveille activement
+            async with cancel_on_disconnect(request):
+                async for chunk in llm_flight.stream(key, upstream):
+                    if chunk.token:
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - start) * 1000
+                        yield sse_event({"token": chunk.token})
+                    if chunk.done:
+                        yield sse_done(chunk.final, first_token_ms)
+        except ClientDisconnected:
+            return
+        except Exception as e:
+            logger.error(f"LLM Stream Error: {e}")
+            yield sse_event({"detail": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def open_session(req: ChatSessionRequest, user: Dict[str, Any]):
+    sessions = get_ollama_client().sessions
+    if req.session_id is None:
+        return sessions.create(user_key(user), req.system_prompt)
+    session = sessions.get(req.session_id, user_key(user))
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return session
+
+@app.post("/api/llm/chat")
+async def llm_chat(req: ChatSessionRequest, request: Request, user=Depends(verify_token)):
+    """Tour de conversation : seul le nouveau message est envoyé, l'historique reste côté serveur"""
+    client = get_ollama_client()
+    session = open_session(req, user)
+    try:
+        async with cancel_on_disconnect(request), llm_scheduler.slot(user_key(user), req.priority, request_deadline(req)):
+            result = await client.chat(
+                session,
+                prompt=req.prompt,
+                temperature=req.temperature,
                 max_tokens=req.max_tokens
             )
-            return {
-                "text": result.text,
-                "model": result.model,
-                "duration_ms": result.duration_ms
-            }
+    except (AdmissionRejected, ClientDisconnected):
+        raise
+    except Exception as e:
+        logger.error(f"LLM Chat Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if result.stop_reason == "error":
+        raise HTTPException(status_code=502, detail=result.text)
+    return {**llm_response(result), "session_id": session.session_id, "tokens_prompt": result.tokens_prompt}
+
+@app.post("/api/llm/chat/stream")
+async def llm_chat_stream(req: ChatSessionRequest, request: Request, user=Depends(verify_token)):
+    """Tour de conversation en streaming SSE (voir /api/llm/stream)"""
+    client = get_ollama_client()
+    session = open_session(req, user)
+    deadline = request_deadline(req)
+    llm_scheduler.check(user_key(user), req.priority)
+
+    async def events():
+        start = time.perf_counter()
+        first_token_ms = None
+        try:
+            async with cancel_on_disconnect(request), llm_scheduler.slot(user_key(user), req.priority, deadline):
+                async for chunk in client.chat_stream(
+                    session,
+                    prompt=req.prompt,
+                    temperature=req.temperature,
+                    max_tokens=req.max_tokens
+                ):
+                    if chunk.token:
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - start) * 1000
+                        yield sse_event({"token": chunk.token})
+                    if chunk.done:
+                        yield sse_done(
+                            chunk.final,
+                            first_token_ms,
+                            session_id=session.session_id,
+                            tokens_prompt=chunk.final.tokens_prompt
+                        )
+        except ClientDisconnected:
+            return
         except Exception as e:
-            logger.error(f"LLM Error: {e}")
-            raise HTTPException(status_code=500, detail=str(e))
+            logger.error(f"LLM Chat Stream Error: {e}")
+            yield sse_event({"detail": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Session-Id": session.session_id}
+    )
+
+@app.delete("/api/llm/chat/{session_id}")
+async def llm_chat_close(session_id: str, user=Depends(verify_token)):
+    if not get_ollama_client().sessions.delete(session_id, user_key(user)):
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return {"status": "closed", "session_id": session_id}
 
 @app.post("/api/tts/synthesize")
-async def tts_synthesize(req: TTSRequest, user=Depends(verify_token)):
-    # Whisper et Piper sont CPU-bound, on les laisse en sync dans le thread pool de FastAPI
+async def tts_synthesize(req: TTSRequest, request: Request, user=Depends(verify_token)):
+    """
+    Synthèse complète. Format négocié : `format` explicite ou en-tête Accept
+    (audio/ogg, audio/wav, audio/L16) pour un corps binaire, métadonnées dans les
+    en-têtes X-* ; sans préférence, JSON float32 base64 (anciens clients).
+    """
+    voice = req.voice or "fr_FR-upmc-medium"
+    if voice not in PiperClient.FRENCH_VOICES:
+        raise HTTPException(status_code=400, detail=f"Invalid voice: {voice}")
+    speed = req.speed or 1.0
+    if not (0.5 <= speed <= 2.0):
+        raise HTTPException(status_code=400, detail="Speed must be between 0.5 and 2.0")
     try:
-        client = get_piper_client()
-        result = client.synthesize(text=req.text, voice=req.voice, speed=req.speed)
-        audio_b64 = base64.b64encode(result.audio_samples.astype(np.float32).tobytes()).decode()
-        return {"audio_data": audio_b64, "sample_rate": result.sample_rate, "voice": result.voice}
+        fmt = negotiate_format(req.format, request.headers.get("accept"))
+    except UnsupportedAudioFormat as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    if fmt == "opus" and not opus_available():
+        raise HTTPException(status_code=406, detail="Opus encoding is not available on this server")
+    try:
+        # Un pool de workers piper par voix : synthèses concurrentes hors de la boucle,
+        # client épinglé dans le registre jusqu'à la fin de la synthèse
+        def synthesize():
+            with use_piper_client(voice) as client:
+                return client.synthesize(text=req.text, voice=voice, speed=speed)
+
+        result = await asyncio.to_thread(synthesize)
+    except PiperUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    audio = result.audio_samples
+    if fmt == "json":
+        audio_b64 = encode_base64(audio, "json")  # sans copie astype si déjà float32
+        return {"audio_data": audio_b64, "sample_rate": result.sample_rate, "voice": result.voice, "cached": result.cached}
+
+    headers = {
+        "X-Sample-Rate": str(result.sample_rate),
+        "X-Voice": result.voice,
+        "X-TTS-Cached": str(result.cached).lower(),
+        "X-Audio-Duration-Ms": str(round(len(audio) * 1000 / result.sample_rate)),
+    }
+    length = content_length(fmt, len(audio))
+    if length is not None:
+        headers["Content-Length"] = str(length)
+    # Générateur synchrone : Starlette l'itère dans un thread (conversion int16, pipe ffmpeg)
+    return StreamingResponse(
+        encode_stream(audio, result.sample_rate, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers=headers
+    )
+
+@app.post("/api/tts/stream")
+async def tts_stream(req: TTSRequest, request: Request, user=Depends(verify_token)):
+    """
+    Synthèse en streaming SSE : un évènement `chunk` par phrase, dans l'ordre (seq),
+    envoyé dès qu'il est prêt, puis `done`. Les phrases suivantes sont synthétisées
+    pendant l'envoi des précédentes (une par worker Piper). `format: "pcm"` encode
+    audio_data en int16 au lieu de float32 (moitié moins d'octets).
+    """
+    voice = req.voice or "fr_FR-upmc-medium"
+    if voice not in PiperClient.FRENCH_VOICES:
+        raise HTTPException(status_code=400, detail=f"Invalid voice: {voice}")
+    speed = req.speed or 1.0
+    if not (0.5 <= speed <= 2.0):
+        raise HTTPException(status_code=400, detail="Speed must be between 0.5 and 2.0")
+    encoding = req.format or "json"
+    if encoding not in ("json", "pcm"):
+        raise HTTPException(status_code=400, detail="Stream format must be json or pcm")
+    sentences = split_sentences(req.text)
+    if not sentences:
+        raise HTTPException(status_code=400, detail="Text is empty")
+
+    def synthesize(sentence: str):
+        # Bail par phrase : une synthèse d'avance encore en cours après l'abandon du flux reste protégée
+        with use_piper_client(voice) as client:
+            return client.synthesize(text=sentence, voice=voice, speed=speed)
+
+    async def events():
+        start = time.perf_counter()
+        first_audio_ms = None
+        audio_ms = 0.0
+        try:
+            # Client épinglé pendant tout le flux : ses workers ne sont pas déchargés entre deux phrases
+            with use_piper_client(voice) as client:
+                async with cancel_on_disconnect(request):
+                    async for seq, sentence, result in synthesize_in_order(sentences, synthesize, client.pool_size):
+                        if not len(result.audio_samples):
+                            raise RuntimeError(f"Synthesis failed for chunk {seq}")
+                        if first_audio_ms is None:
+                            first_audio_ms = (time.perf_counter() - start) * 1000
+                        chunk_ms = len(result.audio_samples) / result.sample_rate * 1000
+                        audio_ms += chunk_ms
+                        yield sse_event({
+                            "seq": seq,
+                            "text": sentence,
+                            "audio_data": encode_base64(result.audio_samples, encoding),
+                            "encoding": "pcm_s16le" if encoding == "pcm" else "f32le",
+                            "sample_rate": result.sample_rate,
+                            "audio_ms": round(chunk_ms),
+                            "cached": result.cached,
+                            "final": seq == len(sentences) - 1
+                        }, event="chunk")
+            yield sse_event({
+                "chunks": len(sentences),
+                "voice": voice,
+                "first_audio_ms": first_audio_ms,
+                "audio_ms": round(audio_ms),
+                "duration_ms": (time.perf_counter() - start) * 1000
+            }, event="done")
+        except ClientDisconnected:
+            return
+        except Exception as e:
+            logger.error(f"TTS Stream Error: {e}")
+            yield sse_event({"detail": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/tts/cache")
+async def tts_cache_stats(user=Depends(verify_token)):
+    cache = get_tts_cache()
+    return cache.stats() if cache else {"enabled": False}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8005)
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Encodage audio des réponses TTS - Phase 3 Python Bridges
+Formats négociés (champ `format` ou en-tête Accept) : PCM int16, WAV, Ogg/Opus en
+corps binaire, JSON base64 float32 conservé pour les anciens clients. L'encodage
+se fait par blocs, sans copie complète de l'audio
+"""
+
+import base64
+import os
+import shutil
+import struct
+import subprocess
+import threading
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+# Format → type MIME de la réponse
+MEDIA_TYPES = {
+    "json": "application/json",  # historique : float32 base64 (~5,3 octets/échantillon)
+    "pcm": "audio/L16",  # int16 little-endian mono (2 octets/échantillon)
+    "wav": "audio/wav",
+    "opus": "audio/ogg; codecs=opus",  # ~3 ko/s à 24 kbit/s
+}
+
+# Types Accept reconnus, dans l'ordre de préférence à qualité égale
+ACCEPT_FORMATS = {
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/wave": "wav",
+    "audio/l16": "pcm",
+    "application/octet-stream": "pcm",
+    "application/json": "json",
+}
+
+# Échantillons convertis par bloc (64 Kio d'int16)
+BLOCK_SAMPLES = 32768
+
+OPUS_BITRATE = os.getenv("TTS_OPUS_BITRATE", "24k")
+
+
+class UnsupportedAudioFormat(ValueError):
+    """Format demandé inconnu ou encodeur absent"""
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """
+    Format de sortie : le champ explicite prime, sinon l'en-tête Accept (q-values
+    respectées), sinon JSON pour les clients existants
+    """
+    if requested:
+        if requested not in MEDIA_TYPES:
+            raise UnsupportedAudioFormat(f"Unknown audio format: {requested}. Allowed: {list(MEDIA_TYPES)}")
+        return requested
+
+    candidates = []
+    for position, part in enumerate((accept or "").split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        fmt = ACCEPT_FORMATS.get(media.lower())
+        if fmt is None:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    pass
+        if quality > 0:
+            candidates.append((-quality, position, fmt))
+    return min(candidates)[2] if candidates else "json"
+
+
+def int16_blocks(audio: np.ndarray, block_samples: int = BLOCK_SAMPLES) -> Iterator[bytes]:
+    """PCM int16 little-endian, un bloc à la fois (écrêté à [-1, 1])"""
+    scratch = np.empty(min(block_samples, len(audio)), dtype=np.float32)
+    for start in range(0, len(audio), block_samples):
+        block = audio[start:start + block_samples]
+        out = scratch[:len(block)]
+        np.clip(block, -1.0, 1.0, out=out)
+        out *= 32767.0
+        yield out.astype("<i2").tobytes()
+
+
+def wav_header(num_samples: int, sample_rate: int, channels: int = 1, bits: int = 16) -> bytes:
+    """En-tête RIFF/WAVE PCM (44 octets), la taille est connue avant l'envoi"""
+    block_align = channels * bits // 8
+    data_size = num_samples * block_align
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits,
+        b"data", data_size,
+    )
+
+
+def opus_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def opus_command(sample_rate: int, bitrate: str = OPUS_BITRATE) -> List[str]:
+    """ffmpeg : PCM int16 sur stdin, Ogg/Opus sur stdout (rééchantillonné vers 24/48 kHz si besoin)"""
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+        "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+        "-f", "ogg", "pipe:1",
+    ]
+
+
+def opus_stream(audio: np.ndarray, sample_rate: int, command: Optional[List[str]] = None) -> Iterator[bytes]:
+    """
+    Ogg/Opus produit au fil de l'eau : un thread écrit le PCM dans ffmpeg pendant
+    que les pages Ogg sont relues et transmises. Si le client abandonne, ffmpeg est tué.
+    """
+    process = subprocess.Popen(
+        command or opus_command(sample_rate),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0,
+    )
+
+    def feed():
+        try:
+            for block in int16_blocks(audio):
+                process.stdin.write(block)
+        except (BrokenPipeError, ValueError):
+            pass  # ffmpeg arrêté : l'erreur est remontée par le lecteur
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        while True:
+            chunk = process.stdout.read(65536)
+            if not chunk:
+                break
+            yield chunk
+        writer.join()
+        if process.wait() != 0:
+            error = process.stderr.read().decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg exited with code {process.returncode}: {error}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def content_length(fmt: str, num_samples: int) -> Optional[int]:
+    """Taille du corps si connue à l'avance (pas pour Opus, débit variable)"""
+    if fmt == "pcm":
+        return num_samples * 2
+    if fmt == "wav":
+        return 44 + num_samples * 2
+    return None
+
+
+def encode_base64(audio: np.ndarray, fmt: str) -> str:
+    """Audio en base64 pour les réponses JSON/SSE : float32 (json) ou int16 (pcm)"""
+    if fmt == "pcm":
+        return base64.b64encode(b"".join(int16_blocks(audio))).decode()
+    if fmt == "json":
+        return base64.b64encode(memoryview(np.ascontiguousarray(audio, dtype=np.float32)).cast("B")).decode()
+    raise UnsupportedAudioFormat(f"No base64 encoding for format: {fmt}")
+
+
+def encode_stream(audio: np.ndarray, sample_rate: int, fmt: str) -> Iterator[bytes]:
+    """Corps binaire d'un format audio (pcm, wav, opus), bloc par bloc"""
+    if fmt == "pcm":
+        yield from int16_blocks(audio)
+    elif fmt == "wav":
+        yield wav_header(len(audio), sample_rate)
+        yield from int16_blocks(audio)
+    elif fmt == "opus":
+        if not opus_available():
+            raise UnsupportedAudioFormat("Opus encoding requires ffmpeg")
+        yield from opus_stream(audio, sample_rate)
+    else:
+        raise UnsupportedAudioFormat(f"No binary encoding for format: {fmt}")
@@ -0,0 +1,102 @@
+"""
+Prétraitement audio - Phase 3 Python Bridges
+Conversion de type, mixage mono, rééchantillonnage polyphase vers 16 kHz et
+normalisation, sur des buffers float32 contigus
+"""
+
+from functools import lru_cache
+from math import gcd
+from typing import Tuple
+
+import numpy as np
+from scipy.signal import resample_poly
+
+# Fréquence attendue par Whisper
+TARGET_RATE = 16000
+
+# Échantillons lus par bloc pour la recherche de crête (256 Kio de float32, tient en cache)
+PEAK_BLOCK_SAMPLES = 65536
+
+# Échelle des formats entiers PCM → [-1.0, 1.0]
+_INT_SCALE = {
+    np.dtype(np.int16): 1 / 32768.0,
+    np.dtype(np.int32): 1 / 2147483648.0,
+}
+
+
+@lru_cache(maxsize=32)
+def resample_ratio(sample_rate: int, target_rate: int = TARGET_RATE) -> Tuple[int, int]:
+    """Facteurs (up, down) irréductibles, ex: 44100 → 16000 = (160, 441)"""
+    g = gcd(sample_rate, target_rate)
+    return target_rate // g, sample_rate // g
+
+
+def to_float_mono(audio: np.ndarray) -> np.ndarray:
+    """
+    Type + mixage mono en une seule passe, résultat float32 contigu
+
+    Les tableaux 2D sont lus comme (trames, canaux) (soundfile) ou, si la
+    première dimension est petite, (canaux, trames) (librosa).
+    """
+    if audio.ndim == 2:
+        channel_axis = 0 if audio.shape[0] <= 8 < audio.shape[1] else 1
+        if audio.shape[channel_axis] == 1:
+            audio = audio.reshape(-1)
+    if audio.dtype == np.uint8:
+        audio = audio.astype(np.int16) - 128
+        scale = 1 / 128.0
+    else:
+        scale = _INT_SCALE.get(audio.dtype, 1.0)
+
+    if audio.ndim == 2:
+        out = audio.mean(axis=channel_axis, dtype=np.float32)
+    else:
+        out = np.array(audio, dtype=np.float32, order="C", copy=audio.dtype == np.float32)
+    if scale != 1.0:
+        np.multiply(out, scale, out=out)
+    return out
+
+
+def resample(audio: np.ndarray, sample_rate: int, target_rate: int = TARGET_RATE) -> np.ndarray:
+    """Rééchantillonnage polyphase (filtre anti-repliement inclus), float32 conservé"""
+    if sample_rate == target_rate:
+        return audio
+    up, down = resample_ratio(sample_rate, target_rate)
+    return np.ascontiguousarray(resample_poly(audio, up, down), dtype=np.float32)
+
+
+def peak_amplitude(audio: np.ndarray, block_samples: int = PEAK_BLOCK_SAMPLES) -> float:
+    """Crête max(|x|) en une lecture du signal, par blocs dans un buffer de travail réutilisé"""
+    scratch = np.empty(min(block_samples, len(audio)), dtype=np.float32)
+    peak = 0.0
+    for start in range(0, len(audio), block_samples):
+        block = audio[start:start + block_samples]
+        peak = max(peak, float(np.abs(block, out=scratch[:len(block)]).max()))
+    return peak
+
+
+def preprocess_audio(audio: np.ndarray, sample_rate: int, target_rate: int = TARGET_RATE) -> np.ndarray:
+    """
+    Audio quelconque → float32 mono contigu à `target_rate`, dans [-1.0, 1.0]
+
+    Args:
+        audio: Échantillons int16/int32/uint8/float, mono ou multicanal
+        sample_rate: Fréquence d'échantillonnage d'origine (Hz)
+        target_rate: Fréquence de sortie (Hz)
+
+    Returns:
+        Nouveau buffer (l'entrée n'est jamais modifiée)
+    """
+    if sample_rate <= 0:
+        raise ValueError(f"Invalid sample rate: {sample_rate}")
+    is_float = audio.dtype.kind == "f"
+    out = resample(to_float_mono(audio), sample_rate, target_rate)
+
+    if is_float and len(out):
+        # Une seule passe sur le signal : float à l'échelle int16 (ancien contrat) ou simple écrêtage
+        peak = peak_amplitude(out)
+        if peak > 1.0:
+            if peak > 2.0:
+                np.multiply(out, 1 / 32768.0, out=out)
+            np.clip(out, -1.0, 1.0, out=out)
+    return out
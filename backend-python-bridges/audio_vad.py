@@ -0,0 +1,140 @@
+"""
+Pré-découpage VAD - Phase 3 Python Bridges
+Détection d'activité vocale par énergie (NumPy vectorisé) : suppression des silences
+avant Whisper, avec table de correspondance des horodatages
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+@dataclass
+class TimestampMap:
+    """Correspondance temps de l'audio compacté → temps de l'audio d'origine"""
+    compact_starts: np.ndarray  # début de chaque plage conservée dans l'audio compacté (s)
+    original_starts: np.ndarray  # début de la même plage dans l'audio d'origine (s)
+    durations: np.ndarray  # durée de chaque plage (s)
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """
+        Convertir un instant de l'audio compacté
+
+        Une fin de segment tombant pile sur une jointure appartient à la plage précédente.
+        """
+        if len(self.compact_starts) == 0:
+            return t
+        side = "left" if is_end else "right"
+        i = int(np.searchsorted(self.compact_starts, t, side=side)) - 1
+        i = min(max(i, 0), len(self.compact_starts) - 1)
+        offset = min(max(t - self.compact_starts[i], 0.0), self.durations[i])
+        return float(self.original_starts[i] + offset)
+
+    def remap_segments(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Recaler start/end des segments Whisper sur l'audio d'origine"""
+        remapped = []
+        for segment in segments:
+            segment = dict(segment)
+            if segment.get("start") is not None:
+                segment["start"] = round(self.to_original(segment["start"]), 3)
+            if segment.get("end") is not None:
+                segment["end"] = round(self.to_original(segment["end"], is_end=True), 3)
+            remapped.append(segment)
+        return remapped
+
+
+def frame_rms(audio: np.ndarray, frame_size: int) -> np.ndarray:
+    """Énergie RMS par trame (la dernière trame incomplète est complétée par des zéros)"""
+    n_frames = -(-len(audio) // frame_size)
+    padded = np.zeros(n_frames * frame_size, dtype=np.float32)
+    padded[:len(audio)] = audio
+    frames = padded.reshape(n_frames, frame_size)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_size)
+
+
+def voiced_mask(
+    rms: np.ndarray,
+    min_rms: float = 0.005,
+    noise_ratio: float = 3.0,
+    noise_percentile: float = 10.0,
+    peak_ratio: float = 0.5,
+) -> np.ndarray:
+    """
+    Trames de parole : au-dessus du plancher absolu et de `noise_ratio` × bruit de fond estimé
+
+    Le seuil relatif est plafonné à `peak_ratio` × trame la plus forte : un clip
+    entièrement parlé (bruit de fond estimé élevé) n'est pas rejeté en bloc.
+    """
+    if not len(rms):
+        return np.zeros(0, dtype=bool)
+    noise = np.percentile(rms, noise_percentile)
+    return rms > max(min_rms, min(noise * noise_ratio, rms.max() * peak_ratio))
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Débuts et fins (exclues) des suites de True"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def trim_silence(
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    frame_ms: int = 30,
+    min_silence_ms: int = 400,
+    padding_ms: int = 150,
+    min_rms: float = 0.005,
+) -> Tuple[np.ndarray, TimestampMap, Dict[str, Any]]:
+    """
+    Supprimer les silences de tête, de queue et les pauses longues
+
+    Args:
+        audio: Échantillons float32 mono
+        sample_rate: Fréquence d'échantillonnage (Hz)
+        frame_ms: Taille des trames d'analyse
+        min_silence_ms: Pauses plus courtes conservées (prosodie, séparation des mots)
+        padding_ms: Marge conservée autour de chaque zone de parole
+        min_rms: Plancher d'énergie absolu d'une trame de parole
+
+    Returns:
+        (audio compacté, table des horodatages, statistiques)
+    """
+    frame_size = max(1, sample_rate * frame_ms // 1000)
+    voiced = voiced_mask(frame_rms(audio, frame_size), min_rms=min_rms)
+
+    # Combler les pauses courtes entre deux zones de parole
+    starts, ends = _runs(~voiced)
+    min_gap = -(-min_silence_ms // frame_ms)
+    for start, end in zip(starts, ends):
+        if start > 0 and end < len(voiced) and end - start < min_gap:
+            voiced[start:end] = True
+
+    # Marge autour de la parole
+    pad = padding_ms // frame_ms
+    if pad and voiced.any():
+        kernel = np.ones(2 * pad + 1, dtype=np.int32)
+        voiced = np.convolve(voiced.astype(np.int32), kernel, mode="same") > 0
+
+    starts, ends = _runs(voiced)
+    spans = [(s * frame_size, min(e * frame_size, len(audio))) for s, e in zip(starts, ends)]
+    kept = np.concatenate([audio[s:e] for s, e in spans]) if spans else np.zeros(0, dtype=audio.dtype)
+
+    lengths = np.array([e - s for s, e in spans], dtype=np.float64)
+    compact_starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1])) if spans else np.zeros(0)
+    timestamp_map = TimestampMap(
+        compact_starts=compact_starts / sample_rate,
+        original_starts=np.array([s for s, _ in spans], dtype=np.float64) / sample_rate,
+        durations=lengths / sample_rate,
+    )
+
+    original_ms = len(audio) * 1000 / sample_rate
+    kept_ms = len(kept) * 1000 / sample_rate
+    stats = {
+        "original_ms": round(original_ms, 1),
+        "kept_ms": round(kept_ms, 1),
+        "dropped_ms": round(original_ms - kept_ms, 1),
+        "dropped_ratio": round(1 - kept_ms / original_ms, 3) if original_ms else 0.0,
+        "speech_regions": len(spans),
+    }
+    return kept, timestamp_map, stats
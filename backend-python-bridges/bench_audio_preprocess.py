@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark prétraitement audio - Phase 3 Python Bridges
+Débit de preprocess_audio (conversion, mixage mono, rééchantillonnage 16 kHz,
+normalisation) pour les formats d'entrée courants, exprimé en secondes d'audio
+traitées par seconde de calcul (× temps réel)
+
+Usage: python bench_audio_preprocess.py [--seconds 30] [--runs 5]
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from audio_preprocess import preprocess_audio
+
+RATES = [8000, 16000, 22050, 32000, 44100, 48000]
+FORMATS = [
+    ("int16 mono", np.int16, 1),
+    ("int16 stereo", np.int16, 2),
+    ("float32 mono", np.float32, 1),
+    ("float32 stereo", np.float32, 2),
+]
+
+
+def make_audio(seconds: float, sample_rate: int, dtype, channels: int) -> np.ndarray:
+    """Bruit + sinusoïde, au format d'une capture réelle (trames, canaux)"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.5 * np.sin(2 * np.pi * 440 * t) + rng.normal(0, 0.05, len(t))
+    if channels > 1:
+        signal = np.stack([signal] * channels, axis=1)
+    if dtype == np.int16:
+        return (signal * 32767).astype(np.int16)
+    return signal.astype(dtype)
+
+
+def bench(audio: np.ndarray, sample_rate: int, runs: int):
+    preprocess_audio(audio, sample_rate)  # chauffe (cache des ratios, allocations)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        preprocess_audio(audio, sample_rate)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30.0, help="Durée du signal de test")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"\nAudio: {args.seconds:.0f}s, median of {args.runs} runs\n")
+    print(f"{'format':<16} {'rate':>6} {'ms':>8} {'x realtime':>11} {'MB/s':>8}")
+
+    for label, dtype, channels in FORMATS:
+        for rate in RATES:
+            audio = make_audio(args.seconds, rate, dtype, channels)
+            seconds = bench(audio, rate, args.runs)
+            print(
+                f"{label:<16} {rate:>6} {seconds * 1000:8.1f} "
+                f"{args.seconds / seconds:11.0f} {audio.nbytes / seconds / 1e6:8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark OllamaClient - Phase 3 Python Bridges
+Mesure le surcoût par requête : client HTTP éphémère vs pool de connexions keep-alive
+(contre le serveur Ollama factice, aucun modèle requis)
+
+Usage: python bench_ollama_client.py [--requests 200] [--concurrency 1]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import httpx
+
+from ollama_client import OllamaClient
+
+
+@contextmanager
+def fake_ollama_process():
+    """Lancer le serveur factice dans un processus séparé (pas de contention GIL avec le client)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_ollama.py")
+    process = subprocess.Popen([sys.executable, script, "--port", str(port)])
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                httpx.get(f"{url}/api/tags", timeout=1)
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Fake Ollama server failed to start")
+                time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def summarize(name: str, latencies: list, connections: int):
+    """Afficher les statistiques d'une série"""
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<12} mean={statistics.mean(latencies):6.2f}ms  "
+        f"p50={statistics.median(latencies):6.2f}ms  p95={p95:6.2f}ms  "
+        f"connections={connections}"
+    )
+    return statistics.mean(latencies)
+
+
+async def run_series(call, requests: int, concurrency: int) -> list:
+    """Exécuter `requests` appels avec `concurrency` appels simultanés"""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def connections_since_reset(url: str, reset: bool = False) -> int:
+    """Lire (ou remettre à zéro) le compteur de connexions du serveur factice"""
+    async with httpx.AsyncClient() as admin:
+        if reset:
+            await admin.post(f"{url}/_fake/reset")
+            return 0
+        return (await admin.get(f"{url}/_fake/stats")).json()["connections"]
+
+
+async def main(requests: int, concurrency: int):
+    with fake_ollama_process() as url:
+        payload = {"model": "llama3.1:latest", "prompt": "Bonjour", "stream": False}
+
+        # Ancien comportement : un AsyncClient par appel
+        async def ephemeral():
+            async with httpx.AsyncClient(timeout=30) as client:
+                response = await client.post(f"{url}/api/generate", json=payload)
+                response.raise_for_status()
+
+        await connections_since_reset(url, reset=True)
+        legacy = await run_series(ephemeral, requests, concurrency)
+        legacy_conns = await connections_since_reset(url)
+
+        # Nouveau comportement : pool partagé par OllamaClient
+        client = OllamaClient(base_url=url, model="llama3.1:latest")
+        client.base_url = url  # ignorer OLLAMA_URL éventuellement défini dans l'environnement
+
+        async def pooled():
+            await client.generate("Bonjour")
+
+        await pooled()  # ouverture du pool hors mesure
+        await connections_since_reset(url, reset=True)
+        shared = await run_series(pooled, requests, concurrency)
+        shared_conns = await connections_since_reset(url)
+        await client.aclose()
+
+    print(f"\n{requests} requests, concurrency={concurrency}\n")
+    legacy_mean = summarize("ephemeral", legacy, legacy_conns)
+    pooled_mean = summarize("pooled", shared, shared_conns)
+    print(f"\nPer-request overhead saved: {legacy_mean - pooled_mean:.2f}ms ({legacy_mean / pooled_mean:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark moteurs STT - Phase 3 Python Bridges
+Compare le facteur temps réel (RTF = temps de calcul / durée audio) des moteurs
+et tailles de modèle sur CPU. RTF < 1 : plus rapide que le temps réel.
+
+Usage: python bench_stt_engines.py --audio phrase.wav [--engines openai-whisper faster-whisper]
+       [--models tiny base small] [--compute-types int8 float32] [--threads 4] [--runs 3]
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from stt_engines import ENGINES, FasterWhisperEngine, OpenAIWhisperEngine
+
+SAMPLE_RATE = 16000
+
+
+def load_audio(path: str) -> np.ndarray:
+    """Fichier audio → float32 mono 16 kHz"""
+    import librosa
+
+    audio, _ = librosa.load(path, sr=SAMPLE_RATE, mono=True)
+    return audio.astype(np.float32)
+
+
+def bench(engine, audio: np.ndarray, runs: int, language: str):
+    """Temps de calcul de chaque passe (la première, de chauffe, est exclue)"""
+    engine.transcribe(audio, language=language)
+    timings = []
+    text = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        text = engine.transcribe(audio, language=language)["text"]
+        timings.append(time.perf_counter() - start)
+    return timings, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", required=True, help="Fichier audio de référence (parole)")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--compute-types", nargs="+", default=["int8"], help="faster-whisper uniquement")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--language", default="fr")
+    args = parser.parse_args()
+
+    if OpenAIWhisperEngine.name in args.engines:
+        import torch
+
+        torch.set_num_threads(args.threads)  # même budget de threads pour les deux moteurs
+
+    audio = load_audio(args.audio)
+    audio_seconds = len(audio) / SAMPLE_RATE
+    print(f"\nAudio: {audio_seconds:.1f}s, {args.runs} runs, {args.threads} threads\n")
+    print(f"{'engine':<16} {'model':<8} {'compute':<8} {'load s':>7} {'mean s':>7} {'RTF':>6}  text")
+
+    for engine_name in args.engines:
+        compute_types = args.compute_types if engine_name == FasterWhisperEngine.name else ["float32"]
+        for model in args.models:
+            for compute_type in compute_types:
+                start = time.perf_counter()
+                if engine_name == FasterWhisperEngine.name:
+                    engine = FasterWhisperEngine(model, "cpu", compute_type, cpu_threads=args.threads)
+                else:
+                    engine = OpenAIWhisperEngine(model, "cpu")
+                load_seconds = time.perf_counter() - start
+
+                timings, text = bench(engine, audio, args.runs, args.language)
+                mean = statistics.mean(timings)
+                print(
+                    f"{engine_name:<16} {model:<8} {compute_type:<8} {load_seconds:7.1f} "
+                    f"{mean:7.2f} {mean / audio_seconds:6.3f}  {text[:40]}"
+                )
+                del engine
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Sessions de conversation LLM - Phase 3 Python Bridges
+Historique par conversation pour /api/chat, expiration à l'inactivité et budget mémoire
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+# Surcoût fixe estimé par message (dict, rôle, clés)
+MESSAGE_OVERHEAD_BYTES = 64
+
+
+@dataclass
+class ChatSession:
+    """
+    Conversation en cours
+
+    Les messages sont renvoyés tels quels à chaque tour : le préfixe étant
+    identique, Ollama réutilise son cache KV et n'évalue que le nouveau tour.
+    """
+    session_id: str
+    user: str
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    backend_url: Optional[str] = None  # nœud qui détient le cache KV de la conversation
+    size_bytes: int = 0
+    turns: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # un seul tour à la fois
+
+    def add(self, role: str, content: str) -> int:
+        """Ajouter un message, renvoie sa taille estimée"""
+        self.messages.append({"role": role, "content": content})
+        size = len(content.encode("utf-8")) + MESSAGE_OVERHEAD_BYTES
+        self.size_bytes += size
+        return size
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "turns": self.turns,
+            "messages": len(self.messages),
+            "size_bytes": self.size_bytes,
+            "backend": self.backend_url,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+        }
+
+
+class ChatSessionStore:
+    """Sessions en mémoire : LRU borné en octets, expiration après inactivité"""
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, idle_ttl: float = 1800.0):
+        """
+        Args:
+            max_bytes: Taille mémoire max estimée de l'ensemble des historiques
+            idle_ttl: Inactivité (secondes) après laquelle une session est oubliée
+        """
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.size_bytes = 0
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def create(self, user: str, system_prompt: Optional[str] = None) -> ChatSession:
+        """Ouvrir une nouvelle session (le prompt système est figé pour toute la conversation)"""
+        self.evict_idle()
+        session = ChatSession(session_id=uuid.uuid4().hex, user=user)
+        if system_prompt:
+            self.size_bytes += session.add("system", system_prompt)
+        self._sessions[session.session_id] = session
+        self.created += 1
+        self._enforce_budget()
+        return session
+
+    def get(self, session_id: str, user: str) -> Optional[ChatSession]:
+        """Session de cet utilisateur, None si inconnue, expirée ou appartenant à un autre"""
+        self.evict_idle()
+        session = self._sessions.get(session_id)
+        if session is None or session.user != user:
+            return None
+        session.last_used = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def record_turn(self, session: ChatSession, prompt: str, answer: str, backend_url: Optional[str]):
+        """Enregistrer un tour réussi (rien n'est ajouté si la génération a échoué)"""
+        if self._sessions.get(session.session_id) is not session:
+            return  # évincée pendant la génération
+        self.size_bytes += session.add("user", prompt)
+        self.size_bytes += session.add("assistant", answer)
+        session.turns += 1
+        session.backend_url = backend_url or session.backend_url
+        session.last_used = time.monotonic()
+        self._sessions.move_to_end(session.session_id)
+        self._enforce_budget(keep=session.session_id)
+
+    def delete(self, session_id: str, user: str) -> bool:
+        """Fermer une session"""
+        session = self._sessions.get(session_id)
+        if session is None or session.user != user:
+            return False
+        self._remove(session_id)
+        return True
+
+    def evict_idle(self):
+        """Oublier les sessions inactives depuis plus de `idle_ttl`"""
+        cutoff = time.monotonic() - self.idle_ttl
+        # Ordre LRU : les plus anciennes en tête
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used > cutoff:
+                break
+            self._remove(session_id)
+            self.expirations += 1
+
+    def _enforce_budget(self, keep: Optional[str] = None):
+        while self.size_bytes > self.max_bytes and self._sessions:
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                if len(self._sessions) == 1:
+                    break
+                self._sessions.move_to_end(session_id)
+                continue
+            self._remove(session_id)
+            self.evictions += 1
+            logger.debug(f" Chat session evicted (memory budget): {session_id}")
+
+    def _remove(self, session_id: str):
+        session = self._sessions.pop(session_id)
+        self.size_bytes -= session.size_bytes
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "idle_ttl": self.idle_ttl,
+            "created": self.created,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,58 @@
+"""
+Détection de déconnexion client - Phase 3 Python Bridges
+Annule le travail en cours (requête Ollama, slot de concurrence) quand l'appelant HTTP raccroche
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import Request
+from loguru import logger
+
+
+# Période de vérification de la connexion client (secondes)
+DISCONNECT_POLL_INTERVAL = float(os.environ.get("DISCONNECT_POLL_INTERVAL", "0.25"))
+
+
+class ClientDisconnected(Exception):
+    """Le client HTTP s'est déconnecté avant la fin du traitement"""
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request, poll_interval: float = DISCONNECT_POLL_INTERVAL) -> AsyncIterator[None]:
+    """
+    Annuler le bloc dès que le client se déconnecte
+
+    L'annulation se propage à tout ce qui est attendu dans le bloc : la requête
+    httpx vers Ollama est fermée et les slots d'admission sont libérés aussitôt.
+
+    Raises:
+        ClientDisconnected: le bloc a été interrompu par la déconnexion
+    """
+    task = asyncio.current_task()
+    running = True
+    disconnected = False
+
+    async def watch():
+        nonlocal disconnected
+        while not await request.is_disconnected():
+            await asyncio.sleep(poll_interval)
+        disconnected = True
+        if running:
+            task.cancel()
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        yield
+    except asyncio.CancelledError:
+        if not disconnected:
+            raise
+        task.uncancel()
+        logger.info(f" Client disconnected, cancelled {request.url.path}")
+        raise ClientDisconnected()
+    finally:
+        running = False
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
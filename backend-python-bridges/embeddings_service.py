@@ -4,10 +4,21 @@ Vectorisation texte pour mémoire sémantique Qdrant
 """
 
 import numpy as np
-from typing import List, Optional
+from typing import Iterator, List, Optional
+from contextlib import contextmanager
 from dataclasses import dataclass
 from loguru import logger
 
+from model_registry import get_model_registry
+
+
+# Empreinte RAM estimée (Mo) des modèles Sentence Transformers courants
+EMBEDDINGS_MODEL_MB = {
+    "distiluse-base-multilingual-cased-v2": 600,
+    "all-MiniLM-L6-v2": 120,
+    "all-mpnet-base-v2": 500,
+}
+
 
 @dataclass
 class Embedding:
@@ -156,19 +167,26 @@ class EmbeddingsService:
             return 0.0
 
 
-# Instance globale
-_embeddings_service: Optional[EmbeddingsService] = None
+# Modèles chargés à la demande via le registre (budget RAM, déchargement à l'inactivité)
+get_model_registry().register(
+    "embeddings",
+    lambda model_name: EmbeddingsService(model_name=model_name),
+    lambda model_name: EMBEDDINGS_MODEL_MB.get(model_name, 600) * 1024 * 1024,
+)
 
 
 def get_embeddings_service(model_name: str = "distiluse-base-multilingual-cased-v2") -> EmbeddingsService:
-    """Obtenir instance singleton"""
-    global _embeddings_service
-    if _embeddings_service is None:
-        _embeddings_service = EmbeddingsService(model_name=model_name)
-    return _embeddings_service
+    """Obtenir le service d'un modèle (chargé à la première utilisation)"""
+    return get_model_registry().get("embeddings", model_name)
+
+
+@contextmanager
+def use_embeddings_service(model_name: str = "distiluse-base-multilingual-cased-v2") -> Iterator[EmbeddingsService]:
+    """Service épinglé le temps du bloc (non déchargé pendant un encodage)"""
+    with get_model_registry().use("embeddings", model_name) as service:
+        yield service
 
 
 def init_embeddings(model_name: str = "distiluse-base-multilingual-cased-v2"):
     """Initialiser avec modèle personnalisé"""
-    global _embeddings_service
-    _embeddings_service = EmbeddingsService(model_name=model_name)
+    get_model_registry().put("embeddings", model_name, EmbeddingsService(model_name=model_name))
@@ -0,0 +1,256 @@
+"""
+Serveur Ollama factice - Phase 3 Python Bridges
+Stand-in local de l'API Ollama pour les tests et benchmarks (aucun modèle requis)
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeOllamaConfig:
+    """Comportement simulé du serveur"""
+    tokens: List[str] = field(default_factory=lambda: ["Bonjour", ",", " je", " suis", " Jarvis", "."])
+    first_token_delay: float = 0.0  # secondes avant le premier token
+    token_delay: float = 0.0  # secondes entre deux tokens
+    model_delays: Dict[str, float] = field(default_factory=dict)  # délai supplémentaire par modèle
+    load_delay: float = 0.0  # chargement d'un modèle absent de loaded_models (démarrage à froid)
+    status_code: int = 200  # != 200 pour simuler une panne
+    truncate_stream: bool = False  # flux coupé avant la ligne `done`
+
+
+class ClientGone(Exception):
+    """Le client a fermé la connexion pendant l'attente"""
+
+
+class FakeOllamaServer:
+    """Serveur HTTP uvicorn dans un thread, imitant /api/generate, /api/chat, /api/tags et /api/ps"""
+
+    def __init__(self, config: Optional[FakeOllamaConfig] = None, host: str = "127.0.0.1"):
+        self.config = config or FakeOllamaConfig()
+        self.host = host
+        self.port = 0
+
+        # Compteurs observables par les tests
+        self.requests = 0
+        self.active = 0
+        self.cancelled = 0
+        self.connections: Set[Tuple[str, int]] = set()
+        self.loaded_models: Set[str] = set()
+        # Cache KV simulé : mots du dernier contexte évalué (préfixe réutilisable par /api/chat)
+        self.kv_prefix: List[str] = []
+        self.prompt_tokens_evaluated = 0
+
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.app = self._build_app()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "FakeOllamaServer":
+        """Démarrer le serveur sur un port libre"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, 0))
+        self.port = sock.getsockname()[1]
+
+        config = uvicorn.Config(self.app, log_level="error", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake Ollama server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        """Arrêter le serveur"""
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Application
+    # ------------------------------------------------------------------
+
+    async def _wait(self, request: Request, seconds: float):
+        """Attendre en surveillant une déconnexion du client"""
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if await request.is_disconnected():
+                raise ClientGone()
+            await asyncio.sleep(min(remaining, 0.01))
+
+    def _track(self, request: Request):
+        self.requests += 1
+        client = request.scope.get("client")
+        if client:
+            self.connections.add(tuple(client))
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+        server = self
+
+        @app.get("/_fake/stats")
+        async def stats():
+            return {
+                "requests": server.requests,
+                "active": server.active,
+                "cancelled": server.cancelled,
+                "connections": len(server.connections),
+                "prompt_tokens_evaluated": server.prompt_tokens_evaluated,
+            }
+
+        @app.post("/_fake/reset")
+        async def reset():
+            server.requests = server.cancelled = server.prompt_tokens_evaluated = 0
+            server.connections.clear()
+            return {"status": "ok"}
+
+        @app.get("/api/tags")
+        async def tags(request: Request):
+            server._track(request)
+            return {"models": [{"name": "llama3.1:latest"}, {"name": "llama3.2:1b"}]}
+
+        @app.get("/api/ps")
+        async def ps(request: Request):
+            server._track(request)
+            if server.config.status_code != 200:
+                return JSONResponse({"error": "simulated failure"}, status_code=server.config.status_code)
+            return {"models": [{"name": m, "model": m} for m in sorted(server.loaded_models)]}
+
+        def evaluate(words: List[str]) -> int:
+            """Tokens de prompt à évaluer, compte tenu du préfixe déjà en cache"""
+            common = 0
+            for cached, word in zip(server.kv_prefix, words):
+                if cached != word:
+                    break
+                common += 1
+            server.kv_prefix = list(words)
+            server.prompt_tokens_evaluated += len(words) - common
+            return len(words) - common
+
+        async def reply(request: Request, body: dict, prompt_words: List[str], render):
+            """Réponse commune à /api/generate et /api/chat ; `render(text)` construit le champ texte"""
+            model = body.get("model", "")
+            cfg = server.config
+
+            if cfg.status_code != 200:
+                return JSONResponse({"error": "simulated failure"}, status_code=cfg.status_code)
+            load_delay = 0.0 if model in server.loaded_models else cfg.load_delay
+            server.loaded_models.add(model)
+
+            first_delay = load_delay + cfg.first_token_delay + cfg.model_delays.get(model, 0.0)
+            num_predict = body.get("options", {}).get("num_predict", body.get("num_predict"))
+            tokens = cfg.tokens if num_predict is None else cfg.tokens[:max(num_predict, 0)]
+            prompt_eval_count = evaluate(prompt_words)
+            started = time.monotonic()
+
+            def final_chunk() -> dict:
+                server.kv_prefix += "".join(tokens).split()
+                return {
+                    "model": model,
+                    **render(""),
+                    "done": True,
+                    "done_reason": "stop",
+                    "eval_count": len(tokens),
+                    "prompt_eval_count": prompt_eval_count,
+                    "eval_duration": int(max(cfg.token_delay * len(tokens), 1e-3) * 1e9),
+                    "total_duration": int((time.monotonic() - started) * 1e9),
+                }
+
+            if not body.get("stream", True):
+                server.active += 1
+                try:
+                    await server._wait(request, first_delay + cfg.token_delay * len(tokens))
+                except ClientGone:
+                    server.cancelled += 1
+                    return JSONResponse({"error": "client disconnected"}, status_code=499)
+                finally:
+                    server.active -= 1
+                data = final_chunk()
+                data.update(render("".join(tokens)))
+                return data
+
+            async def ndjson():
+                server.active += 1
+                try:
+                    await asyncio.sleep(first_delay)
+                    for i, token in enumerate(tokens):
+                        if i:
+                            await asyncio.sleep(cfg.token_delay)
+                        yield json.dumps({"model": model, **render(token), "done": False}) + "\n"
+                    if not cfg.truncate_stream:
+                        yield json.dumps(final_chunk()) + "\n"
+                except asyncio.CancelledError:
+                    server.cancelled += 1
+                    raise
+                finally:
+                    server.active -= 1
+
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        @app.post("/api/generate")
+        async def generate(request: Request):
+            server._track(request)
+            body = await request.json()
+            if body.get("prompt") == "" and server.config.status_code == 200:
+                # Prompt vide : Ollama charge le modèle sans générer
+                model = body.get("model", "")
+                if model not in server.loaded_models:
+                    try:
+                        await server._wait(request, server.config.load_delay)
+                    except ClientGone:
+                        return JSONResponse({"error": "client disconnected"}, status_code=499)
+                    server.loaded_models.add(model)
+                return {"model": model, "response": "", "done": True, "done_reason": "load"}
+            return await reply(request, body, body.get("prompt", "").split(), lambda text: {"response": text})
+
+        @app.post("/api/chat")
+        async def chat(request: Request):
+            server._track(request)
+            body = await request.json()
+            words = [w for m in body.get("messages", []) for w in m.get("content", "").split()]
+            return await reply(
+                request, body, words, lambda text: {"message": {"role": "assistant", "content": text}}
+            )
+
+        return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serveur Ollama factice")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--first-token-delay", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeOllamaServer(FakeOllamaConfig(first_token_delay=args.first_token_delay, token_delay=args.token_delay))
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="error")
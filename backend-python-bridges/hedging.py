@@ -0,0 +1,69 @@
+"""
+Requêtes couvertes (hedging) - Phase 3 Python Bridges
+Budget de premier token basé sur le p95 observé, au-delà duquel un modèle de secours est sollicité
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class HedgePolicy:
+    """
+    Décide quand doubler une requête vers le modèle de secours
+
+    Le budget est le p95 du délai de premier token du modèle principal
+    (fenêtre glissante), borné par `min_delay` / `max_delay`. Tant qu'il n'y
+    a pas assez de mesures, `max_delay` est utilisé.
+    """
+
+    def __init__(
+        self,
+        fallback_model: str,
+        percentile: float = 0.95,
+        min_delay: float = 0.3,
+        max_delay: float = 2.0,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        """
+        Args:
+            fallback_model: Modèle léger sollicité quand le principal tarde
+            percentile: Quantile du délai de premier token servant de budget
+            min_delay: Budget minimum (secondes), évite de doubler toutes les requêtes
+            max_delay: Budget maximum (secondes), et budget initial
+            window: Nombre de mesures conservées
+            min_samples: Mesures nécessaires avant d'utiliser le quantile
+        """
+        self.fallback_model = fallback_model
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+        self.requests = 0
+        self.hedged = 0
+        self.fallback_wins = 0
+
+    def observe(self, first_token_seconds: float):
+        """Enregistrer un délai de premier token du modèle principal"""
+        self._samples.append(first_token_seconds)
+
+    def budget(self) -> float:
+        """Délai (secondes) avant de solliciter le modèle de secours"""
+        if len(self._samples) < self.min_samples:
+            return self.max_delay
+        ordered = sorted(self._samples)
+        index = min(int(len(ordered) * self.percentile), len(ordered) - 1)
+        return min(max(ordered[index], self.min_delay), self.max_delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fallback_model": self.fallback_model,
+            "budget_ms": round(self.budget() * 1000, 1),
+            "samples": len(self._samples),
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "fallback_wins": self.fallback_wins,
+        }
+
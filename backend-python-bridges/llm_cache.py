@@ -0,0 +1,113 @@
+"""
+Cache de réponses LLM - Phase 3 Python Bridges
+Cache exact (LRU + TTL, borné en mémoire) pour les générations déterministes
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+
+@dataclass
+class CacheEntry:
+    """Entrée du cache"""
+    value: Any
+    size_bytes: int
+    expires_at: float
+
+
+class LLMResponseCache:
+    """Cache LRU borné en octets, avec expiration TTL et compteurs hit/miss"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 3600.0):
+        """
+        Args:
+            max_bytes: Taille mémoire max estimée du cache
+            ttl_seconds: Durée de vie d'une entrée
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, system_prompt: Optional[str], params: Dict[str, Any]) -> str:
+        """Clé exacte : modèle, prompts et paramètres d'échantillonnage"""
+        payload = json.dumps(
+            {"model": model, "system": system_prompt, "prompt": prompt, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_deterministic(temperature: Optional[float]) -> bool:
+        """Seul le décodage glouton (température 0) produit une réponse reproductible"""
+        return temperature is not None and temperature <= 0.0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Lire une entrée (None si absente ou expirée)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: str, value: Any, size_bytes: int):
+        """Insérer une entrée puis évincer les moins récemment utilisées au-delà du budget"""
+        if size_bytes > self.max_bytes:
+            logger.debug(f" LLM cache: entry of {size_bytes} bytes exceeds budget, not cached")
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = CacheEntry(value, size_bytes, time.monotonic() + self.ttl_seconds)
+        self.size_bytes += size_bytes
+
+        while self.size_bytes > self.max_bytes:
+            oldest_key, _ = next(iter(self._entries.items()))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.size_bytes -= entry.size_bytes
+
+    def clear(self):
+        """Vider le cache (les compteurs sont conservés)"""
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du cache"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
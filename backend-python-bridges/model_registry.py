@@ -0,0 +1,283 @@
+"""
+Registre de modèles - Phase 3 Python Bridges
+Chargement paresseux des modèles locaux (Whisper, embeddings, Piper), plusieurs
+tailles résidentes sous un budget RAM, déchargement LRU des modèles inactifs
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+
+# Empreinte RAM estimée par modèle (Mo, CPU). Les valeurs sont volontairement larges :
+# le budget sert à décider quoi décharger, pas à mesurer. Table identique dans
+# python-bridges/stt_models.py (vérifié par ses tests).
+WHISPER_MODEL_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 900,
+    "medium": 2500,
+    "large": 4500,
+    "large-v2": 4500,
+    "large-v3": 4500,
+    "distil-large-v3": 3000,
+}
+WHISPER_INT8_RATIO = 0.35  # faster-whisper int8 vs float32
+
+
+@dataclass
+class ModelEntry:
+    """Modèle résident"""
+    kind: str
+    name: str
+    instance: Any
+    size_bytes: int
+    load_ms: float
+    loaded_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    in_use: int = 0  # utilisations en cours : jamais déchargé pendant une inférence
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "size_mb": round(self.size_bytes / 1024 / 1024),
+            "load_ms": round(self.load_ms),
+            "uses": self.uses,
+            "in_use": self.in_use,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+        }
+
+
+@dataclass
+class ModelKind:
+    """Type de modèle enregistré : comment le charger et combien il pèse"""
+    loader: Callable[[str], Any]
+    size_bytes: Callable[[str], int]
+    unload: Optional[Callable[[Any], None]] = None
+
+
+class ModelRegistry:
+    """
+    Modèles chargés à la première utilisation, LRU borné en octets
+
+    Thread-safe : les clients STT/TTS sont synchrones et appelés depuis le
+    thread pool. Un même modèle n'est chargé qu'une fois même si plusieurs
+    requêtes le demandent en même temps.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 ** 3, idle_ttl: float = 900.0):
+        """
+        Args:
+            max_bytes: Budget RAM total des modèles résidents
+            idle_ttl: Inactivité (secondes) après laquelle un modèle est déchargé (0 = jamais)
+        """
+        self.max_bytes = int(os.getenv("MODEL_RAM_BUDGET_MB", max_bytes // 1024 // 1024)) * 1024 * 1024
+        self.idle_ttl = float(os.getenv("MODEL_IDLE_TTL", idle_ttl))
+        self._kinds: Dict[str, ModelKind] = {}
+        self._models: "OrderedDict[Tuple[str, str], ModelEntry]" = OrderedDict()
+        self._loading: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+
+        self.hits = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.evictions = {"budget": 0, "idle": 0, "manual": 0}
+        self.events: List[Dict[str, Any]] = []  # derniers chargements / déchargements
+        self.max_events = 50
+
+    def register(
+        self,
+        kind: str,
+        loader: Callable[[str], Any],
+        size_bytes: Callable[[str], int],
+        unload: Optional[Callable[[Any], None]] = None,
+    ):
+        """Déclarer un type de modèle (whisper, embeddings, piper...)"""
+        self._kinds[kind] = ModelKind(loader, size_bytes, unload)
+
+    def get(self, kind: str, name: str) -> Any:
+        """
+        Instance du modèle, chargée si nécessaire
+
+        Non épinglée : elle peut être déchargée dès le retour. Une inférence
+        doit passer par use(), qui la protège jusqu'à la fin du bloc.
+        """
+        with self.use(kind, name) as instance:
+            return instance
+
+    @contextmanager
+    def use(self, kind: str, name: str) -> Iterator[Any]:
+        """Modèle épinglé le temps du bloc (non déchargeable)"""
+        entry = self._acquire(kind, name)
+        try:
+            yield entry.instance
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def _acquire(self, kind: str, name: str) -> ModelEntry:
+        if kind not in self._kinds:
+            raise ValueError(f"Unknown model kind: {kind}")
+        key = (kind, name)
+
+        with self._lock:
+            entry = self._pin(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Chargement hors du verrou global : les autres modèles restent servis pendant ce temps
+        with load_lock:
+            with self._lock:
+                entry = self._pin(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry
+            entry = self._load(kind, name)
+            with self._lock:
+                self._loading.pop(key, None)
+                self._models[key] = entry
+                self.size_bytes += entry.size_bytes
+                entry.in_use += 1
+                entry.uses += 1
+                self._enforce_budget(keep=key)
+            return entry
+
+    def _pin(self, key: Tuple[str, str]) -> Optional[ModelEntry]:
+        entry = self._models.get(key)
+        if entry is not None:
+            self._models.move_to_end(key)
+            entry.in_use += 1
+            entry.uses += 1
+            entry.last_used = time.monotonic()
+        return entry
+
+    def _load(self, kind: str, name: str) -> ModelEntry:
+        spec = self._kinds[kind]
+        size = spec.size_bytes(name)
+        with self._lock:
+            # Faire de la place avant de charger : le pic mémoire compte aussi
+            self._enforce_budget(incoming=size)
+
+        start = time.perf_counter()
+        try:
+            instance = spec.loader(name)
+        except Exception as e:
+            self.load_failures += 1
+            logger.error(f" Model load failed: {kind}/{name}: {e}")
+            raise
+        load_ms = (time.perf_counter() - start) * 1000
+
+        self.loads += 1
+        self._event("load", kind, name, load_ms=round(load_ms))
+        logger.info(f" Model loaded: {kind}/{name} in {load_ms:.0f}ms (~{size / 1024 / 1024:.0f} MB)")
+        return ModelEntry(kind=kind, name=name, instance=instance, size_bytes=size, load_ms=load_ms)
+
+    def _enforce_budget(self, incoming: int = 0, keep: Optional[Tuple[str, str]] = None):
+        """Décharger les modèles les moins récemment utilisés (hors modèles en cours d'utilisation)"""
+        for key in list(self._models):
+            if self.size_bytes + incoming <= self.max_bytes:
+                break
+            entry = self._models[key]
+            if key == keep or entry.in_use:
+                continue
+            self._unload(key, "budget")
+        if self.size_bytes + incoming > self.max_bytes:
+            logger.warning(
+                f" Model RAM budget exceeded: {(self.size_bytes + incoming) / 1024 / 1024:.0f} MB "
+                f"> {self.max_bytes / 1024 / 1024:.0f} MB (models in use cannot be unloaded)"
+            )
+
+    def _unload(self, key: Tuple[str, str], reason: str):
+        entry = self._models.pop(key)
+        self.size_bytes -= entry.size_bytes
+        self.evictions[reason] += 1
+        unload = self._kinds[entry.kind].unload
+        if unload is not None:
+            try:
+                unload(entry.instance)
+            except Exception as e:
+                logger.warning(f" Model unload hook failed: {entry.kind}/{entry.name}: {e}")
+        self._event("unload", entry.kind, entry.name, reason=reason)
+        logger.info(f" Model unloaded ({reason}): {entry.kind}/{entry.name}")
+
+    def _event(self, event: str, kind: str, name: str, **details):
+        self.events.append({"event": event, "kind": kind, "name": name, "at": time.time(), **details})
+        del self.events[:-self.max_events]
+
+    def evict_idle(self) -> int:
+        """Décharger les modèles inactifs depuis plus de idle_ttl, renvoie le nombre déchargé"""
+        if self.idle_ttl <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                key for key, entry in self._models.items()
+                if not entry.in_use and now - entry.last_used > self.idle_ttl
+            ]
+            for key in idle:
+                self._unload(key, "idle")
+        return len(idle)
+
+    def unload(self, kind: str, name: str) -> bool:
+        """Décharger un modèle explicitement (s'il n'est pas en cours d'utilisation)"""
+        with self._lock:
+            entry = self._models.get((kind, name))
+            if entry is None or entry.in_use:
+                return False
+            self._unload((kind, name), "manual")
+            return True
+
+    def put(self, kind: str, name: str, instance: Any):
+        """Enregistrer une instance déjà construite (remplace la précédente)"""
+        key = (kind, name)
+        with self._lock:
+            if key in self._models:
+                self._unload(key, "manual")
+            entry = ModelEntry(
+                kind=kind, name=name, instance=instance, size_bytes=self._kinds[kind].size_bytes(name), load_ms=0.0
+            )
+            self._models[key] = entry
+            self.size_bytes += entry.size_bytes
+            self._enforce_budget(keep=key)
+
+    def resident(self, kind: Optional[str] = None) -> List[str]:
+        return [name for (k, name) in self._models if kind is None or k == kind]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = [entry.to_dict() for entry in self._models.values()]
+        return {
+            "resident": models,
+            "size_mb": round(self.size_bytes / 1024 / 1024),
+            "budget_mb": round(self.max_bytes / 1024 / 1024),
+            "idle_ttl": self.idle_ttl,
+            "hits": self.hits,
+            "loads": self.loads,
+            "load_failures": self.load_failures,
+            "evictions": dict(self.evictions),
+            "recent_events": self.events[-10:],
+        }
+
+
+# Instance globale
+_model_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Obtenir le registre partagé par les clients Whisper, embeddings et Piper"""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
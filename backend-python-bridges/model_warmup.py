@@ -0,0 +1,164 @@
+"""
+Préchauffage des modèles - Phase 3 Python Bridges
+Chargement des modèles au démarrage, maintien en mémoire via keep_alive, suivi des évictions
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from ollama_client import OllamaClient
+
+
+@dataclass
+class ModelState:
+    """État d'un modèle sur un nœud"""
+    model: str
+    backend: str
+    loaded: bool = False
+    load_ms: Optional[float] = None  # durée du dernier chargement
+    loads: int = 0
+    evictions: int = 0
+    last_loaded: Optional[float] = None  # time.time()
+    last_evicted: Optional[float] = None
+    resident_ms: Optional[float] = None  # durée de résidence avant la dernière éviction
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "backend": self.backend,
+            "loaded": self.loaded,
+            "load_ms": None if self.load_ms is None else round(self.load_ms, 1),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "last_loaded": self.last_loaded,
+            "last_evicted": self.last_evicted,
+            "resident_ms": None if self.resident_ms is None else round(self.resident_ms, 1),
+            "error": self.error,
+        }
+
+
+class ModelWarmer:
+    """
+    Garde les modèles configurés chargés dans Ollama
+
+    Au démarrage, chaque modèle est chargé sur chaque nœud par une requête
+    sans prompt (Ollama charge le modèle sans rien générer). Ensuite, à chaque
+    cycle, /api/ps révèle les modèles évincés (rechargés aussitôt) et une
+    nouvelle requête vide repousse l'échéance `keep_alive` des autres.
+    """
+
+    def __init__(self, client: OllamaClient, models: Optional[List[str]] = None, refresh_interval: float = 240.0):
+        """
+        Args:
+            client: Client Ollama (pool HTTP, nœuds et keep_alive)
+            models: Modèles à garder chargés (défaut : principal + secours du hedging)
+            refresh_interval: Période de rafraîchissement (secondes), inférieure au keep_alive
+        """
+        env_models = os.getenv("OLLAMA_WARM_MODELS")
+        if env_models:
+            models = [m.strip() for m in env_models.split(",") if m.strip()]
+        elif not models:
+            models = [client.model]
+            if client.hedging is not None:
+                models.append(client.hedging.fallback_model)
+        self.client = client
+        self.models = list(dict.fromkeys(models))
+        self.refresh_interval = float(os.getenv("OLLAMA_WARM_INTERVAL", refresh_interval))
+        self.states: Dict[tuple, ModelState] = {}
+        self.cycles = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """Chaque modèle est chargé sur au moins un nœud"""
+        return all(
+            any(state.loaded for (model, _), state in self.states.items() if model == wanted)
+            for wanted in self.models
+        )
+
+    def start(self):
+        """Lancer le préchauffage puis les rafraîchissements en tâche de fond"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f" Model warm-up cycle failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self):
+        """Un cycle : détecter les évictions puis (re)charger / prolonger chaque modèle sur chaque nœud"""
+        http = self.client._get_client()
+        await self.client.balancer.probe(http)
+
+        jobs = []
+        for backend in self.client.balancer.backends:
+            for model in self.models:
+                state = self.states.setdefault((model, backend.url), ModelState(model=model, backend=backend.url))
+                if state.loaded and not backend.healthy:
+                    state.loaded = False  # nœud injoignable, pas une éviction
+                elif state.loaded and model not in backend.loaded_models:
+                    self._evicted(state)
+                jobs.append(self._load(http, backend, state))
+        await asyncio.gather(*jobs)
+
+        self.cycles += 1
+        if self.cycles == 1:
+            logger.info(f" Model warm-up done: ready={self.ready} ({', '.join(self.models)})")
+
+    def _evicted(self, state: ModelState):
+        now = time.time()
+        state.loaded = False
+        state.evictions += 1
+        state.last_evicted = now
+        if state.last_loaded is not None:
+            state.resident_ms = (now - state.last_loaded) * 1000
+        logger.warning(f" Model evicted by Ollama: {state.model} on {state.backend}")
+
+    async def _load(self, http, backend, state: ModelState):
+        """Requête sans prompt : charge le modèle si besoin et repousse son keep_alive"""
+        payload = {"model": state.model, "prompt": "", "stream": False, "keep_alive": self.client.keep_alive}
+        start = time.perf_counter()
+        try:
+            response = await http.post(f"{backend.url}/api/generate", json=payload)
+            response.raise_for_status()
+        except Exception as e:
+            state.loaded = False
+            state.error = str(e) or type(e).__name__
+            logger.warning(f" Model warm-up failed: {state.model} on {backend.url} ({state.error})")
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        state.error = None
+        if not state.loaded:
+            # Chargement réel (et non simple prolongation du keep_alive)
+            state.loaded = True
+            state.loads += 1
+            state.load_ms = elapsed_ms
+            state.last_loaded = time.time()
+            logger.info(f" Model loaded: {state.model} on {backend.url} in {elapsed_ms:.0f}ms")
+        backend.loaded_models.add(state.model)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "models": self.models,
+            "refresh_interval": self.refresh_interval,
+            "cycles": self.cycles,
+            "states": [state.to_dict() for state in self.states.values()],
+        }
@@ -0,0 +1,200 @@
+"""
+Répartiteur Ollama multi-nœuds - Phase 3 Python Bridges
+Routage par requêtes en cours ou débit mesuré, health checks passifs/actifs, affinité de modèle
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+import httpx
+from loguru import logger
+
+
+@dataclass
+class OllamaBackend:
+    """État d'un nœud d'inférence Ollama"""
+    url: str
+    outstanding: int = 0
+    healthy: bool = True
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    tokens_per_sec: float = 0.0  # moyenne mobile exponentielle
+    loaded_models: Set[str] = field(default_factory=set)
+    requests: int = 0
+    failures: int = 0
+
+    def is_available(self, now: float) -> bool:
+        return self.healthy and self.ejected_until <= now
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "available": self.is_available(time.monotonic()),
+            "outstanding": self.outstanding,
+            "tokens_per_sec": round(self.tokens_per_sec, 2),
+            "loaded_models": sorted(self.loaded_models),
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class OllamaBalancer:
+    """
+    Choix du nœud Ollama pour chaque requête
+
+    - Stratégies : "least_outstanding" (moins de requêtes en cours) ou
+      "tokens_per_sec" (meilleur débit attendu compte tenu de la charge)
+    - Health check passif : éjection après `failure_threshold` échecs consécutifs
+    - Health check actif : sondage périodique de /api/ps, qui réadmet les nœuds
+      et met à jour les modèles chargés
+    - Affinité : un modèle est routé en priorité vers les nœuds où il est déjà chargé
+    """
+
+    STRATEGIES = ("least_outstanding", "tokens_per_sec")
+
+    def __init__(
+        self,
+        urls: List[str],
+        strategy: str = "least_outstanding",
+        failure_threshold: int = 3,
+        eject_seconds: float = 30.0,
+        affinity_spill: int = 4,
+        ewma_alpha: float = 0.3,
+    ):
+        """
+        Args:
+            urls: URLs des nœuds Ollama
+            strategy: Stratégie de routage (voir STRATEGIES)
+            failure_threshold: Échecs consécutifs avant éjection
+            eject_seconds: Durée d'éjection avant nouvel essai
+            affinity_spill: Requêtes en cours au-delà desquelles un nœud « froid » peut être utilisé
+            ewma_alpha: Poids de la dernière mesure de débit
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Invalid strategy: {strategy}. Allowed: {self.STRATEGIES}")
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.eject_seconds = eject_seconds
+        self.affinity_spill = affinity_spill
+        self.ewma_alpha = ewma_alpha
+        self.backends: List[OllamaBackend] = []
+        self.set_urls(urls)
+
+    def set_urls(self, urls: List[str]):
+        """Remplacer la liste des nœuds"""
+        urls = [u.strip().rstrip("/") for u in urls if u and u.strip()]
+        if not urls:
+            raise ValueError("At least one Ollama backend URL is required")
+        self.backends = [OllamaBackend(url=u) for u in urls]
+
+    # ------------------------------------------------------------------
+    # Routage
+    # ------------------------------------------------------------------
+
+    def _score(self, backend: OllamaBackend, default_tps: float) -> float:
+        """Score à minimiser"""
+        if self.strategy == "tokens_per_sec":
+            tps = backend.tokens_per_sec or default_tps
+            return (backend.outstanding + 1) / tps
+        return backend.outstanding
+
+    def pick(self, model: str, exclude: Optional[Set[str]] = None, prefer: Optional[str] = None) -> OllamaBackend:
+        """
+        Choisir le nœud pour `model` (en excluant éventuellement des nœuds déjà essayés)
+
+        `prefer` épingle une conversation sur le nœud qui détient son cache KV, tant qu'il est disponible.
+        """
+        now = time.monotonic()
+        exclude = exclude or set()
+        candidates = [b for b in self.backends if b.url not in exclude and b.is_available(now)]
+        for backend in candidates:
+            if backend.url == prefer:
+                return backend
+        if not candidates:
+            # Tous éjectés : tenter malgré tout le nœud dont l'éjection expire le plus tôt
+            remaining = [b for b in self.backends if b.url not in exclude] or self.backends
+            return min(remaining, key=lambda b: b.ejected_until)
+
+        # Nœuds sans mesure : optimistes, pour qu'ils soient essayés
+        default_tps = max((b.tokens_per_sec for b in candidates), default=0.0) or 1.0
+
+        warm = [b for b in candidates if model in b.loaded_models]
+        if warm:
+            best_warm = min(warm, key=lambda b: self._score(b, default_tps))
+            if best_warm.outstanding < self.affinity_spill:
+                return best_warm
+
+        return min(candidates, key=lambda b: self._score(b, default_tps))
+
+    @contextmanager
+    def track(self, backend: OllamaBackend) -> Iterator[OllamaBackend]:
+        """Compter la requête comme en cours ; une exception est comptée comme un échec"""
+        backend.outstanding += 1
+        backend.requests += 1
+        try:
+            yield backend
+        except (httpx.TransportError, httpx.TimeoutException):
+            self.report_failure(backend)
+            raise
+        finally:
+            backend.outstanding -= 1
+
+    def report_success(self, backend: OllamaBackend, model: str, tokens: int = 0, seconds: float = 0.0):
+        """Requête réussie : réinitialise les échecs, met à jour débit et affinité"""
+        backend.consecutive_failures = 0
+        backend.healthy = True
+        backend.loaded_models.add(model)
+        if tokens > 0 and seconds > 0:
+            sample = tokens / seconds
+            if backend.tokens_per_sec:
+                backend.tokens_per_sec += self.ewma_alpha * (sample - backend.tokens_per_sec)
+            else:
+                backend.tokens_per_sec = sample
+
+    def report_failure(self, backend: OllamaBackend):
+        """Échec (erreur réseau ou 5xx) : éjection après `failure_threshold` échecs consécutifs"""
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.failure_threshold and backend.ejected_until <= time.monotonic():
+            backend.ejected_until = time.monotonic() + self.eject_seconds
+            backend.loaded_models.clear()
+            logger.warning(f" Ollama backend ejected for {self.eject_seconds:.0f}s: {backend.url}")
+
+    # ------------------------------------------------------------------
+    # Health check actif
+    # ------------------------------------------------------------------
+
+    async def probe(self, client: httpx.AsyncClient, timeout: float = 5.0) -> bool:
+        """Sonder tous les nœuds (/api/ps) ; True si au moins un est disponible"""
+        await asyncio.gather(*(self._probe_one(client, b, timeout) for b in self.backends))
+        now = time.monotonic()
+        return any(b.is_available(now) for b in self.backends)
+
+    async def _probe_one(self, client: httpx.AsyncClient, backend: OllamaBackend, timeout: float):
+        try:
+            response = await client.get(f"{backend.url}/api/ps", timeout=timeout)
+            response.raise_for_status()
+            models = response.json().get("models", [])
+        except Exception as e:
+            if backend.healthy:
+                logger.warning(f" Ollama backend unhealthy: {backend.url} ({e})")
+            backend.healthy = False
+            backend.loaded_models.clear()
+            return
+
+        if not backend.healthy or backend.ejected_until > time.monotonic():
+            logger.info(f" Ollama backend re-admitted: {backend.url}")
+        backend.healthy = True
+        backend.ejected_until = 0.0
+        backend.consecutive_failures = 0
+        backend.loaded_models = {m.get("name") or m.get("model") for m in models if m.get("name") or m.get("model")}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "backends": [b.to_dict() for b in self.backends],
+        }
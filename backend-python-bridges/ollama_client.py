@@ -5,10 +5,25 @@ Intégration avec LLaMA locale via HTTP
 
 import httpx
 import json
-from typing import Optional, AsyncGenerator, Dict, Any, Generator
-from dataclasses import dataclass
+from typing import Optional, AsyncGenerator, Dict, Any, List
+from dataclasses import dataclass, replace
 from loguru import logger
+import asyncio
 import os
+import time
+
+from chat_sessions import ChatSession, ChatSessionStore
+from hedging import HedgePolicy
+from llm_cache import LLMResponseCache
+from ollama_balancer import OllamaBalancer
+
+
+class OllamaError(Exception):
+    """Erreur renvoyée par Ollama pendant un streaming"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable  # erreur du nœud (5xx), un autre nœud peut être essayé
 
 
 @dataclass
@@ -20,6 +35,16 @@ class OllamaResponse:
     tokens_generated: int
     tokens_prompt: int
     duration_ms: float
+    cached: bool = False
+    backend: Optional[str] = None  # nœud qui a servi la requête
+
+
+@dataclass
+class OllamaStreamChunk:
+    """Fragment d'une génération en streaming"""
+    token: str
+    done: bool = False
+    final: Optional[OllamaResponse] = None  # statistiques, présentes sur le dernier fragment
 
 
 class OllamaClient:
@@ -29,25 +54,230 @@ class OllamaClient:
         self,
         base_url: str = "http://localhost:11434",
         model: str = "llama2:7b",
-        timeout: int = 120
+        timeout: int = 120,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        base_urls: Optional[List[str]] = None,
+        strategy: str = "least_outstanding",
+        health_interval: float = 10.0,
+        keep_alive: str = "30m",
+        hedge_model: Optional[str] = None,
     ):
-        self.base_url = os.getenv("OLLAMA_URL", base_url)
+        """
+        Initialiser le client Ollama
+
+        Args:
+            base_url: URL du serveur Ollama
+            model: Modèle par défaut
+            timeout: Timeout des requêtes (secondes)
+            max_connections: Connexions simultanées max du pool
+            max_keepalive_connections: Connexions inactives conservées dans le pool
+            keepalive_expiry: Durée de vie d'une connexion inactive (secondes)
+            http2: Activer HTTP/2 (nécessite le paquet `h2`, utile derrière un proxy TLS)
+            base_urls: Plusieurs nœuds Ollama (prioritaire sur base_url)
+            strategy: Routage entre nœuds ("least_outstanding" ou "tokens_per_sec")
+            health_interval: Période du health check actif (secondes)
+            keep_alive: Durée pendant laquelle Ollama garde le modèle (et le cache KV) en mémoire
+            hedge_model: Modèle léger sollicité quand le premier token du modèle principal tarde
+        """
+        urls = os.getenv("OLLAMA_URLS")
+        if urls:
+            base_urls = urls.split(",")
+        elif not base_urls:
+            base_urls = [os.getenv("OLLAMA_URL", base_url)]
+        self.balancer = OllamaBalancer(
+            base_urls,
+            strategy=os.getenv("OLLAMA_LB_STRATEGY", strategy),
+            failure_threshold=int(os.getenv("OLLAMA_LB_FAILURE_THRESHOLD", 3)),
+            eject_seconds=float(os.getenv("OLLAMA_LB_EJECT_SECONDS", 30)),
+        )
+        self.health_interval = float(os.getenv("OLLAMA_HEALTH_INTERVAL", health_interval))
+        self._health_task: Optional[asyncio.Task] = None
+
         self.model = os.getenv("OLLAMA_MODEL", model)
         self.timeout = timeout
-        logger.info(f" Ollama Async Client initialized: {self.base_url} | Model: {self.model}")
+        self.max_connections = int(os.getenv("OLLAMA_MAX_CONNECTIONS", max_connections))
+        self.max_keepalive_connections = int(os.getenv("OLLAMA_MAX_KEEPALIVE", max_keepalive_connections))
+        self.keepalive_expiry = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", keepalive_expiry))
+        self.http2 = os.getenv("OLLAMA_HTTP2", str(http2)).lower() in ("1", "true", "yes")
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", keep_alive)
+
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning(" OLLAMA_HTTP2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+                self.http2 = False
+
+        # Client HTTP partagé, créé au premier appel et fermé par aclose()
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Cache des réponses déterministes (température 0)
+        self.cache: Optional[LLMResponseCache] = None
+        if os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"):
+            self.cache = LLMResponseCache(
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL", 3600)),
+            )
+
+        # Hedging vers un modèle léger (désactivé si aucun modèle de secours)
+        self.hedging: Optional[HedgePolicy] = None
+        hedge_model = os.getenv("OLLAMA_HEDGE_MODEL", hedge_model or "")
+        if hedge_model:
+            self.hedging = HedgePolicy(
+                hedge_model,
+                min_delay=float(os.getenv("OLLAMA_HEDGE_MIN_MS", 300)) / 1000,
+                max_delay=float(os.getenv("OLLAMA_HEDGE_MAX_MS", 2000)) / 1000,
+            )
+
+        # Historiques des conversations (/api/chat)
+        self.sessions = ChatSessionStore(
+            max_bytes=int(os.getenv("LLM_SESSION_MAX_BYTES", 16 * 1024 * 1024)),
+            idle_ttl=float(os.getenv("LLM_SESSION_IDLE_TTL", 1800)),
+        )
+        backends = ", ".join(b.url for b in self.balancer.backends)
+        logger.info(f" Ollama Async Client initialized: {backends} | Model: {self.model}")
+
+    @property
+    def base_url(self) -> str:
+        """URL du premier nœud"""
+        return self.balancer.backends[0].url
+
+    @base_url.setter
+    def base_url(self, url: str):
+        self.balancer.set_urls([url])
+
+    @property
+    def max_attempts(self) -> int:
+        """Un essai par nœud, au plus deux"""
+        return min(2, len(self.balancer.backends))
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Obtenir le client HTTP poolé (connexions keep-alive réutilisées)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+            logger.debug(
+                f" Ollama connection pool opened (max={self.max_connections}, "
+                f"keepalive={self.max_keepalive_connections}, http2={self.http2})"
+            )
+        return self._client
+
+    def start_health_checks(self):
+        """Lancer le health check actif périodique des nœuds (à appeler dans la boucle asyncio)"""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.ensure_future(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await self.balancer.probe(self._get_client())
+            await asyncio.sleep(self.health_interval)
+
+    async def aclose(self):
+        """Fermer le pool de connexions"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info(" Ollama connection pool closed")
+        self._client = None
 
     async def health_check(self) -> bool:
-        """Vérifier si Ollama est accessible (Asynchrone)"""
-        try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                is_healthy = response.status_code == 200
-                if is_healthy:
-                    logger.info(" Ollama service healthy")
-                return is_healthy
-        except Exception as e:
-            logger.error(f" Ollama connection error: {e}")
-            return False
+        """Vérifier si au moins un nœud Ollama est accessible (Asynchrone)"""
+        is_healthy = await self.balancer.probe(self._get_client())
+        if is_healthy:
+            logger.info(" Ollama service healthy")
+        else:
+            logger.error(" Ollama connection error: no backend available")
+        return is_healthy
+
+    def _build_payload(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        top_p: float,
+        max_tokens: int,
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """Corps de requête /api/generate (les paramètres d'échantillonnage vont dans `options`)"""
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"{system_prompt}\n\nUser: {prompt}"
+        return {
+            "model": self.model,
+            "prompt": full_prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": temperature,
+                "top_p": top_p,
+                "num_predict": max_tokens,
+            },
+        }
+
+    def request_key(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        max_tokens: int = 512,
+    ) -> str:
+        """Empreinte exacte d'une requête (modèle, prompts, paramètres d'échantillonnage)"""
+        params = {"temperature": temperature, "top_p": top_p, "num_predict": max_tokens}
+        return LLMResponseCache.make_key(self.model, prompt, system_prompt, params)
+
+    def cache_key(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        max_tokens: int = 512,
+    ) -> Optional[str]:
+        """Clé de cache de la requête, None si elle n'est pas cacheable (non déterministe)"""
+        if self.cache is None or not LLMResponseCache.is_deterministic(temperature):
+            return None
+        return self.request_key(prompt, system_prompt, temperature, top_p, max_tokens)
+
+    def get_cached(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        max_tokens: int = 512,
+    ) -> Optional[OllamaResponse]:
+        """Réponse en cache ; `duration_ms` reflète alors le temps de lecture du cache"""
+        key = self.cache_key(prompt, system_prompt, temperature, top_p, max_tokens)
+        if key is None:
+            return None
+
+        start = time.perf_counter()
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        logger.debug(" LLM cache hit")
+        return replace(cached, cached=True, duration_ms=(time.perf_counter() - start) * 1000)
+
+    def _store(self, key: Optional[str], result: OllamaResponse):
+        """Mémoriser une réponse réussie"""
+        if key is None or result.stop_reason == "error":
+            return
+        # Estimation : texte UTF-8 + clé + surcoût fixe de l'objet
+        size = len(result.text.encode("utf-8")) + len(key) + 256
+        self.cache.put(key, result, size)
 
     async def generate(
         self,
@@ -56,102 +286,327 @@ class OllamaClient:
         temperature: float = 0.7,
         top_p: float = 0.9,
         max_tokens: int = 512,
+        check_cache: bool = True,
+        hedge: bool = False,
     ) -> OllamaResponse:
-        """Générer une réponse complète (Asynchrone)"""
-        full_prompt = prompt
-        if system_prompt:
-            full_prompt = f"{system_prompt}\n\nUser: {prompt}"
+        """
+        Générer une réponse complète (Asynchrone)
 
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": full_prompt,
-                        "stream": False,
-                        "temperature": temperature,
-                        "top_p": top_p,
-                        "num_predict": max_tokens,
-                    }
+        `check_cache=False` saute la lecture du cache (déjà faite par l'appelant),
+        la réponse y est tout de même enregistrée. `hedge=True` autorise le repli
+        sur le modèle léger (voir _hedged_stream()).
+        """
+        if check_cache:
+            cached = self.get_cached(prompt, system_prompt, temperature, top_p, max_tokens)
+            if cached is not None:
+                return cached
+        key = self.cache_key(prompt, system_prompt, temperature, top_p, max_tokens)
+
+        if hedge and self.can_hedge:
+            # Le premier token n'est observable qu'en streaming
+            payload = self._build_payload(prompt, system_prompt, temperature, top_p, max_tokens, stream=True)
+            try:
+                async for chunk in self._hedged_stream(payload, key):
+                    if chunk.done:
+                        return chunk.final
+            except (httpx.HTTPError, OllamaError) as e:
+                logger.error(f" Ollama hedged generation error: {e}")
+                return self._error_response(str(e))
+
+        payload = self._build_payload(prompt, system_prompt, temperature, top_p, max_tokens, stream=False)
+        return await self._request("/api/generate", payload, key)
+
+    def _error_response(self, error: str, model: Optional[str] = None) -> OllamaResponse:
+        return OllamaResponse(
+            text=f"Error: {error}", model=model or self.model, stop_reason="error", tokens_generated=0, tokens_prompt=0, duration_ms=0
+        )
+
+    async def _request(
+        self, path: str, payload: Dict[str, Any], key: Optional[str] = None, prefer: Optional[str] = None
+    ) -> OllamaResponse:
+        """Requête non streamée avec bascule sur un autre nœud en cas d'erreur réseau ou 5xx"""
+        model = payload["model"]
+        error = ""
+        tried = set()
+        for _ in range(self.max_attempts):
+            backend = self.balancer.pick(model, exclude=tried, prefer=prefer)
+            tried.add(backend.url)
+            try:
+                with self.balancer.track(backend):
+                    response = await self._get_client().post(f"{backend.url}{path}", json=payload)
+            except Exception as e:
+                logger.error(f" Ollama generation error ({backend.url}): {e}")
+                error = str(e)
+                continue
+
+            if response.status_code >= 500:
+                self.balancer.report_failure(backend)
+                error = str(response.status_code)
+                continue
+
+            if response.status_code == 200:
+                data = response.json()
+                self.balancer.report_success(
+                    backend, model, data.get("eval_count", 0), data.get("eval_duration", 0) / 1e9
+                )
+                result = OllamaResponse(
+                    text=self._token(data).strip(),
+                    model=model,
+                    stop_reason=data.get("done_reason", data.get("stop_reason", "length")),
+                    tokens_generated=data.get("eval_count", 0),
+                    tokens_prompt=data.get("prompt_eval_count", 0),
+                    duration_ms=data.get("total_duration", 0) / 1_000_000,
+                    backend=backend.url,
                 )
+                self._store(key, result)
+                return result
+
+            error = str(response.status_code)
+            break
+
+        return self._error_response(error, model)
 
-                if response.status_code == 200:
-                    data = response.json()
-                    return OllamaResponse(
-                        text=data.get("response", "").strip(),
-                        model=self.model,
-                        stop_reason=data.get("stop_reason", "length"),
-                        tokens_generated=data.get("eval_count", 0),
-                        tokens_prompt=data.get("prompt_eval_count", 0),
-                        duration_ms=data.get("total_duration", 0) / 1_000_000,
-                    )
-                else:
-                    return OllamaResponse(text=f"Error: {response.status_code}", model=self.model, stop_reason="error", tokens_generated=0, tokens_prompt=0, duration_ms=0)
-        except Exception as e:
-            logger.error(f" Ollama generation error: {e}")
-            return OllamaResponse(text=f"Error: {str(e)}", model=self.model, stop_reason="error", tokens_generated=0, tokens_prompt=0, duration_ms=0)
-
-
-    def generate_stream(
+
+    async def stream(
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         top_p: float = 0.9,
-    ) -> Generator[str, None, None]:
+        max_tokens: int = 512,
+        check_cache: bool = True,
+        hedge: bool = False,
+    ) -> AsyncGenerator[OllamaStreamChunk, None]:
         """
-        Générer une réponse en streaming (token par token)
+        Générer une réponse en streaming à partir du NDJSON émis par Ollama
 
         Args:
             prompt: Prompt utilisateur
             system_prompt: Prompt système
             temperature: Contrôle créativité
             top_p: Nucleus sampling
+            max_tokens: Nombre max de tokens générés
+            check_cache: Servir une réponse en cache d'un seul fragment si disponible
+            hedge: Autoriser le repli sur le modèle léger si le premier token tarde
 
         Yields:
-            Tokens générés un par un
+            OllamaStreamChunk au fil de l'eau, le dernier porte `done` et les statistiques
+
+        Raises:
+            OllamaError: statut HTTP non 200 ou erreur signalée par Ollama
         """
-        full_prompt = prompt
-        if system_prompt:
-            full_prompt = f"{system_prompt}\n\nUser: {prompt}"
+        cached = self.get_cached(prompt, system_prompt, temperature, top_p, max_tokens) if check_cache else None
+        if cached is not None:
+            yield OllamaStreamChunk(token=cached.text)
+            yield OllamaStreamChunk(token="", done=True, final=cached)
+            return
+        key = self.cache_key(prompt, system_prompt, temperature, top_p, max_tokens)
+        payload = self._build_payload(prompt, system_prompt, temperature, top_p, max_tokens, stream=True)
+        if hedge and self.can_hedge:
+            source = self._hedged_stream(payload, key)
+        else:
+            source = self._stream("/api/generate", payload, key)
+        async for chunk in source:
+            yield chunk
+
+    @property
+    def can_hedge(self) -> bool:
+        return self.hedging is not None and self.hedging.fallback_model != self.model
+
+    async def _hedged_stream(
+        self, payload: Dict[str, Any], key: Optional[str] = None
+    ) -> AsyncGenerator[OllamaStreamChunk, None]:
+        """
+        Flux du modèle principal, doublé par le modèle léger si le premier token
+        n'arrive pas dans le budget (p95 observé) ou si le principal échoue.
+        Le premier des deux à produire un token est servi, l'autre est annulé.
+        """
+        policy = self.hedging
+        policy.requests += 1
+        started = time.monotonic()
 
+        primary = self._stream("/api/generate", payload, key)
+        firsts = {primary: asyncio.ensure_future(primary.__anext__())}
+        done, _ = await asyncio.wait(firsts.values(), timeout=policy.budget())
+        if not done or firsts[primary].exception() is not None:
+            policy.hedged += 1
+            logger.debug(f" Ollama hedge: {payload['model']} slow or failing, trying {policy.fallback_model}")
+            # Pas de clé de cache : la réponse du modèle léger ne doit pas passer pour celle du principal
+            fallback = self._stream("/api/generate", {**payload, "model": policy.fallback_model})
+            firsts[fallback] = asyncio.ensure_future(fallback.__anext__())
+
+        winner = None
         try:
-            logger.debug(f" Ollama stream: {self.model}")
-
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": full_prompt,
-                    "stream": True,
-                    "temperature": temperature,
-                    "top_p": top_p,
-                },
-                stream=True,
-                timeout=self.timeout
-            )
+            pending = set(firsts.values())
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((gen for gen, task in firsts.items() if task in done and task.exception() is None), None)
+            if winner is None:
+                firsts[primary].result()  # les deux ont échoué : remonter l'erreur du principal
+        finally:
+            for gen, task in firsts.items():
+                if gen is not winner:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                    await gen.aclose()
 
-            if response.status_code == 200:
-                for line in response.iter_lines():
-                    if line:
-                        try:
-                            data = json.loads(line)
-                            token = data.get("response", "")
+        # Seul un premier token du principal mesure son délai : une victoire du secours
+        # (principal lent ou en échec) ne dit rien de sa latence et fausserait le p95
+        if winner is primary:
+            policy.observe(time.monotonic() - started)
+        else:
+            policy.fallback_wins += 1
+
+        yield firsts[winner].result()
+        async for chunk in winner:
+            yield chunk
+
+    async def _stream(
+        self, path: str, payload: Dict[str, Any], key: Optional[str] = None, prefer: Optional[str] = None
+    ) -> AsyncGenerator[OllamaStreamChunk, None]:
+        """Lecture du NDJSON, rejouée sur un autre nœud tant qu'aucun token n'a été émis"""
+        model = payload["model"]
+        tried = set()
+        attempts = self.max_attempts
+
+        for attempt in range(attempts):
+            backend = self.balancer.pick(model, exclude=tried, prefer=prefer)
+            tried.add(backend.url)
+            logger.debug(f" Ollama stream: {model} via {backend.url}")
+            text_parts = []
+
+            try:
+                with self.balancer.track(backend):
+                    async with self._get_client().stream("POST", f"{backend.url}{path}", json=payload) as response:
+                        if response.status_code != 200:
+                            await response.aread()
+                            retryable = response.status_code >= 500
+                            if retryable:
+                                self.balancer.report_failure(backend)
+                            raise OllamaError(f"Ollama stream error: {response.status_code}", retryable=retryable)
+
+                        async for line in response.aiter_lines():
+                            if not line:
+                                continue
+                            try:
+                                data = json.loads(line)
+                            except json.JSONDecodeError:
+                                continue
+
+                            if "error" in data:
+                                raise OllamaError(data["error"])
+
+                            token = self._token(data)
                             if token:
-                                yield token
-                        except json.JSONDecodeError:
-                            continue
-            else:
-                logger.error(f" Ollama stream error: {response.status_code}")
-                yield f"Error: {response.status_code}"
-
-        except requests.Timeout:
-            logger.error(f" Ollama stream timeout")
-            yield "Error: Ollama timeout"
-        except Exception as e:
-            logger.error(f" Ollama stream error: {e}")
-            yield f"Error: {str(e)}"
+                                text_parts.append(token)
+                                yield OllamaStreamChunk(token=token)
+
+                            if data.get("done"):
+                                self.balancer.report_success(
+                                    backend, model, data.get("eval_count", 0), data.get("eval_duration", 0) / 1e9
+                                )
+                                final = OllamaResponse(
+                                    text="".join(text_parts).strip(),
+                                    model=model,
+                                    stop_reason=data.get("done_reason", "stop"),
+                                    tokens_generated=data.get("eval_count", 0),
+                                    tokens_prompt=data.get("prompt_eval_count", 0),
+                                    duration_ms=data.get("total_duration", 0) / 1_000_000,
+                                    backend=backend.url,
+                                )
+                                self._store(key, final)
+                                yield OllamaStreamChunk(token="", done=True, final=final)
+                                return
+
+                        # Flux coupé sans ligne `done` : rejoué ailleurs seulement si rien n'a été émis
+                        self.balancer.report_failure(backend)
+                        raise OllamaError("Ollama stream ended without done", retryable=True)
+            except (httpx.TransportError, OllamaError) as e:
+                # Rejouer sur un autre nœud seulement si rien n'a encore été émis
+                retryable = isinstance(e, httpx.TransportError) or e.retryable
+                if text_parts or not retryable or attempt == attempts - 1:
+                    raise
+                logger.warning(f" Ollama stream failed on {backend.url}, retrying: {e}")
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        max_tokens: int = 512,
+    ) -> AsyncGenerator[str, None]:
+        """Générer une réponse en streaming (token par token)"""
+        async for chunk in self.stream(prompt, system_prompt, temperature, top_p, max_tokens):
+            if chunk.token:
+                yield chunk.token
+
+    @staticmethod
+    def _token(data: Dict[str, Any]) -> str:
+        """Texte d'une réponse /api/generate (`response`) ou /api/chat (`message.content`)"""
+        if "message" in data:
+            return data["message"].get("content", "")
+        return data.get("response", "")
+
+    def _chat_payload(
+        self,
+        session: ChatSession,
+        prompt: str,
+        temperature: float,
+        top_p: float,
+        max_tokens: int,
+        stream: bool,
+    ) -> Dict[str, Any]:
+        """Corps de requête /api/chat : historique de la session + nouveau tour"""
+        return {
+            "model": self.model,
+            "messages": session.messages + [{"role": "user", "content": prompt}],
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": temperature,
+                "top_p": top_p,
+                "num_predict": max_tokens,
+            },
+        }
+
+    async def chat(
+        self,
+        session: ChatSession,
+        prompt: str,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        max_tokens: int = 512,
+    ) -> OllamaResponse:
+        """
+        Tour de conversation (Asynchrone)
+
+        La session reste sur le même nœud pour qu'Ollama réutilise le cache KV
+        du préfixe : seul le nouveau tour est évalué. Le tour n'est ajouté à
+        l'historique qu'en cas de succès.
+        """
+        async with session.lock:
+            payload = self._chat_payload(session, prompt, temperature, top_p, max_tokens, stream=False)
+            result = await self._request("/api/chat", payload, prefer=session.backend_url)
+            if result.stop_reason != "error":
+                self.sessions.record_turn(session, prompt, result.text, result.backend)
+            return result
+
+    async def chat_stream(
+        self,
+        session: ChatSession,
+        prompt: str,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        max_tokens: int = 512,
+    ) -> AsyncGenerator[OllamaStreamChunk, None]:
+        """Tour de conversation en streaming (voir chat() et stream())"""
+        async with session.lock:
+            payload = self._chat_payload(session, prompt, temperature, top_p, max_tokens, stream=True)
+            async for chunk in self._stream("/api/chat", payload, prefer=session.backend_url):
+                if chunk.done:
+                    self.sessions.record_turn(session, prompt, chunk.final.text, chunk.final.backend)
+                yield chunk
 
     def set_model(self, model: str):
         """Changer de modèle"""
@@ -175,3 +630,9 @@ def init_ollama(base_url: str = "http://localhost:11434", model: str = "llama2:7
     """Initialiser Ollama avec paramètres personnalisés"""
     global _ollama_client
     _ollama_client = OllamaClient(base_url=base_url, model=model)
+
+
+async def close_ollama():
+    """Fermer le pool de connexions de l'instance globale (arrêt de l'application)"""
+    if _ollama_client is not None:
+        await _ollama_client.aclose()
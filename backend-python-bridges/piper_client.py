@@ -3,13 +3,19 @@ Client Piper TTS - Phase 3 Python Bridges
 Text-to-Speech avec Piper local (français haute qualité)
 """
 
+import importlib.util
 import subprocess
+import threading
 import numpy as np
-from typing import Optional, Dict, Any, List
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterable, Iterator, List
 from dataclasses import dataclass
 from loguru import logger
 import os
-import json
+
+from model_registry import get_model_registry
+from piper_pool import PiperPool, PiperUnavailableError, resolve_voice, voice_sample_rate
+from tts_cache import get_tts_cache
 
 
 @dataclass
@@ -19,6 +25,7 @@ class PiperResult:
     sample_rate: int
     duration_ms: float
     voice: str
+    cached: bool = False  # servi par le cache de phrases
 
 
 class PiperClient:
@@ -34,39 +41,62 @@ class PiperClient:
     def __init__(
         self,
         voice: str = "fr_FR-upmc-medium",
-        piper_binary: str = "piper"
+        data_dir: str = "/app/voices",
+        pool_size: int = 2,
+        timeout: float = 30.0
     ):
         """
         Initialiser le client Piper
 
         Args:
             voice: Voix à utiliser
-            piper_binary: Chemin vers l'exécutable Piper
+            data_dir: Répertoire des voix (<voix>.onnx et <voix>.onnx.json)
+            pool_size: Processus piper persistants (voix chargée une fois par processus)
+            timeout: Délai max d'une synthèse (s), le worker est relancé au-delà
         """
         self.voice = voice
-        self.piper_binary = os.getenv("PIPER_BINARY", piper_binary)
-        self.sample_rate = 22050
+        self.data_dir = os.getenv("PIPER_DATA_DIR", data_dir)
+        self.pool_size = int(os.getenv("PIPER_POOL_SIZE", pool_size))
+        self.timeout = float(os.getenv("PIPER_TIMEOUT", timeout))
+        # Fréquence déclarée par la voix (22050 Hz pour les voix medium, 16000 Hz pour les low)
+        self.sample_rate = voice_sample_rate(resolve_voice(voice, self.data_dir)[1])
+        self._pool_instance: Optional[PiperPool] = None
+        self._pool_lock = threading.Lock()
+        self._closed = False  # déchargé par le registre : plus aucun worker ne sera lancé
 
         logger.info(f" Piper Client initialized: {voice}")
-        self.check_available_voices()
+        if self.voice in self.check_available_voices():
+            # Démarrage anticipé : la voix est chargée avant la première requête
+            self._pool()
 
     def check_available_voices(self) -> List[str]:
-        """Vérifier les voix disponibles"""
-        try:
-            result = subprocess.run(
-                [self.piper_binary, "--help"],
-                capture_output=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                logger.info(" Piper TTS available")
-                return list(self.FRENCH_VOICES.keys())
-            else:
-                logger.error(" Piper TTS not found")
-                return []
-        except Exception as e:
-            logger.error(f" Error checking Piper: {e}")
+        """Vérifier les voix disponibles (module piper et fichiers de voix, sans lancer de processus)"""
+        if importlib.util.find_spec("piper") is None:
+            logger.error(" Piper TTS not found")
             return []
+        available = [
+            voice for voice in self.FRENCH_VOICES
+            if os.path.exists(resolve_voice(voice, self.data_dir)[0])
+        ]
+        logger.info(f" Piper TTS available: {available}")
+        return available
+
+    def _pool(self) -> PiperPool:
+        """Workers de la voix, démarrés au premier usage"""
+        with self._pool_lock:
+            if self._closed:
+                raise RuntimeError(f"Piper client for {self.voice} is closed")
+            if self._pool_instance is None:
+                model_path = resolve_voice(self.voice, self.data_dir)[0]
+                if importlib.util.find_spec("piper") is None or not os.path.exists(model_path):
+                    raise PiperUnavailableError(f"Piper voice {self.voice} is not available (piper-tts or {model_path} missing)")
+                self._pool_instance = PiperPool(
+                    self.voice,
+                    data_dir=self.data_dir,
+                    size=self.pool_size,
+                    timeout=self.timeout
+                )
+            return self._pool_instance
 
     def synthesize(
         self,
@@ -99,115 +129,107 @@ class PiperClient:
         if not (0.5 <= speed <= 2.0):
             raise ValueError("Speed must be between 0.5 and 2.0")
 
-        try:
-            import time
-            start_time = time.time()
+        if selected_voice != self.voice:
+            # Les workers d'un client portent sa voix : client de l'autre voix (registre)
+            with use_piper_client(selected_voice) as client:
+                return client.synthesize(text, speed=speed)
 
-            logger.debug(f" Synthesizing: {text[:50]}...")
+        import time
+        start_time = time.time()
 
-            # Créer fichier temporaire pour sortie audio
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                tmp_path = tmp.name
-
-            try:
-                # Exécuter Piper (subprocess.Popen with list prevents shell injection)
-                cmd = [
-                    self.piper_binary,
-                    "--model", selected_voice,
-                    "--output-file", tmp_path,
-                    "--length-scale", str(1.0 / speed)  # Inverse pour vitesse
-                ]
-
-                process = subprocess.Popen(
-                    cmd,
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
+        # Phrases récurrentes : servies depuis la mémoire ou le disque, sans synthèse
+        cache = get_tts_cache()
+        if cache is not None and cache.cacheable(text):
+            hit = cache.get(text, selected_voice, speed)
+            if hit is not None:
+                return PiperResult(
+                    audio_samples=hit[0],
+                    sample_rate=hit[1],
+                    duration_ms=(time.time() - start_time) * 1000,
+                    voice=selected_voice,
+                    cached=True
                 )
 
-                stdout, stderr = process.communicate(input=text.encode())
-
-                if process.returncode != 0:
-                    logger.error(f" Piper error: {stderr.decode()}")
-                    return PiperResult(
-                        audio_samples=np.array([], dtype=np.float32),
-                        sample_rate=22050,
-                        duration_ms=0,
-                        voice=selected_voice
-                    )
-
-                # Charger fichier audio généré
-                try:
-                    import soundfile as sf
-                    audio, sr = sf.read(tmp_path, dtype='float32')
-                except ImportError:
-                    # Fallback sans soundfile
-                    logger.warning(" soundfile not available, using placeholder")
-                    audio = np.zeros(22050, dtype=np.float32)
-                    sr = 22050
-
-                duration_ms = (time.time() - start_time) * 1000
+        try:
+            logger.debug(f" Synthesizing: {text[:50]}...")
 
-                logger.info(f" Synthesis done in {duration_ms:.0f}ms: {len(audio) / sr:.1f}s audio")
+            # Worker piper déjà chargé : une ligne JSON, le PCM revient par le pipe
+            audio, sr = self._pool().synthesize(text, length_scale=1.0 / speed)  # Inverse pour vitesse
+            if cache is not None:
+                cache.put(text, selected_voice, speed, audio, sr)
 
-                return PiperResult(
-                    audio_samples=audio,
-                    sample_rate=sr,
-                    duration_ms=duration_ms,
-                    voice=selected_voice
-                )
+            duration_ms = (time.time() - start_time) * 1000
 
-            finally:
-                # Nettoyer fichier temporaire
-                try:
-                    os.unlink(tmp_path)
-                except:
-                    pass
+            logger.info(f" Synthesis done in {duration_ms:.0f}ms: {len(audio) / sr:.1f}s audio")
 
-        except subprocess.TimeoutExpired:
-            logger.error(" Piper synthesis timeout")
             return PiperResult(
-                audio_samples=np.array([], dtype=np.float32),
-                sample_rate=22050,
-                duration_ms=0,
+                audio_samples=audio,
+                sample_rate=sr,
+                duration_ms=duration_ms,
                 voice=selected_voice
             )
+
+        except subprocess.TimeoutExpired:
+            logger.error(" Piper synthesis timeout")
+            raise
         except Exception as e:
+            # Pas d'audio vide silencieux : l'appelant renvoie une erreur au client
             logger.error(f" Synthesis error: {e}")
-            return PiperResult(
-                audio_samples=np.array([], dtype=np.float32),
-                sample_rate=22050,
-                duration_ms=0,
-                voice=selected_voice
-            )
-
-    def set_voice(self, voice: str):
-        """Changer la voix"""
-        if voice in self.FRENCH_VOICES:
-            self.voice = voice
-            logger.info(f" Piper voice changed to: {voice}")
-        else:
-            logger.warning(f" Unknown voice: {voice}")
+            raise
 
     def list_voices(self) -> Dict[str, str]:
         """Lister les voix disponibles"""
         return self.FRENCH_VOICES
 
+    def prewarm(self, phrases: Iterable[str], speed: float = 1.0) -> int:
+        """Mettre en cache les phrases récurrentes de la voix ; renvoie le nombre synthétisé"""
+        cache = get_tts_cache()
+        if cache is None or self.voice not in self.check_available_voices():
+            return 0
+        return cache.prewarm(
+            phrases, self.voice, speed, lambda phrase: self._pool().synthesize(phrase, length_scale=1.0 / speed)
+        )
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """État du pool de workers (None tant qu'il n'est pas démarré)"""
+        pool = self._pool_instance
+        return pool.stats() if pool is not None else None
 
-# Instance globale
-_piper_client: Optional[PiperClient] = None
+    def close(self):
+        """Arrêter définitivement les workers piper"""
+        with self._pool_lock:
+            pool, self._pool_instance = self._pool_instance, None
+            self._closed = True
+        if pool is not None:
+            pool.close()
+
+
+# Voix ONNX "medium" résidente dans chaque worker piper (modèle + runtime)
+PIPER_WORKER_BYTES = 80 * 1024 * 1024
+
+
+def piper_client_bytes(voice: str) -> int:
+    """Empreinte estimée : un modèle par worker du pool à vitesse normale"""
+    return PIPER_WORKER_BYTES * int(os.getenv("PIPER_POOL_SIZE", 2))
+
+
+get_model_registry().register(
+    "piper", lambda voice: PiperClient(voice=voice), piper_client_bytes, unload=lambda client: client.close()
+)
 
 
 def get_piper_client(voice: str = "fr_FR-upmc-medium") -> PiperClient:
-    """Obtenir instance singleton Piper"""
-    global _piper_client
-    if _piper_client is None:
-        _piper_client = PiperClient(voice=voice)
-    return _piper_client
+    """Obtenir le client Piper d'une voix (créé à la première utilisation)"""
+    return get_model_registry().get("piper", voice)
+
+
+@contextmanager
+def use_piper_client(voice: str = "fr_FR-upmc-medium") -> Iterator[PiperClient]:
+    """Client Piper épinglé le temps du bloc : ses workers ne sont pas arrêtés pendant une synthèse"""
+    with get_model_registry().use("piper", voice) as client:
+        yield client
 
 
 def init_piper(voice: str = "fr_FR-upmc-medium"):
     """Initialiser Piper avec paramètres personnalisés"""
-    global _piper_client
-    _piper_client = PiperClient(voice=voice)
+    get_model_registry().put("piper", voice, PiperClient(voice=voice))
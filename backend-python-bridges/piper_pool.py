@@ -0,0 +1,227 @@
+"""
+Pool de workers Piper - Phase 3 Python Bridges
+Processus piper persistants (piper_worker.py) : la voix ONNX est chargée une fois
+par worker, l'audio revient en PCM brut tramé sur stdout, sans fichier temporaire
+"""
+
+import json
+import os
+import queue
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+# Trame worker → client : type (1 octet) + taille (uint32 LE), puis la charge utile
+HEADER = struct.Struct("<cI")
+AUDIO, END, ERROR = b"A", b"E", b"X"
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "piper_worker.py")
+
+# Parole ~14 caractères/s : taille initiale du tampon, agrandi si besoin
+SECONDS_PER_CHAR = 0.08
+
+
+class PiperWorkerError(RuntimeError):
+    """Worker piper mort ou réponse invalide"""
+
+
+class PiperUnavailableError(PiperWorkerError):
+    """Module piper-tts ou fichier de la voix absent : aucun worker ne peut démarrer"""
+
+
+def resolve_voice(voice: str, data_dir: str) -> Tuple[str, str]:
+    """Chemins du modèle ONNX et de sa configuration (.onnx.json)"""
+    model_path = voice if voice.endswith(".onnx") else os.path.join(data_dir, f"{voice}.onnx")
+    return model_path, f"{model_path}.json"
+
+
+def voice_sample_rate(config_path: str, default: int = 22050) -> int:
+    """Fréquence d'échantillonnage déclarée par la voix (audio.sample_rate)"""
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            return int(json.load(f)["audio"]["sample_rate"])
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f" Piper voice config unreadable ({config_path}): {e}, assuming {default} Hz")
+        return default
+
+
+class PiperWorker:
+    """Un processus piper : une voix, une synthèse à la fois"""
+
+    def __init__(self, command: List[str]):
+        self.command = command
+        self.process: Optional[subprocess.Popen] = None
+        self.stderr_tail: deque = deque(maxlen=20)
+        self.started_at = 0.0
+        self.completed = 0
+        # Tampon int16 réutilisé d'une synthèse à l'autre (agrandi, jamais rétréci)
+        self._buffer = np.empty(0, dtype=np.int16)
+        self._header = bytearray(HEADER.size)
+        self._timeout = 0.0
+
+    def start(self):
+        # Liste d'arguments, pas de shell ; stdout non bufferisé : readinto lit le pipe directement
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        self.started_at = time.monotonic()
+        # stderr doit être vidé en continu, sinon piper bloque quand le pipe est plein
+        threading.Thread(target=self._drain_stderr, args=(self.process,), daemon=True).start()
+
+    def _drain_stderr(self, process: subprocess.Popen):
+        for line in process.stderr:
+            self.stderr_tail.append(line.decode(errors="replace").rstrip())
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def synthesize(self, text: str, length_scale: float, sample_rate: int, timeout: float) -> np.ndarray:
+        """Une ligne JSON en entrée, des trames PCM int16 en sortie jusqu'à la trame de fin"""
+        request = json.dumps({"text": text, "length_scale": length_scale}, ensure_ascii=False) + "\n"
+        deadline = time.monotonic() + timeout
+        self._timeout = timeout
+        self._reserve(int(len(text) * SECONDS_PER_CHAR * length_scale * sample_rate))
+        samples = 0
+        try:
+            self.process.stdin.write(request.encode())
+            self.process.stdin.flush()
+            while True:
+                self._read_into(memoryview(self._header), deadline)
+                kind, size = HEADER.unpack(self._header)
+                if kind == END:
+                    break
+                if kind == ERROR:
+                    message = bytearray(size)
+                    self._read_into(memoryview(message), deadline)
+                    raise PiperWorkerError(message.decode(errors="replace"))
+                if kind != AUDIO or size % 2:
+                    raise BrokenPipeError()  # flux désynchronisé : le worker est remplacé
+                self._reserve(samples + size // 2)
+                self._read_into(memoryview(self._buffer[samples:samples + size // 2]).cast("B"), deadline)
+                samples += size // 2
+        except BrokenPipeError:
+            # stdout fermé avant que le processus soit récupéré : attendre sa fin pour le relancer
+            self.stop()
+            raise PiperWorkerError(f"piper exited with code {self.process.poll()}: {self.last_error()}")
+
+        self.completed += 1
+        return self._buffer[:samples].astype(np.float32) / 32768.0
+
+    def _reserve(self, samples: int):
+        if samples > len(self._buffer):
+            grown = np.empty(max(samples, 2 * len(self._buffer)), dtype=np.int16)
+            grown[:len(self._buffer)] = self._buffer
+            self._buffer = grown
+
+    def _read_into(self, view: memoryview, deadline: float):
+        """Remplir `view` depuis stdout (lectures partielles possibles sur un pipe)"""
+        stdout = self.process.stdout
+        filled = 0
+        while filled < len(view):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([stdout], [], [], remaining)[0]:
+                # État inconnu (synthèse en cours) : le worker est remplacé
+                self.stop()
+                raise subprocess.TimeoutExpired(self.command, self._timeout)
+            read = stdout.readinto(view[filled:])
+            if not read:
+                raise BrokenPipeError()
+            filled += read
+
+    def last_error(self) -> str:
+        return self.stderr_tail[-1] if self.stderr_tail else ""
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()  # fin de stdin : piper termine proprement
+                self.process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+
+class PiperPool:
+    """
+    Workers piper d'une voix
+
+    Un appelant emprunte un worker libre (bloque si tous sont occupés) ; un worker
+    mort est relancé à l'emprunt suivant. La vitesse est passée à chaque synthèse.
+    """
+
+    def __init__(
+        self,
+        voice: str,
+        data_dir: str = ".",
+        size: int = 2,
+        timeout: float = 30.0,
+        command: Optional[List[str]] = None
+    ):
+        self.voice = voice
+        self.size = size
+        self.timeout = timeout
+        model_path, config_path = resolve_voice(voice, data_dir)
+        self.sample_rate = voice_sample_rate(config_path)
+        self.command = command or [sys.executable, WORKER_SCRIPT, "--model", model_path, "--config", config_path]
+        self._idle: "queue.Queue[PiperWorker]" = queue.Queue()
+        self._workers: List[PiperWorker] = []
+        self.restarts = 0
+        self.failures = 0
+
+        for _ in range(size):
+            worker = PiperWorker(self.command)
+            worker.start()
+            self._workers.append(worker)
+            self._idle.put(worker)
+        logger.info(f" Piper pool started: {voice} x{size} ({self.sample_rate} Hz)")
+
+    def _checkout(self) -> PiperWorker:
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise subprocess.TimeoutExpired(self.command, self.timeout)
+        if not worker.alive():
+            logger.warning(f" Piper worker for {self.voice} died ({worker.last_error()}), restarting")
+            worker.start()
+            self.restarts += 1
+        return worker
+
+    def synthesize(self, text: str, length_scale: float = 1.0) -> Tuple[np.ndarray, int]:
+        worker = self._checkout()
+        try:
+            return worker.synthesize(text, length_scale, self.sample_rate, self.timeout), self.sample_rate
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "voice": self.voice,
+            "sample_rate": self.sample_rate,
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "alive": sum(w.alive() for w in self._workers),
+            "completed": sum(w.completed for w in self._workers),
+            "failures": self.failures,
+            "restarts": self.restarts,
+        }
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
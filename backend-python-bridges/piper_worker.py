@@ -0,0 +1,41 @@
+"""
+Worker Piper - Phase 3 Python Bridges
+Processus persistant lancé par piper_pool : voix chargée une fois, une requête JSON
+par ligne sur stdin, PCM int16 tramé sur stdout (voir piper_pool.HEADER)
+"""
+
+import argparse
+import json
+import sys
+
+from piper import PiperVoice
+
+from piper_pool import AUDIO, END, ERROR, HEADER
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", required=True, help="Modèle ONNX de la voix")
+    parser.add_argument("--config", required=True, help="Configuration de la voix (.onnx.json)")
+    args = parser.parse_args()
+
+    voice = PiperVoice.load(args.model, config_path=args.config)
+    out = sys.stdout.buffer
+
+    for line in sys.stdin.buffer:
+        request = json.loads(line)
+        try:
+            # Une trame par phrase : le client lit directement dans son tampon NumPy
+            for pcm in voice.synthesize_stream_raw(request["text"], length_scale=request.get("length_scale")):
+                out.write(HEADER.pack(AUDIO, len(pcm)))
+                out.write(pcm)
+            out.write(HEADER.pack(END, 0))
+        except Exception as e:
+            message = f"{type(e).__name__}: {e}".encode()
+            out.write(HEADER.pack(ERROR, len(message)))
+            out.write(message)
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Single-flight - Phase 3 Python Bridges
+Regroupe les requêtes identiques simultanées sur une seule exécution amont
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+@dataclass
+class _Call:
+    """Exécution partagée d'une coroutine"""
+    task: asyncio.Future
+    waiters: int = 0
+
+
+@dataclass
+class _Broadcast:
+    """Exécution partagée d'un flux : les éléments sont rejoués aux abonnés tardifs"""
+    items: List[Any] = field(default_factory=list)
+    done: bool = False
+    error: Optional[BaseException] = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+    subscribers: int = 0
+    pump: Optional[asyncio.Task] = None
+
+    def notify(self):
+        event, self.changed = self.changed, asyncio.Event()
+        event.set()
+
+
+class SingleFlight:
+    """
+    Coalescence des appels concurrents portant la même clé
+
+    Le premier appelant lance l'exécution, les suivants s'y rattachent et
+    reçoivent le même résultat. L'exécution n'est annulée que lorsque tous
+    les appelants sont partis.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Exécuter `fn` une seule fois pour tous les appels concurrents de même clé"""
+        call = self._calls.get(key)
+        # Sans attente restante, l'appel en vol est en cours d'annulation : on en relance un
+        if call is None or call.waiters == 0:
+            call = _Call(task=asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            logger.debug(f" Single-flight: joined in-flight call ({call.waiters} waiting)")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Partager un flux entre les appels concurrents de même clé
+
+        Un abonné qui arrive en cours de route reçoit d'abord les éléments déjà émis.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None or broadcast.subscribers == 0:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.pump = asyncio.ensure_future(self._pump(broadcast, factory))
+            broadcast.pump.add_done_callback(lambda _: self._forget(self._streams, key, broadcast))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        broadcast.subscribers += 1
+        index = 0
+        try:
+            while True:
+                if index < len(broadcast.items):
+                    item = broadcast.items[index]
+                    index += 1
+                    yield item
+                    continue
+                if broadcast.done:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                await broadcast.changed.wait()
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.pump.done():
+                broadcast.pump.cancel()
+
+    async def _pump(self, broadcast: _Broadcast, factory: Callable[[], AsyncIterator[Any]]):
+        try:
+            async for item in factory():
+                broadcast.items.append(item)
+                broadcast.notify()
+        except asyncio.CancelledError:
+            broadcast.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            broadcast.done = True
+            broadcast.notify()
+
+    @staticmethod
+    def _forget(registry: Dict[str, Any], key: str, entry: Any):
+        if registry.get(key) is entry:
+            del registry[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs : exécutions amont réelles et appels rattachés"""
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
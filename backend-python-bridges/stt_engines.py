@@ -0,0 +1,174 @@
+"""
+Moteurs STT - Phase 3 Python Bridges
+Abstraction commune openai-whisper (PyTorch) / faster-whisper (CTranslate2, int8)
+"""
+
+import abc
+import math
+import os
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from loguru import logger
+
+
+# Entrée audio : échantillons float32 mono 16 kHz ou chemin de fichier
+AudioInput = Union[np.ndarray, str]
+
+
+class STTEngine(abc.ABC):
+    """
+    Interface d'un moteur de transcription
+
+    `transcribe()` renvoie un dict {"text", "language", "segments"} où chaque
+    segment porte id, start, end, text et confidence (0.0 à 1.0).
+    """
+
+    name = "base"
+    # Transcriptions simultanées sûres sur une même instance du modèle
+    parallelism = 1
+
+    def __init__(self, model_size: str, device: str = "cpu"):
+        self.model_size = model_size
+        self.device = device
+
+    @abc.abstractmethod
+    def transcribe(self, audio: AudioInput, language: Optional[str] = None, temperature: float = 0.0) -> Dict[str, Any]:
+        """Transcrire des échantillons float32 mono 16 kHz ou un fichier"""
+
+    def describe(self) -> Dict[str, Any]:
+        return {"engine": self.name, "model": self.model_size, "device": self.device}
+
+
+def logprob_to_confidence(avg_logprob: Optional[float]) -> float:
+    """Confiance d'un segment : probabilité moyenne par token"""
+    if avg_logprob is None:
+        return 0.0
+    return float(min(1.0, max(0.0, math.exp(avg_logprob))))
+
+
+class OpenAIWhisperEngine(STTEngine):
+    """openai-whisper (PyTorch, float32 sur CPU)"""
+
+    name = "openai-whisper"
+
+    def __init__(self, model_size: str, device: str = "cpu"):
+        super().__init__(model_size, device)
+        import whisper
+
+        self.model = whisper.load_model(model_size, device=device)
+
+    def transcribe(self, audio: AudioInput, language: Optional[str] = None, temperature: float = 0.0) -> Dict[str, Any]:
+        result = self.model.transcribe(
+            audio,
+            language=language,
+            temperature=temperature,
+            fp16=self.device != "cpu",
+            verbose=False
+        )
+        segments = [
+            {
+                "id": segment.get("id"),
+                "start": segment.get("start"),
+                "end": segment.get("end"),
+                "text": segment.get("text", "").strip(),
+                "confidence": logprob_to_confidence(segment.get("avg_logprob")),
+            }
+            for segment in result.get("segments", [])
+        ]
+        return {"text": result.get("text", "").strip(), "language": result.get("language", "unknown"), "segments": segments}
+
+
+class FasterWhisperEngine(STTEngine):
+    """faster-whisper (CTranslate2, quantification int8 sur CPU)"""
+
+    name = "faster-whisper"
+
+    def __init__(
+        self,
+        model_size: str,
+        device: str = "cpu",
+        compute_type: Optional[str] = None,
+        cpu_threads: int = 4,
+        num_workers: int = 1,
+    ):
+        """
+        Args:
+            model_size: Taille ou chemin du modèle CTranslate2
+            device: 'cpu' ou 'cuda'
+            compute_type: 'int8', 'int8_float16', 'float16', 'float32' (défaut : int8 sur CPU, float16 sur GPU)
+            cpu_threads: Threads intra-op par transcription
+            num_workers: Transcriptions parallèles possibles sur le même modèle
+        """
+        super().__init__(model_size, device)
+        from faster_whisper import WhisperModel
+
+        self.compute_type = compute_type or ("int8" if device == "cpu" else "float16")
+        self.cpu_threads = cpu_threads
+        self.parallelism = num_workers
+        self.model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=self.compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+        )
+
+    def transcribe(self, audio: AudioInput, language: Optional[str] = None, temperature: float = 0.0) -> Dict[str, Any]:
+        segments_iter, info = self.model.transcribe(audio, language=language, temperature=temperature)
+        segments: List[Dict[str, Any]] = []
+        for segment in segments_iter:  # générateur : le décodage a lieu ici
+            segments.append({
+                "id": segment.id,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text.strip(),
+                "confidence": logprob_to_confidence(segment.avg_logprob),
+            })
+        text = " ".join(s["text"] for s in segments if s["text"])
+        return {"text": text, "language": info.language, "segments": segments}
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            **super().describe(),
+            "compute_type": self.compute_type,
+            "cpu_threads": self.cpu_threads,
+            "num_workers": self.parallelism,
+        }
+
+
+ENGINES = {
+    OpenAIWhisperEngine.name: OpenAIWhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+
+def create_engine(
+    engine: Optional[str] = None,
+    model_size: str = "base",
+    device: str = "cpu",
+    compute_type: Optional[str] = None,
+    cpu_threads: Optional[int] = None,
+    num_workers: Optional[int] = None,
+) -> STTEngine:
+    """
+    Instancier le moteur choisi pour ce déploiement
+
+    Variables d'environnement : WHISPER_ENGINE, WHISPER_COMPUTE_TYPE, WHISPER_CPU_THREADS, WHISPER_NUM_WORKERS
+    """
+    engine = os.getenv("WHISPER_ENGINE", engine or OpenAIWhisperEngine.name)
+    if engine not in ENGINES:
+        raise ValueError(f"Invalid STT engine: {engine}. Allowed: {list(ENGINES)}")
+
+    if engine == FasterWhisperEngine.name:
+        instance = FasterWhisperEngine(
+            model_size,
+            device=device,
+            compute_type=os.getenv("WHISPER_COMPUTE_TYPE", compute_type) or None,
+            cpu_threads=int(os.getenv("WHISPER_CPU_THREADS", cpu_threads or 4)),
+            num_workers=int(os.getenv("WHISPER_NUM_WORKERS", num_workers or 1)),
+        )
+    else:
+        instance = OpenAIWhisperEngine(model_size, device=device)
+    logger.info(f" STT engine ready: {instance.describe()}")
+    return instance
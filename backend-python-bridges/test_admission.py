@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests AdmissionScheduler - Phase 3 Python Bridges
+Priorités, équité entre utilisateurs, file bornée et échéances
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from admission import AdmissionScheduler, DeadlineExceeded, QueueFull
+
+
+async def run_in_order(scheduler: AdmissionScheduler, requests):
+    """Mettre en file `requests` (user, priority) derrière un slot occupé, renvoyer l'ordre de service"""
+    served = []
+
+    async def job(user, priority):
+        async with scheduler.slot(user, priority):
+            served.append((user, priority))
+
+    await scheduler.acquire("holder")
+    tasks = [asyncio.ensure_future(job(user, priority)) for user, priority in requests]
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return served
+
+
+def test_interactive_requests_jump_ahead_of_batch():
+    """Une requête interactive passe devant les requêtes batch déjà en file"""
+    scheduler = AdmissionScheduler(concurrency=1)
+    served = asyncio.run(run_in_order(scheduler, [("a", "batch"), ("b", "batch"), ("c", "interactive")]))
+    assert served[0] == ("c", "interactive")
+    assert scheduler.stats()["active"] == 0
+
+
+def test_round_robin_between_users():
+    """Un utilisateur qui empile des requêtes ne bloque pas les autres"""
+    scheduler = AdmissionScheduler(concurrency=1)
+    served = asyncio.run(run_in_order(scheduler, [("a", "normal")] * 3 + [("b", "normal")]))
+    assert [user for user, _ in served] == ["a", "b", "a", "a"]
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    """File globale pleine : 503 ; quota utilisateur atteint : 429, avec Retry-After"""
+    async def scenario():
+        scheduler = AdmissionScheduler(concurrency=1, max_queue=3, max_queue_per_user=2, initial_service_time=2.0)
+        await scheduler.acquire("holder")
+        waiters = [asyncio.ensure_future(scheduler.acquire(user)) for user in ("a", "a")]
+        await asyncio.sleep(0)
+
+        with pytest.raises(QueueFull) as per_user:
+            scheduler.check("a")
+        assert per_user.value.status_code == 429
+
+        waiters.append(asyncio.ensure_future(scheduler.acquire("b")))
+        await asyncio.sleep(0)
+
+        with pytest.raises(QueueFull) as full:
+            await scheduler.acquire("c")
+        assert full.value.status_code == 503
+        # 3 en file + 1, à 0,5 requête/s
+        assert full.value.retry_after == 8
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert scheduler.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_expired_requests_are_dropped_before_running():
+    """Une requête dont l'échéance est passée n'obtient jamais de slot"""
+    async def scenario():
+        scheduler = AdmissionScheduler(concurrency=1)
+        await scheduler.acquire("holder")
+        waiter = asyncio.ensure_future(scheduler.acquire("a", deadline=time.monotonic() + 0.05))
+        with pytest.raises(DeadlineExceeded):
+            await waiter
+        assert scheduler.stats()["expired"] == 1
+        assert scheduler.queued == 0
+
+        scheduler.release()
+        assert scheduler.active == 0
+
+    asyncio.run(scenario())
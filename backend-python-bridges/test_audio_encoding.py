@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests encodage audio TTS - Phase 3 Python Bridges
+Négociation du format, PCM int16/WAV par blocs et flux Opus via un encodeur externe
+"""
+
+import base64
+import io
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+from audio_encoding import content_length, encode_base64, encode_stream, negotiate_format, opus_stream
+
+
+def test_negotiate_format_prefers_explicit_field_then_accept_quality():
+    assert negotiate_format("wav", "audio/ogg") == "wav"
+    assert negotiate_format(None, None) == "json"
+    assert negotiate_format(None, "*/*") == "json"
+    assert negotiate_format(None, "audio/wav;q=0.5, audio/ogg;codecs=opus") == "opus"
+    assert negotiate_format(None, "audio/ogg;q=0, audio/L16") == "pcm"
+
+
+def test_pcm_and_wav_are_encoded_in_blocks_and_decode_back():
+    audio = np.sin(np.linspace(0, 200, 70000)).astype(np.float32) * 1.2  # écrêté au-delà de 1
+    pcm = list(encode_stream(audio, 22050, "pcm"))
+    assert len(pcm) == 3 and sum(map(len, pcm)) == content_length("pcm", len(audio))
+    expected = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+    assert np.array_equal(np.frombuffer(b"".join(pcm), dtype="<i2"), expected)
+    assert base64.b64decode(encode_base64(audio, "pcm")) == b"".join(pcm)
+    assert np.array_equal(np.frombuffer(base64.b64decode(encode_base64(audio, "json")), np.float32), audio)
+
+    body = b"".join(encode_stream(audio, 22050, "wav"))
+    assert len(body) == content_length("wav", len(audio))
+    with wave.open(io.BytesIO(body)) as wav:
+        assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, 2, 22050)
+        assert np.array_equal(np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2"), expected)
+
+
+def test_opus_stream_pipes_pcm_through_encoder_process():
+    # Encodeur factice : recopie stdin sur stdout comme le ferait ffmpeg en continu
+    copy = [sys.executable, "-c", "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, sys.stdout.buffer)"]
+    audio = np.full(100000, 0.5, dtype=np.float32)
+    body = b"".join(opus_stream(audio, 22050, command=copy))
+    assert np.all(np.frombuffer(body, dtype="<i2") == 16383)
+    assert len(body) == 200000
+
+    failing = [sys.executable, "-c", "import sys; sys.stderr.write('no libopus'); sys.exit(1)"]
+    with pytest.raises(RuntimeError, match="no libopus"):
+        list(opus_stream(audio, 22050, command=failing))
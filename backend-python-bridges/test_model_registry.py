@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests ModelRegistry - Phase 3 Python Bridges
+Chargement paresseux, budget RAM, LRU et déchargement à l'inactivité
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from model_registry import ModelRegistry
+
+MB = 1024 * 1024
+SIZES = {"base": 300 * MB, "small": 900 * MB, "large-v3": 1600 * MB}
+
+
+def make_registry(budget_mb=2000, idle_ttl=900.0, load_seconds=0.0):
+    registry = ModelRegistry(max_bytes=budget_mb * MB, idle_ttl=idle_ttl)
+    loaded, unloaded = [], []
+
+    def load(name):
+        time.sleep(load_seconds)
+        loaded.append(name)
+        return {"model": name}
+
+    registry.register("whisper", load, SIZES.__getitem__, unload=lambda m: unloaded.append(m["model"]))
+    return registry, loaded, unloaded
+
+
+def test_models_load_lazily_once_and_several_stay_resident():
+    registry, loaded, _ = make_registry(load_seconds=0.05)
+    assert loaded == []
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        models = list(pool.map(lambda _: registry.get("whisper", "base"), range(4)))
+    registry.get("whisper", "large-v3")
+
+    assert loaded == ["base", "large-v3"]
+    assert all(m is models[0] for m in models)
+    assert sorted(registry.resident()) == ["base", "large-v3"]
+    assert registry.stats()["loads"] == 2 and registry.stats()["hits"] == 3
+
+
+def test_budget_evicts_least_recently_used_but_not_models_in_use():
+    registry, _, unloaded = make_registry(budget_mb=2000)
+    registry.get("whisper", "base")
+    registry.get("whisper", "small")
+    registry.get("whisper", "base")  # small devient le moins récent
+
+    registry.get("whisper", "large-v3")  # 300 + 900 + 1600 > 2000
+    assert unloaded == ["small"]
+    assert sorted(registry.resident()) == ["base", "large-v3"]
+
+    with registry.use("whisper", "base"):
+        registry.get("whisper", "small")  # base est épinglé : large-v3 part
+    assert unloaded == ["small", "large-v3"]
+    assert registry.stats()["evictions"]["budget"] == 2
+    assert registry.size_bytes <= 2000 * MB
+
+
+def test_idle_models_are_unloaded():
+    registry, _, unloaded = make_registry(idle_ttl=0.05)
+    registry.get("whisper", "base")
+    with registry.use("whisper", "small"):
+        time.sleep(0.1)
+        assert registry.evict_idle() == 1  # small est en cours d'utilisation
+    assert unloaded == ["base"]
+    events = registry.stats()["recent_events"]
+    assert [e["event"] for e in events] == ["load", "load", "unload"]
+    assert events[-1]["reason"] == "idle"
+
+
+def test_unknown_kind_and_failed_load():
+    registry, _, _ = make_registry()
+    with pytest.raises(ValueError):
+        registry.get("tts", "x")
+
+    registry.register("broken", lambda name: 1 / 0, lambda name: MB)
+    with pytest.raises(ZeroDivisionError):
+        registry.get("broken", "x")
+    assert registry.stats()["load_failures"] == 1 and registry.resident() == []
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Tests OllamaClient - Phase 3 Python Bridges
+Exécutés contre le serveur Ollama factice (fake_ollama.py), aucun modèle requis
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+import pytest
+
+from admission import AdmissionScheduler
+from chat_sessions import ChatSessionStore
+from disconnect import ClientDisconnected, cancel_on_disconnect
+from fake_ollama import FakeOllamaConfig, FakeOllamaServer
+from llm_cache import LLMResponseCache
+from model_warmup import ModelWarmer
+from ollama_client import OllamaClient, OllamaError
+from singleflight import SingleFlight
+
+
+def make_client(server: FakeOllamaServer, **kwargs) -> OllamaClient:
+    client = OllamaClient(model="llama3.1:latest", **kwargs)
+    client.base_url = server.url
+    return client
+
+
+def test_generate_reuses_pooled_connection():
+    """Les appels successifs partagent une seule connexion keep-alive"""
+    async def scenario(server):
+        client = make_client(server)
+        for _ in range(5):
+            result = await client.generate("Bonjour")
+            assert result.text == "Bonjour, je suis Jarvis."
+        assert await client.health_check()
+        await client.aclose()
+
+    with FakeOllamaServer() as server:
+        asyncio.run(scenario(server))
+        assert server.requests == 6
+        assert len(server.connections) == 1
+
+
+def test_aclose_then_reopen():
+    """Après aclose(), le client recrée un pool au prochain appel"""
+    async def scenario(server):
+        client = make_client(server, max_connections=2, keepalive_expiry=5)
+        await client.generate("Bonjour")
+        await client.aclose()
+        assert client._client is None
+        result = await client.generate("Bonjour")
+        assert result.stop_reason != "error"
+        await client.aclose()
+
+    with FakeOllamaServer() as server:
+        asyncio.run(scenario(server))
+        assert len(server.connections) == 2
+
+
+def test_stream_yields_tokens_before_completion():
+    """Le premier token arrive avant la fin de la génération"""
+    async def scenario(server):
+        client = make_client(server)
+        start = time.perf_counter()
+        first_token_at = None
+        tokens = []
+        final = None
+        async for chunk in client.stream("Bonjour"):
+            if chunk.token and first_token_at is None:
+                first_token_at = time.perf_counter() - start
+            tokens.append(chunk.token)
+            if chunk.done:
+                final = chunk.final
+        total = time.perf_counter() - start
+        await client.aclose()
+        return first_token_at, total, tokens, final
+
+    config = FakeOllamaConfig(token_delay=0.05)
+    with FakeOllamaServer(config) as server:
+        first_token_at, total, tokens, final = asyncio.run(scenario(server))
+
+    assert "".join(tokens) == "Bonjour, je suis Jarvis."
+    assert final.tokens_generated == 6
+    assert first_token_at < total - 0.2
+
+
+def test_stream_raises_on_http_error():
+    """Un statut HTTP en erreur interrompt le stream avec OllamaError"""
+    async def scenario(server):
+        client = make_client(server)
+        try:
+            async for _ in client.generate_stream("Bonjour"):
+                pass
+        except OllamaError:
+            return True
+        finally:
+            await client.aclose()
+        return False
+
+    with FakeOllamaServer(FakeOllamaConfig(status_code=500)) as server:
+        assert asyncio.run(scenario(server))
+
+
+def test_truncated_stream_raises_without_replaying_tokens():
+    """Flux coupé sans `done` : erreur, pas de relecture sur un autre nœud après des tokens"""
+    truncated = FakeOllamaServer(FakeOllamaConfig(truncate_stream=True)).start()
+    healthy = FakeOllamaServer().start()
+    try:
+        async def scenario():
+            client = OllamaClient(model="llama3.1:latest", base_urls=[truncated.url, healthy.url])
+            client.balancer.affinity_spill = 0
+            tokens = []
+            with pytest.raises(OllamaError, match="without done"):
+                async for chunk in client.stream("Bonjour"):
+                    tokens.append(chunk.token)
+            await client.aclose()
+            return tokens
+
+        assert "".join(asyncio.run(scenario())) == "Bonjour, je suis Jarvis."
+        assert healthy.requests == 0
+    finally:
+        truncated.stop()
+        healthy.stop()
+
+
+def test_deterministic_responses_are_cached():
+    """Température 0 : le second appel est servi par le cache sans requête Ollama"""
+    async def scenario(server):
+        client = make_client(server)
+        first = await client.generate("Quelle heure est-il ?", temperature=0.0)
+        second = await client.generate("Quelle heure est-il ?", temperature=0.0)
+        sampled = await client.generate("Quelle heure est-il ?", temperature=0.7)
+        await client.aclose()
+        return client, first, second, sampled
+
+    with FakeOllamaServer() as server:
+        client, first, second, sampled = asyncio.run(scenario(server))
+        assert server.requests == 2
+
+    assert not first.cached and second.cached and not sampled.cached
+    assert second.text == first.text
+    assert client.cache.stats()["hits"] == 1
+
+
+def test_cache_lru_and_ttl_eviction():
+    """Éviction LRU au-delà du budget mémoire et expiration TTL"""
+    cache = LLMResponseCache(max_bytes=100, ttl_seconds=60)
+    cache.put("a", "A", 40)
+    cache.put("b", "B", 40)
+    assert cache.get("a") == "A"  # "b" devient le moins récent
+    cache.put("c", "C", 40)
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 1
+
+    cache.ttl_seconds = 0
+    cache.put("d", "D", 10)
+    assert cache.get("d") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    """N appels identiques simultanés → une seule génération amont"""
+    async def scenario(server):
+        client = make_client(server)
+        flight = SingleFlight()
+
+        async def call():
+            return await flight.do("k", lambda: client.generate("Bonjour"))
+
+        async def stream_call():
+            return [c.token async for c in flight.stream("s", lambda: client.stream("Bonjour"))]
+
+        results = await asyncio.gather(*(call() for _ in range(5)))
+        streams = await asyncio.gather(*(stream_call() for _ in range(5)))
+        await client.aclose()
+        return flight, results, streams
+
+    with FakeOllamaServer(FakeOllamaConfig(first_token_delay=0.1)) as server:
+        flight, results, streams = asyncio.run(scenario(server))
+        assert server.requests == 2
+
+    assert {r.text for r in results} == {"Bonjour, je suis Jarvis."}
+    assert all("".join(tokens) == "Bonjour, je suis Jarvis." for tokens in streams)
+    assert flight.stats() == {"in_flight": 0, "executions": 2, "coalesced": 8}
+
+
+def test_single_flight_cancels_only_when_last_waiter_leaves():
+    """L'annulation d'un appelant ne coupe pas la génération partagée"""
+    async def scenario():
+        flight = SingleFlight()
+        upstream = asyncio.Event()
+
+        async def slow():
+            await upstream.wait()
+            return "ok"
+
+        first = asyncio.ensure_future(flight.do("k", slow))
+        second = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        upstream.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(scenario()) == ("ok", True)
+
+
+def test_balancer_spreads_by_outstanding_requests():
+    """Requêtes simultanées réparties sur les nœuds les moins chargés"""
+    servers = [FakeOllamaServer(FakeOllamaConfig(first_token_delay=0.2)).start() for _ in range(3)]
+    try:
+        async def scenario():
+            client = OllamaClient(model="llama3.1:latest", base_urls=[s.url for s in servers])
+            await asyncio.gather(*(client.generate(f"Question {i}") for i in range(6)))
+            await client.aclose()
+
+        asyncio.run(scenario())
+        assert [s.requests for s in servers] == [2, 2, 2]
+    finally:
+        for s in servers:
+            s.stop()
+
+
+def test_balancer_ejects_failing_backend_and_readmits_it():
+    """Un nœud en erreur est contourné, éjecté, puis réadmis par le health check actif"""
+    healthy = FakeOllamaServer().start()
+    broken = FakeOllamaServer(FakeOllamaConfig(status_code=500)).start()
+    try:
+        async def scenario():
+            client = OllamaClient(model="llama3.1:latest", base_urls=[broken.url, healthy.url])
+            client.balancer.affinity_spill = 0  # sans affinité, le nœud en panne reste premier choix
+            results = [await client.generate(f"Question {i}") for i in range(5)]
+            assert all(r.stop_reason != "error" for r in results)
+            state = client.balancer.stats()["backends"][0]
+            assert not state["available"] and state["failures"] == 3
+
+            broken.config.status_code = 200
+            assert await client.health_check()
+            assert client.balancer.stats()["backends"][0]["available"]
+            await client.aclose()
+
+        asyncio.run(scenario())
+        assert broken.requests == 3 + 1  # 3 générations en échec + la sonde /api/ps
+    finally:
+        healthy.stop()
+        broken.stop()
+
+
+def test_balancer_keeps_model_affinity():
+    """Un modèle déjà chargé sur un nœud y reste routé"""
+    servers = [FakeOllamaServer().start() for _ in range(3)]
+    servers[2].loaded_models.add("llama3.1:latest")
+    try:
+        async def scenario():
+            client = OllamaClient(model="llama3.1:latest", base_urls=[s.url for s in servers])
+            await client.health_check()
+            for i in range(4):
+                await client.generate(f"Question {i}")
+            await client.aclose()
+
+        asyncio.run(scenario())
+        assert [s.requests for s in servers] == [1, 1, 5]  # sonde + 4 générations sur le nœud chaud
+    finally:
+        for s in servers:
+            s.stop()
+
+
+def test_chat_session_evaluates_only_new_turn():
+    """Le deuxième tour reste sur le même nœud et n'évalue que le nouveau message"""
+    servers = [FakeOllamaServer().start() for _ in range(2)]
+    try:
+        async def scenario():
+            client = OllamaClient(model="llama3.1:latest", base_urls=[s.url for s in servers])
+            session = client.sessions.create("alice", "Tu es Jarvis.")
+            first = await client.chat(session, "Bonjour, qui es-tu ?")
+            # Nœud d'origine chargé : sans épinglage, le tour suivant partirait ailleurs
+            client.balancer.backends[0].outstanding = 10
+            second = await client.chat(session, "Et quelle heure est-il ?")
+            client.balancer.backends[0].outstanding = 0
+            await client.aclose()
+            return session, first, second
+
+        session, first, second = asyncio.run(scenario())
+        assert first.text == second.text == "Bonjour, je suis Jarvis."
+        assert first.tokens_prompt == 7  # prompt système + premier message
+        assert second.tokens_prompt == 5  # seulement le nouveau message
+        assert [s.requests for s in servers] == [2, 0]
+        assert session.turns == 2 and len(session.messages) == 5
+    finally:
+        for s in servers:
+            s.stop()
+
+
+def test_chat_session_store_budget_and_idle_eviction():
+    """Sessions évincées au-delà du budget mémoire (LRU) et après inactivité"""
+    store = ChatSessionStore(max_bytes=400, idle_ttl=60)
+    first = store.create("alice")
+    second = store.create("bob")
+    assert store.get(first.session_id, "bob") is None  # session d'un autre utilisateur
+    assert store.get(first.session_id, "alice") is first  # "bob" devient le moins récent
+
+    store.record_turn(first, "x" * 100, "y" * 100, None)
+    store.record_turn(first, "x" * 100, "y" * 100, None)
+    assert store.get(second.session_id, "bob") is None
+    assert store.get(first.session_id, "alice") is first  # la session active n'est jamais évincée
+    assert store.stats()["evictions"] == 1
+
+    store.idle_ttl = 0
+    assert store.get(first.session_id, "alice") is None
+    assert len(store) == 0 and store.size_bytes == 0
+
+
+def test_hedging_falls_back_to_small_model_and_cancels_primary():
+    """Premier token du principal hors budget : le modèle léger répond, le principal est annulé"""
+    async def scenario(server):
+        client = make_client(server, hedge_model="llama3.2:1b")
+        client.hedging.max_delay = 0.1
+        slow = await client.generate("Bonjour", hedge=True)
+        await asyncio.sleep(0.2)  # laisser le serveur constater la déconnexion
+        cancelled = server.cancelled
+        server.config.model_delays.clear()
+        fast = await client.generate("Bonjour", hedge=True)
+        await client.aclose()
+        return client, slow, cancelled, fast
+
+    config = FakeOllamaConfig(model_delays={"llama3.1:latest": 1.0})
+    with FakeOllamaServer(config) as server:
+        client, slow, cancelled, fast = asyncio.run(scenario(server))
+        assert server.requests == 3
+
+    assert slow.model == "llama3.2:1b" and slow.text == "Bonjour, je suis Jarvis."
+    assert cancelled == 1
+    assert fast.model == "llama3.1:latest"
+    assert client.hedging.stats()["hedged"] == 1 and client.hedging.stats()["fallback_wins"] == 1
+    assert client.hedging.stats()["samples"] == 1  # seul le premier token du principal est mesuré
+
+
+def test_model_warmer_preloads_and_reloads_evicted_models():
+    """Préchauffage hors chemin utilisateur, rechargement après éviction"""
+    async def scenario(server):
+        client = make_client(server)
+        warmer = ModelWarmer(client, models=["llama3.1:latest"])
+        assert not warmer.ready
+        await warmer.refresh()
+        assert warmer.ready
+
+        start = time.perf_counter()
+        await client.generate("Bonjour")
+        first_request_ms = (time.perf_counter() - start) * 1000
+
+        server.loaded_models.clear()  # Ollama a déchargé le modèle
+        await warmer.refresh()
+        await client.aclose()
+        return warmer, first_request_ms
+
+    with FakeOllamaServer(FakeOllamaConfig(load_delay=0.3)) as server:
+        warmer, first_request_ms = asyncio.run(scenario(server))
+
+    state = warmer.stats()["states"][0]
+    assert state["load_ms"] >= 300 and first_request_ms < 300
+    assert state["loads"] == 2 and state["evictions"] == 1 and state["loaded"]
+
+
+class HangingUpRequest:
+    """Requête HTTP dont le client raccroche `after` secondes après le début de la génération"""
+
+    def __init__(self, after: float, server: FakeOllamaServer):
+        self.after = after
+        self.server = server
+        self.hang_up_at: Optional[float] = None
+        self.url = type("URL", (), {"path": "/api/llm/generate"})()
+
+    async def is_disconnected(self) -> bool:
+        if self.hang_up_at is None:
+            if not self.server.active:
+                return False
+            self.hang_up_at = time.monotonic() + self.after
+        return time.monotonic() >= self.hang_up_at
+
+
+def test_client_disconnect_cancels_generation_and_frees_slot():
+    """Déconnexion : requête Ollama annulée et slot rendu sans attendre la fin de la génération"""
+    async def scenario(server):
+        client = make_client(server)
+        scheduler = AdmissionScheduler(concurrency=1)
+        start = time.perf_counter()
+        with pytest.raises(ClientDisconnected):
+            async with cancel_on_disconnect(HangingUpRequest(0.1, server), poll_interval=0.02):
+                async with scheduler.slot("alice"):
+                    await client.generate("Bonjour")
+        elapsed = time.perf_counter() - start
+        deadline = time.monotonic() + 5
+        while not server.cancelled and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)  # laisser le serveur constater la déconnexion
+        await client.aclose()
+        return scheduler, elapsed
+
+    with FakeOllamaServer(FakeOllamaConfig(first_token_delay=2.0)) as server:
+        scheduler, elapsed = asyncio.run(scenario(server))
+        assert server.cancelled == 1
+
+    assert elapsed < 1.0  # bien avant la fin de la génération (2 s)
+    assert scheduler.stats()["active"] == 0
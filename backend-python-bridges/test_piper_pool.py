@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests pool Piper - Phase 3 Python Bridges
+Workers persistants, avec un faux worker (même protocole : JSON sur stdin, PCM tramé sur stdout)
+"""
+
+import json
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+
+from piper_pool import PiperPool, PiperUnavailableError
+
+FAKE_WORKER = textwrap.dedent('''\
+    import json, os, struct, sys
+    # 100 échantillons par caractère, en deux trames ; "crash" simule une erreur fatale du runtime ONNX
+    header = struct.Struct("<cI")
+    out = sys.stdout.buffer
+    sys.stderr.write("voice loaded\\n")
+    for line in sys.stdin.buffer:
+        request = json.loads(line)
+        if request["text"] == "crash":
+            os._exit(1)
+        if request["text"] == "bad":
+            out.write(header.pack(b"X", 9) + b"bad input")
+        else:
+            n = int(100 * len(request["text"]) * request["length_scale"])
+            pcm = (b"\\x00\\x40" * n)
+            for part in (pcm[:n // 2 * 2], pcm[n // 2 * 2:]):
+                out.write(header.pack(b"A", len(part)) + part)
+            out.write(header.pack(b"E", 0))
+        out.flush()
+''')
+
+
+@pytest.fixture
+def fake_worker(tmp_path):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    (tmp_path / "fr_FR-test-low.onnx.json").write_text(json.dumps({"audio": {"sample_rate": 16000}}))
+    return {"data_dir": str(tmp_path), "command": [sys.executable, str(script)]}
+
+
+def test_workers_are_reused_and_audio_comes_back_over_the_pipe(fake_worker):
+    pool = PiperPool("fr_FR-test-low", size=2, timeout=10, **fake_worker)
+    try:
+        pids = {w.process.pid for w in pool._workers}
+        for text, length_scale in (("Bonjour", 1.0), ("Il fait beau", 2.0), ("Lumière allumée", 0.5)):
+            audio, sample_rate = pool.synthesize(text, length_scale)
+            assert sample_rate == 16000  # lue dans la config de la voix
+            assert audio.dtype == np.float32 and len(audio) == int(100 * len(text) * length_scale)
+            assert audio.max() == pytest.approx(0.5)
+        assert {w.process.pid for w in pool._workers} == pids
+        assert pool.stats()["completed"] == 3 and pool.stats()["restarts"] == 0
+    finally:
+        pool.close()
+
+
+def test_crashed_worker_is_restarted_and_errors_keep_it(fake_worker):
+    pool = PiperPool("fr_FR-test-low", size=1, timeout=10, **fake_worker)
+    try:
+        with pytest.raises(RuntimeError, match="bad input"):
+            pool.synthesize("bad")
+        with pytest.raises(RuntimeError):
+            pool.synthesize("crash")
+        audio, _ = pool.synthesize("Bonjour")
+        assert len(audio) == 700
+        stats = pool.stats()
+        assert stats["restarts"] == 1 and stats["failures"] == 2 and stats["alive"] == 1
+    finally:
+        pool.close()
+
+
+def test_client_raises_when_unavailable_and_never_restarts_once_closed(tmp_path):
+    from piper_client import PiperClient
+
+    client = PiperClient(voice="fr_FR-upmc-medium", data_dir=str(tmp_path))
+    with pytest.raises(PiperUnavailableError):
+        client.synthesize("Bonjour Monsieur")  # pas de fichier de voix : erreur, pas d'audio vide
+    assert not client._closed
+    client.close()  # déchargé par le registre
+    with pytest.raises(RuntimeError, match="closed"):
+        client._pool()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests cache de phrases TTS - Phase 3 Python Bridges
+Niveaux mémoire/disque, éviction LRU, préchauffage et compteurs
+"""
+
+import numpy as np
+
+from tts_cache import TTSPhraseCache
+
+
+def fake_synthesis(calls):
+    def synthesize(text):
+        calls.append(text)
+        return np.full(1000, len(text) / 100, dtype=np.float32), 16000
+    return synthesize
+
+
+def test_memory_tier_normalizes_text_and_evicts_lru():
+    cache = TTSPhraseCache(max_bytes=8000)  # deux entrées de 4000 octets
+    audio = np.zeros(1000, dtype=np.float32)
+    cache.put("Bien sûr.", "v", 1.0, audio, 16000)
+    cache.put("C'est fait.", "v", 1.0, audio, 16000)
+
+    hit = cache.get("  bien   SÛR. ", "v", 1.0)
+    assert hit is not None and hit[1] == 16000 and not hit[0].flags.writeable
+    assert cache.get("Bien sûr.", "autre-voix", 1.0) is None
+    assert cache.get("Bien sûr.", "v", 1.5) is None
+
+    cache.put("Un instant.", "v", 1.0, audio, 16000)  # évince « C'est fait. » (moins récent)
+    assert cache.get("C'est fait.", "v", 1.0) is None
+    assert cache.get("Bien sûr.", "v", 1.0) is not None
+
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["size_bytes"] == 8000 and stats["evictions"] == 1
+    assert stats["memory_hits"] == 2 and stats["misses"] == 3
+    assert stats["bytes_saved"] == 8000 and stats["audio_seconds_saved"] == 0.12
+
+
+def test_disk_tier_survives_restart_and_prewarm_skips_cached_phrases(tmp_path):
+    calls = []
+    phrases = ["Jarvis à votre service.", "C'est fait."]
+    cache = TTSPhraseCache(disk_dir=str(tmp_path))
+    assert cache.prewarm(phrases, "v", 1.0, fake_synthesis(calls)) == 2
+    assert cache.prewarm(phrases, "v", 1.0, fake_synthesis(calls)) == 0
+    assert len(list(tmp_path.glob("*.npy"))) == 2 and not list(tmp_path.glob("*.tmp"))
+
+    # Nouveau processus : mémoire vide, l'audio est relu depuis le disque en mmap
+    restarted = TTSPhraseCache(disk_dir=str(tmp_path))
+    assert restarted.stats()["disk_entries"] == 2
+    assert restarted.prewarm(phrases, "v", 1.0, fake_synthesis(calls)) == 0
+    assert calls == phrases
+    audio, sample_rate = restarted.get("C'est fait.", "v", 1.0)
+    assert sample_rate == 16000 and np.allclose(audio, 0.11)
+    stats = restarted.stats()
+    assert stats["disk_hits"] == 2 and stats["memory_hits"] == 1 and stats["entries"] == 2
+
+    # Budget disque dépassé : les fichiers les plus anciens sont supprimés
+    small = TTSPhraseCache(disk_dir=str(tmp_path), disk_max_bytes=5000)
+    small.put("Nouvelle phrase.", "v", 1.0, np.zeros(1000, dtype=np.float32), 16000)
+    assert small.stats()["disk_entries"] == 1 and len(list(tmp_path.glob("*.npy"))) == 1
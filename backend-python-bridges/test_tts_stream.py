@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests TTS en streaming - Phase 3 Python Bridges
+Découpage en phrases et synthèse ordonnée avec avance
+"""
+
+import asyncio
+import threading
+import time
+
+from tts_stream import split_sentences, synthesize_in_order
+
+
+def test_split_sentences_keeps_quotes_abbreviations_and_bounds_length():
+    text = (
+        "Bonjour. Il est 14 h 30 et M. Dupont est arrivé. Il a dit « Très bien. » "
+        "Veux-tu que j'allume la lumière du salon ? Oui !"
+    )
+    assert split_sentences(text) == [
+        "Bonjour. Il est 14 h 30 et M. Dupont est arrivé.",  # « Bonjour. » trop court, rattaché
+        "Il a dit « Très bien. »",
+        "Veux-tu que j'allume la lumière du salon ? Oui !",
+    ]
+
+    long = "Première partie de la phrase, " * 20 + "fin."
+    parts = split_sentences(long, max_chars=100)
+    assert all(len(p) <= 100 for p in parts) and len(parts) > 5
+    assert " ".join(parts) == long.strip()
+
+
+def test_chunks_come_back_in_order_while_later_ones_are_synthesized():
+    # La première phrase est la plus lente : l'ordre doit tout de même être respecté
+    delays = {"un": 0.2, "deux": 0.05, "trois": 0.05, "quatre": 0.05}
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def synthesize(sentence):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(delays[sentence])
+        with lock:
+            running -= 1
+        return sentence.upper()
+
+    async def scenario():
+        received = []
+        async for seq, sentence, result in synthesize_in_order(list(delays), synthesize, lookahead=2):
+            received.append((seq, sentence, result, time.perf_counter()))
+        return received
+
+    start = time.perf_counter()
+    received = asyncio.run(scenario())
+    assert [(seq, r) for seq, _, r, _ in received] == [(0, "UN"), (1, "DEUX"), (2, "TROIS"), (3, "QUATRE")]
+    assert peak == 2  # une synthèse d'avance, pas plus
+    # Premier morceau disponible bien avant la fin de l'ensemble
+    assert received[0][3] - start < 0.3 and received[-1][3] - received[0][3] > 0.05
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Tests WhisperClient - Phase 3 Python Bridges
+Couche moteur STT, sans modèle Whisper (moteur factice)
+"""
+
+import numpy as np
+import pytest
+
+from audio_preprocess import TARGET_RATE, peak_amplitude, preprocess_audio
+from stt_engines import STTEngine, create_engine, logprob_to_confidence
+from whisper_client import WhisperClient, WhisperResult
+
+
+class FakeEngine(STTEngine):
+    """Moteur factice : deux segments de confiance différente"""
+
+    name = "fake"
+
+    def __init__(self):
+        super().__init__("tiny")
+        self.calls = []
+
+    def transcribe(self, audio, language=None, temperature=0.0):
+        self.calls.append((audio, language))
+        return {
+            "text": "Bonjour Jarvis",
+            "language": language or "fr",
+            "segments": [
+                {"id": 0, "start": 0.0, "end": 3.0, "text": "Bonjour", "confidence": 0.9},
+                {"id": 1, "start": 3.0, "end": 4.0, "text": "Jarvis", "confidence": 0.5},
+            ],
+        }
+
+
+def test_client_returns_same_result_shape_for_any_engine():
+    engine = FakeEngine()
+    client = WhisperClient(engine=engine, language="fr", vad_trim=False)
+    result = client.transcribe(np.zeros(16000, dtype=np.int16) + 1000)
+
+    assert isinstance(result, WhisperResult)
+    assert result.text == "Bonjour Jarvis" and result.language == "fr"
+    assert result.confidence == pytest.approx((0.9 * 3 + 0.5 * 1) / 4)
+    audio, _ = engine.calls[0]
+    assert audio.dtype == np.float32 and audio.max() <= 1.0
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        create_engine("whisper.cpp")
+
+
+def test_engine_without_transcribe_cannot_be_created():
+    class Incomplete(STTEngine):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete("tiny")
+
+
+def test_logprob_to_confidence():
+    assert logprob_to_confidence(0.0) == 1.0
+    assert logprob_to_confidence(-0.5) == pytest.approx(0.6065, abs=1e-4)
+    assert logprob_to_confidence(None) == 0.0
+
+
+def speech(seconds, sr=16000, amplitude=0.3):
+    t = np.arange(int(seconds * sr)) / sr
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def test_vad_trim_drops_silence_and_remaps_timestamps():
+    sr = 16000
+    silence = lambda s: np.random.default_rng(0).normal(0, 0.001, int(s * sr)).astype(np.float32)
+    # 2 s silence, 1 s parole, 3 s pause, 1 s parole, 2 s silence
+    audio = np.concatenate([silence(2), speech(1), silence(3), speech(1), silence(2)])
+
+    engine = FakeEngine()
+    client = WhisperClient(engine=engine, language="fr", vad_trim=True)
+    result = client.transcribe(audio, sample_rate=sr)
+
+    sent, _ = engine.calls[0]
+    assert len(sent) < len(audio) / 2
+    assert result.vad["original_ms"] == pytest.approx(9000)
+    assert result.vad["dropped_ratio"] > 0.5 and result.vad["speech_regions"] == 2
+
+    # 0 s dans l'audio compacté = juste avant la première parole (marge comprise)
+    first, second = result.segments
+    assert 1.7 <= first["start"] <= 2.0
+    # 3 s compactées tombent dans la seconde zone de parole (≥ 6 s dans l'original)
+    assert second["start"] > 5.7
+
+
+def test_vad_trim_skips_inference_on_silence():
+    engine = FakeEngine()
+    client = WhisperClient(engine=engine, vad_trim=True)
+    result = client.transcribe(np.zeros(16000 * 3, dtype=np.float32))
+
+    assert engine.calls == []
+    assert result.text == "" and result.vad["dropped_ratio"] == 1.0
+
+
+def test_preprocess_resamples_and_downmixes_to_16k():
+    sr = 48000
+    t = np.arange(sr) / sr
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    stereo = (np.stack([tone, tone], axis=1) * 32767).astype(np.int16)
+
+    out = preprocess_audio(stereo, sr)
+
+    assert out.dtype == np.float32 and out.flags.c_contiguous
+    assert len(out) == TARGET_RATE
+    # La fréquence est conservée : pic du spectre à 440 Hz
+    assert np.argmax(np.abs(np.fft.rfft(out))) == pytest.approx(440, abs=1)
+    assert np.abs(out).max() == pytest.approx(0.5, abs=0.02)
+
+
+def test_peak_amplitude_spans_blocks_and_sees_negative_peaks():
+    audio = np.full(10, 0.25, dtype=np.float32)
+    audio[7] = -0.8  # dans le dernier bloc (incomplet)
+    assert peak_amplitude(audio, block_samples=3) == pytest.approx(0.8)
+
+    int16_scale = speech(1) * 32767  # float à l'échelle int16 : ramené dans [-1, 1]
+    assert np.abs(preprocess_audio(int16_scale, TARGET_RATE)).max() == pytest.approx(0.3, abs=1e-3)
+
+
+def test_transcribe_resamples_before_engine():
+    engine = FakeEngine()
+    client = WhisperClient(engine=engine, vad_trim=False)
+    audio = speech(2, sr=44100)
+    client.transcribe(audio, sample_rate=44100)
+
+    sent, _ = engine.calls[0]
+    assert len(sent) == 2 * TARGET_RATE
+    assert audio.max() == pytest.approx(0.3, abs=1e-3)  # entrée non modifiée
+
+
+class ChunkEngine(STTEngine):
+    """Moteur factice : un segment par zone non silencieuse, temps relatifs au bloc reçu"""
+
+    name = "fake-chunks"
+    parallelism = 3
+
+    def __init__(self):
+        super().__init__("tiny")
+        self.lengths = []
+
+    def transcribe(self, audio, language=None, temperature=0.0):
+        self.lengths.append(len(audio))
+        frame = TARGET_RATE // 100
+        voiced = np.abs(audio[:len(audio) - len(audio) % frame]).reshape(-1, frame).max(axis=1) > 0.1
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+        segments = [
+            {"start": a / 100, "end": b / 100, "text": f"mot{i}", "confidence": 0.8}
+            for i, (a, b) in enumerate(zip(edges[::2], edges[1::2]))
+        ]
+        return {"text": "", "language": language, "segments": segments}
+
+
+def test_transcribe_long_chunks_in_parallel_and_stitches_once():
+    # 90 s : alternance 1 s de parole / 1 s de silence
+    second = lambda voiced: speech(1) if voiced else np.zeros(TARGET_RATE, dtype=np.float32)
+    audio = np.concatenate([second(i % 2 == 0) for i in range(90)])
+
+    engine = ChunkEngine()
+    client = WhisperClient(engine=engine, language="fr", vad_trim=False)
+    result = client.transcribe_long(audio, chunk_seconds=20, overlap_seconds=1)
+
+    assert len(engine.lengths) > 1 and max(engine.lengths) <= 22 * TARGET_RATE
+    # Chaque seconde parlée apparaît une seule fois, à sa place dans l'original
+    starts = [s["start"] for s in result.segments]
+    assert starts == pytest.approx([float(i) for i in range(0, 90, 2)], abs=0.01)
+    assert [s["id"] for s in result.segments] == list(range(45))
+    assert result.confidence == pytest.approx(0.8)
+
+
+def test_transcribe_file_decodes_compressed_containers(tmp_path):
+    """m4a (AAC) : décodé par ffmpeg, pas seulement les formats libsndfile"""
+    av = pytest.importorskip("av")
+    pytest.importorskip("faster_whisper")
+
+    path = tmp_path / "note.m4a"
+    sr = 44100
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("aac", rate=sr)
+        stream.layout = "mono"
+        frame = av.AudioFrame.from_ndarray(speech(2, sr=sr)[None, :], format="flt", layout="mono")
+        frame.sample_rate = sr
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+    engine = FakeEngine()
+    result = WhisperClient(engine=engine, language="fr", vad_trim=False).transcribe_file(str(path))
+
+    assert result.text == "Bonjour Jarvis"
+    sent, _ = engine.calls[0]
+    assert sent.dtype == np.float32
+    assert len(sent) == pytest.approx(2 * TARGET_RATE, rel=0.05)
+    # Rééchantillonné à 16 kHz : la tonalité reste à 220 Hz
+    assert np.argmax(np.abs(np.fft.rfft(sent))) * TARGET_RATE / len(sent) == pytest.approx(220, abs=2)
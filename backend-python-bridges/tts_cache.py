@@ -0,0 +1,267 @@
+"""
+Cache de phrases TTS - Phase 3 Python Bridges
+Phrases récurrentes de Jarvis (accueil, confirmations, erreurs) : LRU en mémoire
+borné en octets + stockage disque persistant (.npy lus en mmap), préchauffage au
+démarrage et compteurs hit ratio / octets épargnés
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+# Phrases préchauffées par défaut (TTS_CACHE_PREWARM_FILE : une phrase par ligne)
+DEFAULT_PREWARM_PHRASES = [
+    "Jarvis à votre service.",
+    "Bien sûr.",
+    "C'est fait.",
+    "Un instant, je m'en occupe.",
+    "Je n'ai pas compris, pouvez-vous répéter ?",
+    "Désolé, une erreur est survenue.",
+]
+
+
+def normalize_text(text: str) -> str:
+    """Forme canonique : NFC, minuscules, blancs réduits (la ponctuation change la prosodie, elle reste)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip().lower()
+
+
+@dataclass
+class DiskEntry:
+    """Fichier du niveau disque"""
+    path: str
+    sample_rate: int
+    size_bytes: int
+
+
+class TTSPhraseCache:
+    """Cache à deux niveaux de PCM float32, clé = texte normalisé + voix + vitesse"""
+
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+        max_text_chars: int = 200
+    ):
+        """
+        Args:
+            max_bytes: Budget mémoire du niveau LRU
+            disk_dir: Répertoire du niveau disque (None = mémoire seule)
+            disk_max_bytes: Budget du niveau disque
+            max_text_chars: Les textes plus longs (réponses LLM) ne sont pas mis en cache
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.max_text_chars = max_text_chars
+        self._memory: "OrderedDict[str, Tuple[np.ndarray, int]]" = OrderedDict()
+        self._disk: "OrderedDict[str, DiskEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.bytes_saved = 0
+        self.audio_seconds_saved = 0.0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(text: str, voice: str, speed: float) -> str:
+        payload = json.dumps({"text": normalize_text(text), "voice": voice, "speed": round(speed, 2)}, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def cacheable(self, text: str) -> bool:
+        return len(text) <= self.max_text_chars
+
+    def _load_disk_index(self):
+        """Reprendre les fichiers existants (redémarrage), du plus ancien au plus récent"""
+        files = []
+        for name in os.listdir(self.disk_dir):
+            match = re.fullmatch(r"([0-9a-f]{64})_(\d+)\.npy", name)
+            if match is None:
+                continue
+            path = os.path.join(self.disk_dir, name)
+            stat = os.stat(path)
+            files.append((stat.st_mtime, match.group(1), DiskEntry(path, int(match.group(2)), stat.st_size)))
+        for _, key, entry in sorted(files, key=lambda f: f[0]):
+            self._disk[key] = entry
+            self.disk_bytes += entry.size_bytes
+        if files:
+            logger.info(f" TTS cache: {len(files)} phrases on disk ({self.disk_bytes / 1024 / 1024:.1f} MB)")
+
+    def get(self, text: str, voice: str, speed: float) -> Optional[Tuple[np.ndarray, int]]:
+        """Audio (lecture seule) et fréquence, None si absent"""
+        key = self.make_key(text, voice, speed)
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._served(hit)
+
+            entry = self._disk.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                # Projection mémoire : pas de copie, les pages viennent du cache du noyau
+                audio = np.load(entry.path, mmap_mode="r")
+            except (OSError, ValueError) as e:
+                logger.warning(f" TTS cache: unreadable disk entry {entry.path}: {e}")
+                self._remove_disk(key)
+                self.misses += 1
+                return None
+            self._disk.move_to_end(key)
+            self.disk_hits += 1
+            hit = (audio, entry.sample_rate)
+            self._put_memory(key, hit)
+            return self._served(hit)
+
+    def _served(self, hit: Tuple[np.ndarray, int]) -> Tuple[np.ndarray, int]:
+        audio, sample_rate = hit
+        self.bytes_saved += audio.nbytes
+        self.audio_seconds_saved += len(audio) / sample_rate
+        return hit
+
+    def put(self, text: str, voice: str, speed: float, audio: np.ndarray, sample_rate: int):
+        """Mémoriser une synthèse réussie (les deux niveaux)"""
+        if not len(audio) or not self.cacheable(text):
+            return
+        key = self.make_key(text, voice, speed)
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        audio.flags.writeable = False  # partagé entre les appelants
+        with self._lock:
+            self._put_memory(key, (audio, sample_rate))
+        if self.disk_dir and key not in self._disk:
+            self._write_disk(key, audio, sample_rate)
+
+    def _put_memory(self, key: str, hit: Tuple[np.ndarray, int]):
+        size = hit[0].nbytes
+        if size > self.max_bytes:
+            return
+        if key in self._memory:
+            self.size_bytes -= self._memory.pop(key)[0].nbytes
+        self._memory[key] = hit
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self.size_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _write_disk(self, key: str, audio: np.ndarray, sample_rate: int):
+        path = os.path.join(self.disk_dir, f"{key}_{sample_rate}.npy")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, audio)
+            os.replace(tmp_path, path)  # atomique : jamais de fichier partiel visible
+        except OSError as e:
+            logger.warning(f" TTS cache: disk write failed: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if key in self._disk:
+                return
+            entry = DiskEntry(path, sample_rate, os.path.getsize(path))
+            self._disk[key] = entry
+            self.disk_bytes += entry.size_bytes
+            while self.disk_bytes > self.disk_max_bytes and len(self._disk) > 1:
+                self._remove_disk(next(iter(self._disk)))
+                self.disk_evictions += 1
+
+    def _remove_disk(self, key: str):
+        entry = self._disk.pop(key)
+        self.disk_bytes -= entry.size_bytes
+        try:
+            os.unlink(entry.path)  # un mmap déjà ouvert reste valide
+        except OSError:
+            pass
+
+    def prewarm(self, phrases: Iterable[str], voice: str, speed: float, synthesize: Callable[[str], Tuple[np.ndarray, int]]) -> int:
+        """Synthétiser les phrases absentes des deux niveaux ; renvoie le nombre synthétisé"""
+        synthesized = 0
+        for phrase in phrases:
+            key = self.make_key(phrase, voice, speed)
+            with self._lock:
+                in_memory, on_disk = key in self._memory, key in self._disk
+            if in_memory:
+                continue
+            if on_disk:
+                self.get(phrase, voice, speed)  # chargement en mémoire, sans resynthèse
+                continue
+            audio, sample_rate = synthesize(phrase)
+            self.put(phrase, voice, speed, audio, sample_rate)
+            synthesized += 1
+        return synthesized
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du cache"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self.disk_bytes,
+            "disk_max_bytes": self.disk_max_bytes if self.disk_dir else 0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "bytes_saved": self.bytes_saved,
+            "audio_seconds_saved": round(self.audio_seconds_saved, 2),
+        }
+
+
+def load_prewarm_phrases(path: Optional[str]) -> List[str]:
+    """Phrases à préchauffer : fichier (une par ligne, # = commentaire) ou liste par défaut"""
+    if not path:
+        return list(DEFAULT_PREWARM_PHRASES)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except OSError as e:
+        logger.warning(f" TTS cache: prewarm file unreadable ({path}): {e}, using defaults")
+        return list(DEFAULT_PREWARM_PHRASES)
+
+
+# Instance globale (None si désactivé)
+_tts_cache: Optional[TTSPhraseCache] = None
+_tts_cache_created = False
+
+
+def get_tts_cache() -> Optional[TTSPhraseCache]:
+    """Obtenir le cache de phrases TTS (configuré par l'environnement)"""
+    global _tts_cache, _tts_cache_created
+    if not _tts_cache_created:
+        _tts_cache_created = True
+        if os.getenv("TTS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"):
+            _tts_cache = TTSPhraseCache(
+                max_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+                disk_dir=os.getenv("TTS_CACHE_DIR") or None,
+                disk_max_bytes=int(os.getenv("TTS_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024)),
+            )
+    return _tts_cache
@@ -0,0 +1,85 @@
+"""
+TTS en streaming - Phase 3 Python Bridges
+Découpage du texte en phrases, synthèse dans l'ordre via le pool Piper et envoi
+de chaque morceau dès qu'il est prêt : le délai avant le premier son ne dépend
+plus de la longueur de la réponse
+"""
+
+import asyncio
+import re
+from typing import Any, AsyncIterator, Callable, List, Tuple
+
+# Fin de phrase : ponctuation forte, guillemets/parenthèses fermants compris (« … » avec espace), puis un blanc
+SENTENCE_END = re.compile(r"([.!?…;](?:\s*[»\"')\]])*)\s+")
+# Coupure de repli d'une phrase trop longue : après une virgule ou deux-points
+CLAUSE_END = re.compile(r"(?<=[,:])\s+")
+# Abréviations courantes : le point ne termine pas la phrase
+ABBREVIATIONS = ("M.", "Mme.", "Dr.", "St.", "etc.", "ex.", "cf.", "p.", "av.", "apr.", "J.-C.")
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Redécouper une phrase trop longue aux virgules, puis aux espaces"""
+    parts: List[str] = []
+    current = ""
+    for clause in CLAUSE_END.split(sentence):
+        for word in clause.split(" ") if len(clause) > max_chars else [clause]:
+            candidate = f"{current} {word}".strip()
+            if current and len(candidate) > max_chars:
+                parts.append(current)
+                candidate = word
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_sentences(text: str, max_chars: int = 300, min_chars: int = 12) -> List[str]:
+    """
+    Découper en phrases à synthétiser une par une
+
+    Les fragments plus courts que `min_chars` (« Oui. ») sont rattachés à la phrase
+    suivante (à la précédente en fin de texte) ; les phrases plus longues que
+    `max_chars` sont redécoupées.
+    """
+    marked = SENTENCE_END.sub("\\1\0", text.strip())
+    raw = [s.strip() for s in marked.split("\0") if s.strip()]
+    merged: List[str] = []
+    for sentence in raw:
+        previous = merged[-1] if merged else ""
+        if previous and (len(previous) < min_chars or previous.rsplit(" ", 1)[-1] in ABBREVIATIONS):
+            merged[-1] = f"{previous} {sentence}"
+        else:
+            merged.append(sentence)
+    if len(merged) > 1 and len(merged[-1]) < min_chars:
+        merged[-2:] = [f"{merged[-2]} {merged[-1]}"]
+
+    sentences: List[str] = []
+    for sentence in merged:
+        sentences.extend(_split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence])
+    return sentences
+
+
+async def synthesize_in_order(
+    sentences: List[str],
+    synthesize: Callable[[str], Any],
+    lookahead: int = 2
+) -> AsyncIterator[Tuple[int, str, Any]]:
+    """
+    Synthétiser les phrases dans des threads et les rendre dans l'ordre (seq, phrase, résultat)
+
+    Jusqu'à `lookahead` phrases sont synthétisées en avance (une par worker Piper) pendant
+    que les précédentes sont envoyées ; à l'abandon du générateur, les synthèses en attente
+    ne sont pas lancées.
+    """
+    pending: List[asyncio.Future] = []
+    next_index = 0
+    try:
+        for seq in range(len(sentences)):
+            while next_index < len(sentences) and len(pending) < max(1, lookahead):
+                pending.append(asyncio.ensure_future(asyncio.to_thread(synthesize, sentences[next_index])))
+                next_index += 1
+            result = await pending.pop(0)
+            yield seq, sentences[seq], result
+    finally:
+        for future in pending:
+            future.cancel()
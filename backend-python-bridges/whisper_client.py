@@ -1,14 +1,21 @@
 """
 Client Whisper STT - Phase 3 Python Bridges
-Speech-to-Text avec OpenAI Whisper local
+Speech-to-Text avec Whisper local (openai-whisper ou faster-whisper)
 """
 
-import whisper
 import numpy as np
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Iterator, Tuple, Union
+from contextlib import contextmanager
 from dataclasses import dataclass
 from loguru import logger
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_preprocess import TARGET_RATE, preprocess_audio
+from audio_vad import trim_silence
+from long_form import CHUNK_SECONDS, OVERLAP_SECONDS, plan_chunks, stitch_segments
+from model_registry import WHISPER_INT8_RATIO, WHISPER_MODEL_MB, get_model_registry
+from stt_engines import FasterWhisperEngine, STTEngine, create_engine
 
 
 @dataclass
@@ -19,6 +26,7 @@ class WhisperResult:
     confidence: float  # 0.0 à 1.0
     duration_ms: float
     segments: list[Dict[str, Any]]
+    vad: Optional[Dict[str, Any]] = None  # audio supprimé avant inférence (original_ms, kept_ms, dropped_ratio...)
 
 
 class WhisperClient:
@@ -35,26 +43,42 @@ class WhisperClient:
 
     def __init__(
         self,
-        model_size: str = "base",
+        model_size: Optional[str] = None,
         language: Optional[str] = None,
-        device: str = "cpu"
+        device: str = "cpu",
+        engine: Union[str, STTEngine, None] = None,
+        compute_type: Optional[str] = None,
+        cpu_threads: Optional[int] = None,
+        vad_trim: bool = True,
+        longform_min_seconds: float = 60.0
     ):
         """
         Initialiser le client Whisper
 
         Args:
-            model_size: Taille du modèle (tiny, base, small, medium, large)
+            model_size: Taille du modèle (tiny, base, small, medium, large-v3). None = WHISPER_MODEL ou base
             language: Code langue (ex: 'fr', 'en'). None = auto-detect
             device: 'cpu' ou 'cuda' (si disponible)
+            engine: 'openai-whisper', 'faster-whisper' ou moteur déjà construit
+            compute_type: Précision faster-whisper (int8 par défaut sur CPU)
+            cpu_threads: Threads par transcription (faster-whisper)
+            vad_trim: Supprimer silences de tête/queue et pauses longues avant inférence
+            longform_min_seconds: Durée à partir de laquelle un fichier est découpé en blocs parallèles
         """
-        self.model_size = model_size
+        # Taille explicite prioritaire : plusieurs tailles peuvent être résidentes (registre)
+        self.model_size = model_size or os.getenv("WHISPER_MODEL", "base")
         self.language = language
-        self.device = device
+        self.device = os.getenv("WHISPER_DEVICE", device)
+        self.vad_trim = os.getenv("WHISPER_VAD_TRIM", str(vad_trim)).lower() in ("1", "true", "yes")
+        self.longform_min_seconds = float(os.getenv("WHISPER_LONGFORM_MIN_SECONDS", longform_min_seconds))
 
-        logger.info(f" Whisper Client initializing: {model_size}")
+        logger.info(f" Whisper Client initializing: {self.model_size}")
         try:
-            self.model = whisper.load_model(model_size, device=device)
-            logger.info(f" Whisper model loaded: {model_size}")
+            if isinstance(engine, STTEngine):
+                self.engine = engine
+            else:
+                self.engine = create_engine(engine, self.model_size, self.device, compute_type, cpu_threads)
+            logger.info(f" Whisper model loaded: {self.model_size} ({self.engine.name})")
         except Exception as e:
             logger.error(f" Error loading Whisper model: {e}")
             raise
@@ -70,8 +94,8 @@ class WhisperClient:
         Transcrire audio en texte
 
         Args:
-            audio: Array numpy avec échantillons audio (float32)
-            sample_rate: Fréquence d'échantillonnage (Hz)
+            audio: Array numpy avec échantillons audio (int16/float, mono ou multicanal)
+            sample_rate: Fréquence d'échantillonnage (Hz), rééchantillonné vers 16 kHz
             language: Code langue (optionnel, sinon auto-detect)
             temperature: Température du modèle (0.0-1.0)
 
@@ -84,42 +108,43 @@ class WhisperClient:
 
             logger.debug(f" Transcribing {len(audio) / sample_rate:.1f}s of audio")
 
-            # Normaliser audio si nécessaire
-            if audio.max() > 1.0:
-                audio = audio / 32768.0
-            elif audio.min() < -1.0:
-                audio = np.clip(audio, -1.0, 1.0)
+            # float32 mono 16 kHz normalisé : ce qu'attendent les deux moteurs
+            audio = preprocess_audio(audio, sample_rate)
+
+            # Pré-découpage VAD : Whisper ne voit que les zones de parole
+            timestamp_map, vad_stats = None, None
+            if self.vad_trim:
+                audio, timestamp_map, vad_stats = trim_silence(audio, TARGET_RATE)
+                logger.debug(
+                    f" VAD trim: kept {vad_stats['kept_ms']:.0f}/{vad_stats['original_ms']:.0f}ms "
+                    f"({vad_stats['dropped_ratio']:.0%} dropped)"
+                )
+                if not len(audio):
+                    return WhisperResult(
+                        text="",
+                        language=language or self.language or "unknown",
+                        confidence=0.0,
+                        duration_ms=(time.time() - start_time) * 1000,
+                        segments=[],
+                        vad=vad_stats
+                    )
 
             # Transcrire
-            result = self.model.transcribe(
+            result = self.engine.transcribe(
                 audio,
                 language=language or self.language,
-                temperature=temperature,
-                verbose=False
+                temperature=temperature
             )
+            if timestamp_map is not None:
+                result["segments"] = timestamp_map.remap_segments(result["segments"])
 
             duration_ms = (time.time() - start_time) * 1000
 
-            # Extraire segments
-            segments = []
-            for segment in result.get("segments", []):
-                segments.append({
-                    "id": segment.get("id"),
-                    "start": segment.get("start"),
-                    "end": segment.get("end"),
-                    "text": segment.get("text", "").strip(),
-                    "confidence": segment.get("confidence", 0.0)
-                })
+            logger.info(f" Transcription done in {duration_ms:.0f}ms: {result['text'][:50]}")
 
-            logger.info(f" Transcription done in {duration_ms:.0f}ms: {result.get('text', '')[:50]}")
-
-            return WhisperResult(
-                text=result.get("text", "").strip(),
-                language=result.get("language", "unknown"),
-                confidence=0.95,  # Whisper ne donne pas de confiance globale
-                duration_ms=duration_ms,
-                segments=segments
-            )
+            whisper_result = self._to_result(result, duration_ms)
+            whisper_result.vad = vad_stats
+            return whisper_result
 
         except Exception as e:
             logger.error(f" Transcription error: {e}")
@@ -131,26 +156,64 @@ class WhisperClient:
                 segments=[]
             )
 
+    def transcribe_long(
+        self,
+        audio: np.ndarray,
+        sample_rate: int = 16000,
+        language: Optional[str] = None,
+        chunk_seconds: float = CHUNK_SECONDS,
+        overlap_seconds: float = OVERLAP_SECONDS
+    ) -> WhisperResult:
+        """
+        Transcrire un enregistrement long (réunion, dictée) par blocs en parallèle
+
+        Blocs coupés aux silences avec chevauchement, transcrits simultanément par le
+        moteur (faster-whisper : WHISPER_NUM_WORKERS transcriptions concurrentes sur le
+        même modèle), puis recollés en une liste de segments ordonnée.
+        """
+        import time
+        start_time = time.time()
+
+        audio = preprocess_audio(audio, sample_rate)
+        chunks = plan_chunks(audio, TARGET_RATE, chunk_seconds, overlap_seconds)
+        language = language or self.language
+
+        def run_chunk(chunk):
+            return self.engine.transcribe(audio[chunk.start:chunk.end], language=language)
+
+        with ThreadPoolExecutor(max_workers=self.engine.parallelism) as executor:
+            results = list(executor.map(run_chunk, chunks))
+
+        segments = stitch_segments(chunks, [r["segments"] for r in results], TARGET_RATE)
+        duration_ms = (time.time() - start_time) * 1000
+        audio_seconds = len(audio) / TARGET_RATE
+        logger.info(
+            f" Long-form transcription done: {audio_seconds:.0f}s of audio in {duration_ms / 1000:.1f}s "
+            f"({len(chunks)} chunks, {self.engine.parallelism} in parallel)"
+        )
+        return self._to_result(
+            {
+                "text": " ".join(s["text"] for s in segments if s["text"]),
+                "language": next((r["language"] for r in results if r.get("language")), language),
+                "segments": segments,
+            },
+            duration_ms
+        )
+
     def transcribe_file(
         self,
         file_path: str,
         language: Optional[str] = None
     ) -> WhisperResult:
-        """Transcrire un fichier audio"""
+        """Transcrire un fichier audio (découpé en blocs parallèles au-delà de longform_min_seconds)"""
         try:
             logger.info(f" Transcribing file: {file_path}")
-            result = self.model.transcribe(
-                file_path,
-                language=language or self.language,
-                verbose=False
-            )
-            return WhisperResult(
-                text=result.get("text", "").strip(),
-                language=result.get("language", "unknown"),
-                confidence=0.95,
-                duration_ms=0,
-                segments=result.get("segments", [])
-            )
+            # ffmpeg (PyAV) : tous les conteneurs (wav, m4a, aac, webm, ogg...), mono 16 kHz
+            from faster_whisper import decode_audio
+            audio = decode_audio(file_path, sampling_rate=TARGET_RATE)
+            if len(audio) / TARGET_RATE >= self.longform_min_seconds:
+                return self.transcribe_long(audio, TARGET_RATE, language)
+            return self.transcribe(audio, TARGET_RATE, language)
         except Exception as e:
             logger.error(f" File transcription error: {e}")
             return WhisperResult(
@@ -161,25 +224,52 @@ class WhisperClient:
                 segments=[]
             )
 
+    @staticmethod
+    def _to_result(result: Dict[str, Any], duration_ms: float) -> WhisperResult:
+        """Résultat commun aux moteurs ; confiance globale = moyenne des segments pondérée par leur durée"""
+        segments = result["segments"]
+        weights = [max((s.get("end") or 0) - (s.get("start") or 0), 1e-3) for s in segments]
+        confidence = (
+            sum(s["confidence"] * w for s, w in zip(segments, weights)) / sum(weights) if segments else 0.0
+        )
+        return WhisperResult(
+            text=result["text"],
+            language=result.get("language") or "unknown",
+            confidence=confidence,
+            duration_ms=duration_ms,
+            segments=segments
+        )
+
     def set_language(self, language: str):
         """Définir la langue pour les transcriptions futures"""
         self.language = language
         logger.info(f" Whisper language set to: {language}")
 
 
-# Instance globale
-_whisper_client: Optional[WhisperClient] = None
+def whisper_model_bytes(model_size: str) -> int:
+    """Empreinte RAM estimée d'un modèle selon le moteur configuré"""
+    mb = WHISPER_MODEL_MB.get(model_size, WHISPER_MODEL_MB["large"])
+    if os.getenv("WHISPER_ENGINE") == FasterWhisperEngine.name and os.getenv("WHISPER_COMPUTE_TYPE", "int8").startswith("int8"):
+        mb *= WHISPER_INT8_RATIO
+    return int(mb * 1024 * 1024)
+
+
+# Modèles chargés à la demande, une instance par taille (ex: base pour les commandes, large-v3 pour la dictée)
+get_model_registry().register("whisper", lambda model_size: WhisperClient(model_size=model_size), whisper_model_bytes)
+
+
+def get_whisper_client(model_size: Optional[str] = None) -> WhisperClient:
+    """Obtenir le client Whisper d'une taille donnée (chargé à la première utilisation)"""
+    return get_model_registry().get("whisper", model_size or os.getenv("WHISPER_MODEL", "base"))
 
 
-def get_whisper_client(model_size: str = "base") -> WhisperClient:
-    """Obtenir instance singleton Whisper"""
-    global _whisper_client
-    if _whisper_client is None:
-        _whisper_client = WhisperClient(model_size=model_size)
-    return _whisper_client
+@contextmanager
+def use_whisper_client(model_size: Optional[str] = None) -> Iterator[WhisperClient]:
+    """Client Whisper épinglé le temps du bloc (non déchargé pendant une transcription)"""
+    with get_model_registry().use("whisper", model_size or os.getenv("WHISPER_MODEL", "base")) as client:
+        yield client
 
 
 def init_whisper(model_size: str = "base", language: Optional[str] = None):
     """Initialiser Whisper avec paramètres personnalisés"""
-    global _whisper_client
-    _whisper_client = WhisperClient(model_size=model_size, language=language)
+    get_model_registry().put("whisper", model_size, WhisperClient(model_size=model_size, language=language))
@@ -1,12 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
+from typing import Optional
 from concurrent.futures import ThreadPoolExecutor
 import edge_tts
 import base64
 import asyncio
+import functools
 import io
+import json
+import os
+import numpy as np
+
+from stt_streaming import SAMPLE_RATE, StreamingTranscriber
+from stt_batching import MicroBatcher
+from stt_upload import MAX_UPLOAD_BYTES, PCM_FORMATS, UploadError, pcm16_to_float, read_body
+from stt_longform import transcribe_long
+from stt_segments import STREAM_FORMATS, iterate_in_thread, stream_transcript
+from stt_workers import MAINTENANCE_INTERVAL, WorkerPool, load_whisper_worker
 
 app = FastAPI()
 
@@ -46,6 +58,10 @@ async def synthesize(request: SynthesizeRequest):
 class TranscribeRequest(BaseModel):
     audio_data: str = Field(..., max_length=10000000)
     language: str = Field("fr", max_length=10)
+    model: Optional[str] = Field(None, max_length=32)
+    # "ndjson" or "sse": send each segment as soon as it is decoded instead of one JSON at the end
+    stream: Optional[str] = Field(None, max_length=8)
+    word_timestamps: bool = False
 
 def is_valid_audio_magic_bytes(data: bytes) -> bool:
     if len(data) < 4:
@@ -70,26 +86,155 @@ def is_valid_audio_magic_bytes(data: bytes) -> bool:
         return True
     return False
 
-# Pre-load the Whisper model at startup to prevent 3-4s latency per request
-print("Loading Whisper model (large-v3) into memory. This may take a moment...")
+# Several model sizes can be served (e.g. base for voice commands, large-v3 for dictation).
+# The default model is loaded at startup; the others on first use, and unloaded when idle
+# or when the RAM budget (per process) is exceeded.
+WHISPER_MODEL_SIZE = os.environ.get("STT_DEFAULT_MODEL", "large-v3")
+STT_MODELS = [m.strip() for m in os.environ.get("STT_MODELS", "base,large-v3").split(",") if m.strip()]
+if WHISPER_MODEL_SIZE not in STT_MODELS:
+    STT_MODELS.append(WHISPER_MODEL_SIZE)
+# SecOps / Performance: explicit CPU threads limit (default intra_threads)
+WHISPER_OPTIONS = {"device": "cpu", "compute_type": "int8", "cpu_threads": 4}
+WHISPER_WORKER_OPTIONS = {
+    "default_model": WHISPER_MODEL_SIZE,
+    "preload": (WHISPER_MODEL_SIZE,),
+    "budget_mb": float(os.environ.get("STT_MODEL_BUDGET_MB", "4096")),
+    "idle_seconds": float(os.environ.get("STT_MODEL_IDLE_SECONDS", "900")),
+    **WHISPER_OPTIONS,
+}
+
+# Isolation / multi-core: with STT_WORKERS > 0, inference runs in supervised worker
+# processes that each hold their loaded models (audio handed over via shared memory).
+# A crash in native inference only takes down one worker, which is restarted.
+# One worker by default (one copy of each loaded model, as in-process); more are opt-in,
+# each extra worker holds its own copy of the preloaded model.
+STT_WORKERS = int(os.environ.get("STT_WORKERS", "1"))
+stt_pool = None
+local_worker = None
 try:
-    from faster_whisper import WhisperModel
-    # SecOps / Performance: explicit CPU threads limit (default intra_threads)
-    whisper_model = WhisperModel("large-v3", device="cpu", compute_type="int8", cpu_threads=4)
-    print("Whisper model loaded successfully.")
+    from faster_whisper import decode_audio
 except Exception as e:
-    print(f"Warning: Failed to load WhisperModel: {e}")
-    whisper_model = None
+    # Without faster-whisper neither workers nor compressed uploads can work: STT is unavailable
+    decode_audio = None
+    print(f"Warning: faster-whisper is not available: {e}")
+
+if decode_audio is not None and STT_WORKERS > 0:
+    stt_pool = WorkerPool(load_whisper_worker, WHISPER_WORKER_OPTIONS, workers=STT_WORKERS)
+elif decode_audio is not None:
+    # Pre-load the Whisper model at startup to prevent 3-4s latency per request
+    print(f"Loading Whisper model ({WHISPER_MODEL_SIZE}) into memory. This may take a moment...")
+    try:
+        local_worker = load_whisper_worker(**WHISPER_WORKER_OPTIONS)
+        print("Whisper model loaded successfully.")
+    except Exception as e:
+        print(f"Warning: Failed to load WhisperModel: {e}")
+
+def stt_available():
+    return stt_pool is not None or local_worker is not None
+
+def resolve_model(model):
+    """Requested model size, restricted to STT_MODELS (each one costs RAM)"""
+    if model is None:
+        return WHISPER_MODEL_SIZE
+    if model not in STT_MODELS:
+        raise HTTPException(status_code=400, detail=f"Unknown model '{model}'. Available: {STT_MODELS}")
+    return model
 
 # SecOps / Performance: Prevent GIL contention and Thread Explosion.
-# We limit to 2 concurrent inferences. Each uses up to 4 intra-threads.
+# In-process mode: we limit to 2 concurrent inferences. Each uses up to 4 intra-threads.
+# Worker mode: only audio decoding for the batcher runs here.
 transcription_executor = ThreadPoolExecutor(max_workers=2)
 
+async def run_stt(task, audio, language, **options):
+    """Run a WhisperWorker task in the worker pool, or in-process on the bounded executor"""
+    if stt_pool is not None:
+        return await stt_pool.submit(task, audio, language, **options)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        transcription_executor, functools.partial(getattr(local_worker, task), audio, language, **options)
+    )
+
+async def stream_stt(task, audio, language, **options):
+    """Same as run_stt for generator tasks: yields each item as soon as it is produced"""
+    if stt_pool is not None:
+        async for item in stt_pool.stream(task, audio, language, **options):
+            yield item
+        return
+    make_iterator = functools.partial(getattr(local_worker, task), audio, language, **options)
+    async for item in iterate_in_thread(transcription_executor, make_iterator):
+        yield item
+
+def check_stream_format(stream):
+    if stream is not None and stream not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown stream format '{stream}'. Available: {list(STREAM_FORMATS)}")
+
+def stream_segments_response(audio, language, model, stream, word_timestamps):
+    """Streaming response mode: NDJSON lines or SSE events, one per decoded segment"""
+    print(f"Streaming transcription ({stream})...")
+    events = stream_stt("stream_segments", audio, language, model=model, word_timestamps=word_timestamps)
+    return StreamingResponse(
+        stream_transcript(events, stream),
+        media_type=STREAM_FORMATS[stream],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # no proxy buffering of events
+    )
+
+async def run_batch(clips, language, model=None):
+    return await run_stt("batch", clips, language, model=model)
+
+# Performance: short clips (voice commands) arriving together are decoded as one batch.
+# A batch occupies a single worker, so throughput per core rises with concurrency.
+BATCH_MAX_CLIP_SECONDS = float(os.environ.get("STT_BATCH_MAX_CLIP_SECONDS", "8"))
+stt_batcher = None
+if stt_available() and os.environ.get("STT_BATCHING", "true").lower() in ("1", "true", "yes"):
+    stt_batcher = MicroBatcher(
+        run_batch,
+        max_batch_size=int(os.environ.get("STT_BATCH_MAX_SIZE", "8")),
+        max_wait_ms=float(os.environ.get("STT_BATCH_MAX_WAIT_MS", "15")),
+    )
+
+async def unload_idle_models():
+    # In-process mode: workers do this themselves between tasks
+    while True:
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
+        await asyncio.get_running_loop().run_in_executor(transcription_executor, local_worker.maintain)
+
+@app.on_event("startup")
+async def start_stt_workers():
+    if stt_pool is not None:
+        print(f"Starting {STT_WORKERS} STT worker processes ({WHISPER_MODEL_SIZE})...")
+        stt_pool.start()
+    elif local_worker is not None:
+        asyncio.ensure_future(unload_idle_models())
+
+@app.on_event("shutdown")
+async def stop_stt_workers():
+    if stt_pool is not None:
+        stt_pool.stop()
+
+async def transcribe_audio(audio, language, model):
+    """audio: in-memory audio file (BinaryIO) or float32 16 kHz samples"""
+    loop = asyncio.get_running_loop()
+
+    if stt_batcher is not None:
+        if not isinstance(audio, np.ndarray):
+            audio = await loop.run_in_executor(transcription_executor, decode_audio, audio, SAMPLE_RATE)
+        if len(audio) <= BATCH_MAX_CLIP_SECONDS * SAMPLE_RATE:
+            result = await stt_batcher.submit(audio, language, model=model)
+            print(f"Transcription complete (batched): {result['text'][:50]}...")
+            return result
+        # already decoded: long clips go through the regular pipeline
+
+    result = await run_stt("transcribe", audio, language, model=model)
+    print(f"Transcription complete: {result['text'][:50]}...")
+    return result
+
 @app.post("/transcribe")
 async def transcribe(request: TranscribeRequest):
     print(f"Transcribing audio...")
-    if whisper_model is None:
-        raise HTTPException(status_code=500, detail="Whisper model is not available.")
+    if not stt_available():
+        raise HTTPException(status_code=503, detail="Whisper model is not available.")
+    model = resolve_model(request.model)
+    check_stream_format(request.stream)
         
     try:
         audio_bytes = base64.b64decode(request.audio_data)
@@ -98,30 +243,164 @@ async def transcribe(request: TranscribeRequest):
         if not is_valid_audio_magic_bytes(audio_bytes):
             raise HTTPException(status_code=400, detail="Invalid audio file signature. Not a recognized audio format.")
 
-        def run_transcription(audio_buffer, lang):
-            # Pass BinaryIO directly. Avoids disk I/O and temp file leaks entirely.
-            segs, info = whisper_model.transcribe(audio_buffer, language=lang)
-            return " ".join([segment.text for segment in segs]), info
-            
         # Create an in-memory buffer for the audio
-        buf = io.BytesIO(audio_bytes)
-        loop = asyncio.get_running_loop()
-        
-        # Async execution bounded by thread pool executor (no unbounded asyncio.to_thread)
-        text, info = await loop.run_in_executor(
-            transcription_executor, 
-            run_transcription, 
-            buf, 
-            request.language
-        )
-        print(f"Transcription complete: {text[:50]}...")
-        return {"text": text, "language": info.language}
+        if request.stream is not None:
+            return stream_segments_response(
+                io.BytesIO(audio_bytes), request.language, model, request.stream, request.word_timestamps
+            )
+        return await transcribe_audio(io.BytesIO(audio_bytes), request.language, model)
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
     # Note: gc.collect() has been intentionally removed to prevent Stop-The-World (STW) pauses.
 
+async def read_audio_upload(request, format, sample_rate, max_bytes):
+    """Binary body -> float32 samples (raw PCM) or in-memory audio file, and its size in bytes"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    is_pcm = format.lower() in PCM_FORMATS or content_type in PCM_FORMATS
+    if is_pcm and sample_rate != SAMPLE_RATE:
+        raise HTTPException(status_code=400, detail=f"Only {SAMPLE_RATE} Hz PCM is supported.")
+    content_length = request.headers.get("content-length")
+
+    try:
+        body = await read_body(request.stream(), int(content_length) if content_length else None, max_bytes)
+        if not body:
+            raise UploadError(400, "Audio upload is empty.")
+        if is_pcm:
+            return pcm16_to_float(body), len(body)
+        # SecOps: Magic Bytes Validation to prevent exploit via ffmpeg
+        if not is_valid_audio_magic_bytes(body[:8].tobytes()):
+            raise UploadError(400, "Invalid audio file signature. Not a recognized audio format.")
+        return io.BytesIO(body), len(body)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@app.post("/transcribe/binary")
+async def transcribe_binary(
+    request: Request,
+    language: str = "fr",
+    format: str = "auto",
+    sample_rate: int = SAMPLE_RATE,
+    model: Optional[str] = None,
+    stream: Optional[str] = None,
+    word_timestamps: bool = False,
+):
+    """
+    Binary STT upload (no base64). The body is either an audio file (WAV, Ogg/Opus,
+    FLAC, MP3, M4A) or, with ?format=pcm_s16le or Content-Type audio/L16, raw PCM
+    s16le mono 16 kHz. With ?stream=ndjson or ?stream=sse, segments are sent as
+    they are decoded.
+    """
+    if not stt_available():
+        raise HTTPException(status_code=503, detail="Whisper model is not available.")
+    model = resolve_model(model)
+    check_stream_format(stream)
+    audio, size = await read_audio_upload(request, format, sample_rate, MAX_UPLOAD_BYTES)
+
+    if stream is not None:
+        return stream_segments_response(audio, language[:10], model, stream, word_timestamps)
+    print(f"Transcribing binary upload ({size} bytes)...")
+    try:
+        return await transcribe_audio(audio, language[:10], model)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Meeting recordings: larger uploads, split into chunks transcribed in parallel by the workers
+LONGFORM_MAX_UPLOAD_BYTES = int(os.environ.get("STT_LONGFORM_MAX_UPLOAD_BYTES", str(200_000_000)))
+LONGFORM_CHUNK_SECONDS = float(os.environ.get("STT_LONGFORM_CHUNK_SECONDS", "28"))
+LONGFORM_OVERLAP_SECONDS = float(os.environ.get("STT_LONGFORM_OVERLAP_SECONDS", "1"))
+
+@app.post("/transcribe/long")
+async def transcribe_long_form(
+    request: Request, language: str = "fr", format: str = "auto", sample_rate: int = SAMPLE_RATE, model: Optional[str] = None
+):
+    """
+    Long recordings (same body formats as /transcribe/binary). Returns the merged,
+    time-ordered segments on the original timeline.
+    """
+    if not stt_available():
+        raise HTTPException(status_code=503, detail="Whisper model is not available.")
+    model = resolve_model(model)
+    audio, size = await read_audio_upload(request, format, sample_rate, LONGFORM_MAX_UPLOAD_BYTES)
+    language = language[:10]
+
+    async def transcribe_chunk(chunk):
+        return await run_stt("segments", chunk, language, model=model)
+
+    print(f"Long-form transcription ({size} bytes)...")
+    try:
+        if not isinstance(audio, np.ndarray):
+            loop = asyncio.get_running_loop()
+            audio = await loop.run_in_executor(transcription_executor, decode_audio, audio, SAMPLE_RATE)
+        result = await transcribe_long(
+            audio, transcribe_chunk, SAMPLE_RATE, LONGFORM_CHUNK_SECONDS, LONGFORM_OVERLAP_SECONDS
+        )
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+    print(
+        f"Long-form transcription complete: {result['duration_seconds']}s of audio in "
+        f"{result['elapsed_seconds']}s ({result['chunks']} chunks)"
+    )
+    return {**result, "language": language, "model": model}
+
+@app.websocket("/ws/transcribe")
+async def ws_transcribe(websocket: WebSocket, language: str = "fr", sample_rate: int = SAMPLE_RATE, model: Optional[str] = None):
+    """
+    Streaming STT. Client sends binary frames of PCM s16le mono 16 kHz and
+    {"type": "end"} to flush; server sends speech_start / partial / final JSON events.
+    """
+    await websocket.accept()
+    if not stt_available():
+        await websocket.close(code=1011, reason="Whisper model is not available.")
+        return
+    if sample_rate != SAMPLE_RATE:
+        await websocket.close(code=1003, reason=f"Only {SAMPLE_RATE} Hz PCM is supported.")
+        return
+    if model is not None and model not in STT_MODELS:
+        await websocket.close(code=1003, reason=f"Unknown model '{model}'.")
+        return
+
+    async def decode(audio, final):
+        # Same workers as /transcribe
+        return await run_stt("stream_decode", audio, language[:10], final=final, model=model)
+
+    transcriber = StreamingTranscriber(decode, sample_rate=sample_rate)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                events = await transcriber.feed(message["bytes"])
+            elif message.get("text") and json.loads(message["text"]).get("type") == "end":
+                for event in await transcriber.flush():
+                    await websocket.send_json(event)
+                await websocket.close()
+                break
+            else:
+                continue
+            for event in events:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        import logging
+        logging.error(f"Streaming transcription error: {e}")
+        await websocket.close(code=1011)
+
+@app.get("/stats")
+async def stats():
+    return {
+        "batching": stt_batcher.stats() if stt_batcher else {"enabled": False},
+        "workers": stt_pool.stats() if stt_pool else {"enabled": False},
+        "models": local_worker.stats() if local_worker else None,
+    }
+
 if __name__ == "__main__":
     import uvicorn
     print("Starting Jarvis Voice Server on port 8005...")
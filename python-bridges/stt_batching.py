@@ -0,0 +1,168 @@
+"""
+Dynamic micro-batching for short transcription requests.
+
+Concurrent short clips are held for a few milliseconds, then decoded
+together in one batched Whisper pass (one encoder call and one generate
+call over the whole batch) instead of one pass per request.
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import Executor
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class WhisperBatchDecoder:
+    """
+    Batched greedy/beam decode of clips up to 30 s on a faster-whisper model.
+
+    Uses the same building blocks as WhisperModel.transcribe (feature
+    extractor, tokenizer, CTranslate2 encode/generate), without timestamps
+    or temperature fallback: voice commands are a single short segment.
+    With language=None, each clip's language is detected from the shared
+    encoder output and decoded with its own prompt, still in one generate call.
+    """
+
+    def __init__(self, model, beam_size: int = 5):
+        import ctranslate2
+        from faster_whisper.audio import pad_or_trim
+        from faster_whisper.tokenizer import Tokenizer
+
+        self.model = model
+        self.beam_size = beam_size
+        self._storage = ctranslate2.StorageView.from_array
+        self._pad_or_trim = pad_or_trim
+        self._tokenizer = Tokenizer
+        self._tokenizers: Dict[Optional[str], object] = {}
+
+    def tokenizer(self, language: Optional[str]):
+        if language not in self._tokenizers:
+            self._tokenizers[language] = self._tokenizer(
+                self.model.hf_tokenizer, self.model.model.is_multilingual, task="transcribe", language=language
+            )
+        return self._tokenizers[language]
+
+    def __call__(self, clips: List[np.ndarray], language: Optional[str]) -> List[Dict[str, str]]:
+        extractor = self.model.feature_extractor
+        features = np.stack([self._pad_or_trim(extractor(clip), extractor.nb_max_frames) for clip in clips])
+        encoder_output = self.model.model.encode(self._storage(np.ascontiguousarray(features)))
+
+        if language is None and self.model.model.is_multilingual:
+            # Most probable language token per clip, e.g. "<|fr|>"
+            detected = self.model.model.detect_language(encoder_output)
+            tokenizers = [self.tokenizer(probs[0][0][2:-2]) for probs in detected]
+        else:
+            tokenizers = [self.tokenizer(language)] * len(clips)
+
+        results = self.model.model.generate(
+            encoder_output,
+            [tokenizer.sot_sequence + [tokenizer.no_timestamps] for tokenizer in tokenizers],
+            beam_size=self.beam_size,
+            max_length=self.model.max_length,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+        )
+        return [
+            {"text": tokenizer.decode(result.sequences_ids[0]).strip(), "language": tokenizer.language_code}
+            for tokenizer, result in zip(tokenizers, results)
+        ]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for up to `max_wait_ms` (or until
+    `max_batch_size` are queued), then runs them as one batch on `executor`
+    and scatters the results back to each caller, one item per clip (the
+    decoder's {"text", "language"} with the language it detected or was
+    given). Batches are per language
+    since the decoder prompt depends on it, and per `options` (e.g. model
+    size), which are passed through to `run_batch`. `run_batch` may also be a
+    coroutine function (e.g. a call into the worker pool), then no executor
+    is needed.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[np.ndarray], Optional[str]], List[Dict[str, str]]],
+        executor: Optional[Executor] = None,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 15.0,
+    ):
+        self.run_batch = run_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: Dict[Hashable, List[Tuple[np.ndarray, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.Task] = {}
+        # Strong references: the event loop only keeps weak ones to running tasks
+        self._running: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+    async def submit(self, audio: np.ndarray, language: Optional[str], **options) -> Dict[str, str]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (language, tuple(sorted(options.items())))
+        queue = self._pending.setdefault(key, [])
+        queue.append((audio, future))
+        self.requests += 1
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.ensure_future(self._flush_later(key))
+        return await future
+
+    async def _flush_later(self, key: Hashable):
+        await asyncio.sleep(self.max_wait)
+        self._timers.pop(key, None)
+        self._flush(key)
+
+    def _flush(self, key: Hashable):
+        timer = self._timers.pop(key, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        # Callers that gave up while queued do not cost a decode slot
+        batch = [(audio, future) for audio, future in batch if not future.cancelled()]
+        if batch:
+            task = asyncio.ensure_future(self._run(batch, key))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[np.ndarray, asyncio.Future]], key: Hashable):
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        loop = asyncio.get_running_loop()
+        clips = [audio for audio, _ in batch]
+        language, options = key
+        try:
+            if asyncio.iscoroutinefunction(self.run_batch):
+                results = await self.run_batch(clips, language, **dict(options))
+            else:
+                results = await loop.run_in_executor(
+                    self.executor, functools.partial(self.run_batch, clips, language, **dict(options))
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
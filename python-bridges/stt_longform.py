@@ -0,0 +1,42 @@
+"""
+Long-form transcription: split long recordings at silences into overlapping
+chunks (long_form.py, shared with backend-python-bridges), transcribe the
+chunks in parallel and stitch the segments back.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import numpy as np
+
+from long_form import CHUNK_SECONDS, OVERLAP_SECONDS, SAMPLE_RATE, plan_chunks, stitch_segments
+
+
+async def transcribe_long(
+    audio: np.ndarray,
+    transcribe_chunk: Callable[[np.ndarray], Awaitable[List[Dict[str, Any]]]],
+    sample_rate: int = SAMPLE_RATE,
+    chunk_seconds: float = CHUNK_SECONDS,
+    overlap_seconds: float = OVERLAP_SECONDS,
+) -> Dict[str, Any]:
+    """
+    `transcribe_chunk(samples)` returns segments with start/end relative to
+    the chunk. All chunks are submitted at once; the worker pool (or executor)
+    behind it bounds the actual parallelism.
+    """
+    started = time.perf_counter()
+    chunks = plan_chunks(audio, sample_rate, chunk_seconds, overlap_seconds)
+    results = await asyncio.gather(*(transcribe_chunk(audio[c.start:c.end]) for c in chunks))
+    segments = stitch_segments(chunks, results, sample_rate)
+
+    elapsed = time.perf_counter() - started
+    duration = len(audio) / sample_rate
+    return {
+        "text": " ".join(s["text"] for s in segments if s["text"]),
+        "segments": segments,
+        "chunks": len(chunks),
+        "duration_seconds": round(duration, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "realtime_factor": round(elapsed / duration, 3) if duration else 0.0,
+    }
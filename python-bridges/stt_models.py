@@ -0,0 +1,150 @@
+"""
+Per-process Whisper model registry.
+
+Models are loaded on first use, several sizes can stay resident (e.g. `base`
+for voice commands and `large-v3` for dictation) under a RAM budget, and the
+least recently used idle ones are unloaded. Models in use by a running task
+and pinned (preloaded) models are never unloaded. Each STT worker process owns
+one registry; load and unload events are reported in `stats()`.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Same estimates as backend-python-bridges/model_registry.py (kept identical, checked by
+# test_stt_workers.py): float32 size in MB, scaled by the int8 ratio used here.
+WHISPER_MODEL_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 900,
+    "medium": 2500,
+    "large": 4500,
+    "large-v2": 4500,
+    "large-v3": 4500,
+    "distil-large-v3": 3000,
+}
+WHISPER_INT8_RATIO = 0.35  # faster-whisper int8 vs float32
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        budget_mb: float = 4096,
+        idle_seconds: float = 900,
+        pinned: Iterable[str] = (),
+        on_unload: Optional[Callable[[str], None]] = None,
+    ):
+        self.loader = loader
+        self.budget_mb = budget_mb
+        self.idle_seconds = idle_seconds
+        self.pinned = set(pinned)  # never unloaded (the preloaded default model)
+        self.on_unload = on_unload
+        self._models: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()  # loads are serialized: one model load at a time per process
+
+        self.loads = 0
+        self.evictions = {"budget": 0, "idle": 0}
+        self.events: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def size_mb(name: str) -> float:
+        return WHISPER_MODEL_MB.get(name, WHISPER_MODEL_MB["large"]) * WHISPER_INT8_RATIO
+
+    def resident_mb(self) -> float:
+        return sum(self.size_mb(name) for name in self._models)
+
+    def get(self, name: str):
+        """Load `name` if needed (preload). Not protected once returned: tasks use use()"""
+        with self._lock:
+            return self._acquire(name)["model"]
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Any]:
+        """The model, never unloaded until the block exits"""
+        with self._lock:
+            entry = self._acquire(name)
+            entry["in_use"] += 1
+        try:
+            yield entry["model"]
+        finally:
+            with self._lock:
+                entry["in_use"] -= 1
+                entry["last_used"] = time.monotonic()
+
+    def _acquire(self, name: str) -> Dict[str, Any]:
+        entry = self._models.get(name)
+        if entry is None:
+            self._make_room(self.size_mb(name))
+            start = time.perf_counter()
+            model = self.loader(name)
+            load_ms = round((time.perf_counter() - start) * 1000)
+            entry = self._models[name] = {"model": model, "load_ms": load_ms, "uses": 0, "in_use": 0}
+            self.loads += 1
+            self._event("load", name, load_ms=load_ms)
+            print(f"Whisper model {name} loaded in {load_ms} ms")
+        self._models.move_to_end(name)
+        entry["uses"] += 1
+        entry["last_used"] = time.monotonic()
+        return entry
+
+    def _make_room(self, incoming_mb: float):
+        # Least recently used first, skipping pinned models and models a running task holds
+        for name in list(self._models):
+            if self.resident_mb() + incoming_mb <= self.budget_mb:
+                return
+            if name not in self.pinned and not self._models[name]["in_use"]:
+                self._unload(name, "budget")
+        if self.resident_mb() + incoming_mb > self.budget_mb:
+            print(f"Warning: Whisper model budget exceeded ({self.resident_mb() + incoming_mb:.0f} > {self.budget_mb:.0f} MB)")
+
+    def _unload(self, name: str, reason: str):
+        del self._models[name]
+        self.evictions[reason] += 1
+        self._event("unload", name, reason=reason)
+        if self.on_unload is not None:
+            self.on_unload(name)
+        print(f"Whisper model {name} unloaded ({reason})")
+
+    def evict_idle(self) -> int:
+        if self.idle_seconds <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                name for name, entry in self._models.items()
+                if name not in self.pinned and not entry["in_use"] and now - entry["last_used"] > self.idle_seconds
+            ]
+            for name in idle:
+                self._unload(name, "idle")
+        return len(idle)
+
+    def _event(self, event: str, name: str, **details):
+        self.events.append({"event": event, "model": name, "at": time.time(), **details})
+        del self.events[:-20]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            resident = [
+                {
+                    "model": name,
+                    "size_mb": self.size_mb(name),
+                    "load_ms": entry["load_ms"],
+                    "uses": entry["uses"],
+                    "in_use": entry["in_use"],
+                    "idle_seconds": round(now - entry["last_used"], 1),
+                }
+                for name, entry in self._models.items()
+            ]
+        return {
+            "resident": resident,
+            "resident_mb": self.resident_mb(),
+            "budget_mb": self.budget_mb,
+            "loads": self.loads,
+            "evictions": dict(self.evictions),
+            "recent_events": list(self.events[-10:]),
+        }
@@ -0,0 +1,91 @@
+"""
+Incremental transcript responses: segments are sent to the client as soon
+as the decoder produces them (NDJSON lines or Server-Sent Events), so
+downstream processing can start on the first sentence while the rest of
+the audio is still being decoded.
+
+Event types: "info" (detected language, audio duration), one "segment" per
+decoded segment (start, end, text, optional words), then "done" with the
+full text, or "error".
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+_DONE = object()
+
+
+def encode_event(event: Dict[str, Any], fmt: str) -> bytes:
+    data = json.dumps(event, ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n".encode()
+    return (data + "\n").encode()
+
+
+async def iterate_in_thread(executor, make_iterator: Callable[[], Iterator[Any]]) -> AsyncIterator[Any]:
+    """
+    Drive a blocking iterator on `executor`, yielding each item on the event
+    loop as it is produced. If the consumer goes away (client disconnected),
+    the iterator is abandoned after its current item, freeing the executor.
+    """
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    abandoned = threading.Event()
+
+    def pump():
+        try:
+            for item in make_iterator():
+                if abandoned.is_set():
+                    break
+                loop.call_soon_threadsafe(items.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(items.put_nowait, _DONE)
+
+    pumping = loop.run_in_executor(executor, pump)
+    try:
+        while True:
+            item = await items.get()
+            if item is _DONE:
+                break
+            yield item
+        await pumping  # re-raises a decoding error
+    finally:
+        abandoned.set()
+
+
+async def stream_transcript(events: AsyncIterator[Dict[str, Any]], fmt: str) -> AsyncIterator[bytes]:
+    """Encode decoder events for the response body and close with a "done" (or "error") event."""
+    started = time.perf_counter()
+    texts = []
+    language = None
+    try:
+        async for event in events:
+            if event["type"] == "info":
+                language = event["language"]
+            elif event["type"] == "segment":
+                if not texts:
+                    event["first_segment_ms"] = round((time.perf_counter() - started) * 1000)
+                texts.append(event["text"])
+            yield encode_event(event, fmt)
+    except Exception as e:
+        # The status line is already sent: report the failure in-band
+        yield encode_event({"type": "error", "detail": str(e)}, fmt)
+        return
+    yield encode_event(
+        {
+            "type": "done",
+            "text": " ".join(t for t in texts if t),
+            "language": language,
+            "segments": len(texts),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000),
+        },
+        fmt,
+    )
@@ -0,0 +1,211 @@
+"""
+Streaming speech-to-text for the /ws/transcribe WebSocket.
+
+Raw PCM frames are segmented into utterances with an energy VAD. While an
+utterance is in progress it is re-decoded on a sliding window to emit
+partial transcripts; the words two consecutive partials agree on are
+reported as stable (LocalAgreement). When the VAD detects the end of
+speech, the whole utterance is decoded once more and sent as final.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class VADConfig:
+    frame_ms: int = 30
+    # A frame is speech when its RMS exceeds both the absolute floor and
+    # `threshold_ratio` times the running noise estimate
+    min_rms: float = 0.01
+    threshold_ratio: float = 3.0
+    noise_alpha: float = 0.05
+    start_frames: int = 3  # consecutive voiced frames to open an utterance
+    end_silence_ms: int = 500  # trailing silence that closes an utterance
+    pre_roll_ms: int = 200  # audio kept before the detected start
+
+
+class EnergyVAD:
+    """Frame-level energy voice activity detector with an adaptive noise floor."""
+
+    def __init__(self, config: Optional[VADConfig] = None, sample_rate: int = SAMPLE_RATE):
+        self.config = config or VADConfig()
+        self.frame_size = sample_rate * self.config.frame_ms // 1000
+        self.noise_rms = self.config.min_rms / self.config.threshold_ratio
+        self.in_speech = False
+        self._voiced_run = 0
+        self._silent_run = 0
+
+    @property
+    def end_frames(self) -> int:
+        return max(1, self.config.end_silence_ms // self.config.frame_ms)
+
+    def is_voiced(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        voiced = rms >= max(self.config.min_rms, self.noise_rms * self.config.threshold_ratio)
+        if not voiced:
+            self.noise_rms += self.config.noise_alpha * (rms - self.noise_rms)
+        return voiced
+
+    def process(self, frame: np.ndarray) -> Optional[str]:
+        """Return "start" or "end" on a speech boundary, None otherwise."""
+        voiced = self.is_voiced(frame)
+        if not self.in_speech:
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.config.start_frames:
+                self.in_speech = True
+                self._silent_run = 0
+                return "start"
+            return None
+
+        self._silent_run = 0 if voiced else self._silent_run + 1
+        if self._silent_run >= self.end_frames:
+            self.in_speech = False
+            self._voiced_run = 0
+            return "end"
+        return None
+
+
+def common_prefix(a: List[str], b: List[str]) -> List[str]:
+    prefix = []
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        prefix.append(x)
+    return prefix
+
+
+class StreamingTranscriber:
+    """
+    Per-connection state machine turning PCM frames into transcript events.
+
+    `decode(audio, final)` is an async callable returning the text of a
+    float32 16 kHz clip; `final` lets it use a wider beam for the last pass.
+    """
+
+    def __init__(
+        self,
+        decode: Callable[[np.ndarray, bool], Awaitable[str]],
+        sample_rate: int = SAMPLE_RATE,
+        partial_interval: float = 0.6,
+        window_seconds: float = 15.0,
+        max_utterance_seconds: float = 30.0,
+        vad_config: Optional[VADConfig] = None,
+    ):
+        self.decode = decode
+        self.sample_rate = sample_rate
+        self.partial_interval = partial_interval
+        self.window_samples = int(window_seconds * sample_rate)
+        self.max_utterance_samples = int(max_utterance_seconds * sample_rate)
+        self.vad = EnergyVAD(vad_config, sample_rate)
+
+        self._pending = np.zeros(0, dtype=np.float32)  # partial frame carried over
+        self._pre_roll: List[np.ndarray] = []
+        self._pre_roll_frames = max(1, self.vad.config.pre_roll_ms // self.vad.config.frame_ms)
+        self._utterance: List[np.ndarray] = []
+        self._utterance_samples = 0
+        self._utterance_start = 0
+        self._since_partial = 0
+        self._previous_words: List[str] = []
+        self._stable_words: List[str] = []
+        self._last_partial = ""
+        self.samples_seen = 0
+
+    @staticmethod
+    def pcm16_to_float(pcm: bytes) -> np.ndarray:
+        if len(pcm) % 2:
+            pcm = pcm[:-1]
+        return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+    async def feed(self, pcm: bytes) -> List[Dict[str, Any]]:
+        """Consume raw PCM s16le mono bytes and return the events they produced."""
+        audio = np.concatenate([self._pending, self.pcm16_to_float(pcm)])
+        frame_size = self.vad.frame_size
+        usable = len(audio) - len(audio) % frame_size
+        self._pending = audio[usable:]
+
+        events: List[Dict[str, Any]] = []
+        for offset in range(0, usable, frame_size):
+            frame = audio[offset:offset + frame_size]
+            self.samples_seen += frame_size
+            boundary = self.vad.process(frame)
+
+            if boundary == "start":
+                self._start_utterance(frame)
+                events.append({"type": "speech_start", "t": round(self._utterance_start / self.sample_rate, 3)})
+                continue
+
+            if not self._utterance:
+                if self.vad.in_speech:
+                    # Utterance cut at max_utterance_seconds: keep going without a new speech_start
+                    self._start_utterance(frame)
+                else:
+                    self._pre_roll = (self._pre_roll + [frame])[-self._pre_roll_frames:]
+                continue
+
+            self._utterance.append(frame)
+            self._utterance_samples += frame_size
+            self._since_partial += frame_size
+
+            if boundary == "end" or self._utterance_samples >= self.max_utterance_samples:
+                events.append(await self._finalize())
+            elif self._since_partial >= self.partial_interval * self.sample_rate:
+                partial = await self._partial()
+                if partial:
+                    events.append(partial)
+        return events
+
+    async def flush(self) -> List[Dict[str, Any]]:
+        """End of stream: finalize the utterance in progress, if any."""
+        if not self._utterance:
+            return []
+        self.vad.in_speech = False
+        return [await self._finalize()]
+
+    def _start_utterance(self, frame: np.ndarray):
+        self._utterance = self._pre_roll + [frame]
+        self._pre_roll = []
+        self._utterance_samples = sum(len(f) for f in self._utterance)
+        self._utterance_start = self.samples_seen - self._utterance_samples
+        self._since_partial = 0
+        self._previous_words = []
+        self._stable_words = []
+        self._last_partial = ""
+
+    def _audio(self) -> np.ndarray:
+        return np.concatenate(self._utterance)
+
+    async def _partial(self) -> Optional[Dict[str, Any]]:
+        self._since_partial = 0
+        # Sliding window: bounded decode cost on long utterances
+        text = (await self.decode(self._audio()[-self.window_samples:], False)).strip()
+        words = text.split()
+        agreed = common_prefix(self._previous_words, words)
+        if len(agreed) > len(self._stable_words):
+            self._stable_words = agreed
+        self._previous_words = words
+        if not text or text == self._last_partial:
+            return None
+        self._last_partial = text
+        return {"type": "partial", "text": text, "stable": " ".join(self._stable_words)}
+
+    async def _finalize(self) -> Dict[str, Any]:
+        ended = time.perf_counter()
+        audio = self._audio()
+        start = self._utterance_start / self.sample_rate
+        self._utterance = []
+        self._utterance_samples = 0
+        text = (await self.decode(audio, True)).strip()
+        return {
+            "type": "final",
+            "text": text,
+            "start": round(start, 3),
+            "end": round(start + len(audio) / self.sample_rate, 3),
+            # Time from end-of-speech detection to transcript, the latency users feel
+            "latency_ms": round((time.perf_counter() - ended) * 1000, 1),
+        }
@@ -0,0 +1,451 @@
+"""
+Supervised pool of STT worker processes.
+
+Each worker process loads its own model and serves tasks from a private
+queue, so inference and its Python-side pre/post-processing run outside
+the API process (no GIL contention with the event loop) and a native crash
+only kills one worker. Audio is handed over through
+multiprocessing.shared_memory: the parent copies the samples once into a
+segment and sends only its name; the worker maps it without unpickling.
+A monitor thread restarts dead workers and fails the requests they held.
+Tasks that return a generator are streamed: each item is forwarded to the
+caller as soon as the worker produces it.
+"""
+
+import asyncio
+import inspect
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from stt_models import ModelRegistry
+
+# How often an idle worker runs housekeeping (idle model unload) and reports stats
+MAINTENANCE_INTERVAL = 30.0
+
+# Result message status: a task's final result, its error, or one item of a streamed task
+DONE, FAILED, ITEM = "done", "failed", "item"
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+class WhisperWorker:
+    """
+    The tasks a worker runs on its faster-whisper models. Also used in-process
+    (STT_WORKERS=0) so both modes share the same decode settings. `model`
+    selects a model size; models are loaded on demand by the registry.
+    """
+
+    def __init__(self, models: ModelRegistry, default_model: str):
+        self.models = models
+        self.default_model = default_model
+        self._batch_decoders: Dict[str, Any] = {}
+        models.on_unload = lambda name: self._batch_decoders.pop(name, None)
+
+    def model(self, name: Optional[str] = None):
+        """Context manager: the model stays loaded until the task (and its lazy decode) ends"""
+        return self.models.use(name or self.default_model)
+
+    def transcribe(self, audio, language: str, model: Optional[str] = None) -> Dict[str, str]:
+        with self.model(model) as whisper_model:
+            segs, info = whisper_model.transcribe(audio, language=language)
+            return {"text": " ".join([segment.text for segment in segs]), "language": info.language}
+
+    def stream_decode(self, audio, language: str, final: bool = False, model: Optional[str] = None) -> str:
+        # Partials only need to be fast: greedy search; the final pass uses the default beam
+        with self.model(model) as whisper_model:
+            segs, _ = whisper_model.transcribe(
+                audio,
+                language=language,
+                beam_size=5 if final else 1,
+                condition_on_previous_text=False,
+                without_timestamps=True,
+            )
+            return " ".join(segment.text.strip() for segment in segs)
+
+    def segments(self, audio, language: str, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        # Long-form chunks: timestamps are needed to stitch overlapping chunks back together
+        with self.model(model) as whisper_model:
+            segs, _ = whisper_model.transcribe(audio, language=language, condition_on_previous_text=False)
+            return [{"start": s.start, "end": s.end, "text": s.text.strip()} for s in segs]
+
+    def stream_segments(self, audio, language: str, model: Optional[str] = None, word_timestamps: bool = False):
+        # faster-whisper decodes lazily: each segment is yielded as soon as its window is decoded
+        with self.model(model) as whisper_model:
+            segs, info = whisper_model.transcribe(audio, language=language, word_timestamps=word_timestamps)
+            yield {"type": "info", "language": info.language, "duration": round(info.duration, 3)}
+            for s in segs:
+                segment = {
+                    "type": "segment", "id": s.id, "start": round(s.start, 3), "end": round(s.end, 3), "text": s.text.strip()
+                }
+                if word_timestamps:
+                    segment["words"] = [
+                        {"start": round(w.start, 3), "end": round(w.end, 3), "word": w.word, "probability": round(w.probability, 3)}
+                        for w in s.words or []
+                    ]
+                yield segment
+
+    def batch(self, clips: List[np.ndarray], language: Optional[str], model: Optional[str] = None) -> List[Dict[str, str]]:
+        name = model or self.default_model
+        with self.model(name) as whisper_model:
+            if name not in self._batch_decoders:
+                from stt_batching import WhisperBatchDecoder
+
+                self._batch_decoders[name] = WhisperBatchDecoder(whisper_model)
+            return self._batch_decoders[name](clips, language)
+
+    def maintain(self):
+        self.models.evict_idle()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.models.stats()
+
+
+def load_whisper_worker(
+    default_model: str,
+    preload: Tuple[str, ...] = (),
+    budget_mb: float = 4096,
+    idle_seconds: float = 900,
+    **model_options,
+) -> WhisperWorker:
+    """
+    Worker factory: runs in the child process, after spawn. `preload` models
+    are loaded before the worker reports ready and are never unloaded for
+    idleness; other sizes load on first request.
+    """
+    from faster_whisper import WhisperModel
+
+    models = ModelRegistry(
+        lambda name: WhisperModel(name, **model_options),
+        budget_mb=budget_mb,
+        idle_seconds=idle_seconds,
+        pinned=preload,
+    )
+    worker = WhisperWorker(models, default_model)
+    for name in preload:
+        models.get(name)
+    return worker
+
+
+# --- Shared-memory packing -------------------------------------------------
+# kind "pcm": one float32 clip; "batch": float32 clips back to back, split by
+# `lengths`; "file": encoded audio bytes (WAV, Ogg, ...) decoded in the worker.
+
+def _share(audio) -> Tuple[shared_memory.SharedMemory, str, List[int]]:
+    if isinstance(audio, np.ndarray):
+        kind, parts = "pcm", [audio]
+    elif isinstance(audio, list):
+        kind, parts = "batch", audio
+    else:
+        if isinstance(audio, io.BytesIO):
+            audio = audio.getbuffer()
+        data = np.frombuffer(audio, dtype=np.uint8)
+        kind, parts = "file", [data]
+
+    dtype = np.uint8 if kind == "file" else np.float32
+    lengths = [len(part) for part in parts]
+    nbytes = sum(lengths) * np.dtype(dtype).itemsize
+    shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+    target = np.ndarray(sum(lengths), dtype=dtype, buffer=shm.buf)
+    offset = 0
+    for part, length in zip(parts, lengths):
+        target[offset:offset + length] = part
+        offset += length
+    del target  # release the export so the segment can be closed
+    return shm, kind, lengths
+
+
+def _unpack(buf: memoryview, kind: str, lengths: List[int]):
+    if kind == "file":
+        return io.BytesIO(buf[:lengths[0]])  # copies the (compressed) bytes, not the samples
+    samples = np.frombuffer(buf, dtype=np.float32, count=sum(lengths))
+    if kind == "pcm":
+        return samples
+    return np.split(samples, np.cumsum(lengths)[:-1])
+
+
+def _worker_main(index: int, tasks, results, factory: Callable, factory_kwargs: Dict[str, Any]):
+    # Ctrl+C reaches the whole process group: shutdown is driven by the parent
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    handler = factory(**factory_kwargs)
+    maintain = getattr(handler, "maintain", None)
+    stats = getattr(handler, "stats", None)
+    results.put((index, None, DONE, {"pid": os.getpid(), "stats": stats() if stats else None}))
+
+    while True:
+        try:
+            message = tasks.get(timeout=MAINTENANCE_INTERVAL)
+        except queue.Empty:
+            if maintain is not None:
+                maintain()
+            if stats is not None:
+                results.put((index, None, DONE, {"stats": stats()}))
+            continue
+        if message is None:
+            break
+        job_id, task, shm_name, kind, lengths, language, options = message
+        audio = result = error = None
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                audio = _unpack(shm.buf, kind, lengths)
+                result = getattr(handler, task)(audio, language, **options)
+                if inspect.isgenerator(result):
+                    # consumed while the segment is still mapped
+                    for item in result:
+                        results.put((index, job_id, ITEM, item))
+                    result = None
+            except Exception as e:
+                # the traceback holds frames that reference the mapped audio: drop it before close()
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                audio = None
+                if error is not None:
+                    result = None
+                shm.close()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        if error is None:
+            results.put((index, job_id, DONE, result))
+        else:
+            results.put((index, job_id, FAILED, error))
+        if stats is not None:
+            results.put((index, None, DONE, {"stats": stats()}))
+
+
+class _WorkerHandle:
+    """Parent-side state of one worker process."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.tasks = None
+        self.ready = False
+        self.handler_stats = None  # last stats() reported by the worker (resident models...)
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.restart_delay = 0.0
+        # job_id -> (future, loop, shared memory, queue of streamed items or None)
+        self.inflight: Dict[
+            int, Tuple[asyncio.Future, asyncio.AbstractEventLoop, shared_memory.SharedMemory, Optional[asyncio.Queue]]
+        ] = {}
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+
+
+class WorkerPool:
+    """
+    `factory(**factory_kwargs)` runs in each worker and returns an object whose
+    methods are the tasks (`task(audio, language, **options)`). Requests go to
+    the live worker with the fewest in-flight jobs.
+    """
+
+    def __init__(
+        self,
+        factory: Callable,
+        factory_kwargs: Optional[Dict[str, Any]] = None,
+        workers: int = 2,
+        poll_interval: float = 0.5,
+        max_restart_delay: float = 30.0,
+    ):
+        self.factory = factory
+        self.factory_kwargs = factory_kwargs or {}
+        self.poll_interval = poll_interval
+        self.max_restart_delay = max_restart_delay
+        self._ctx = multiprocessing.get_context("spawn")  # no fork after threads / native runtimes
+        self._results = self._ctx.Queue()
+        self._workers = [_WorkerHandle(i) for i in range(workers)]
+        self._jobs = itertools.count()
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        for worker in self._workers:
+            self._spawn(worker)
+        self._threads = [
+            threading.Thread(target=self._read_results, name="stt-results", daemon=True),
+            threading.Thread(target=self._monitor, name="stt-monitor", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _spawn(self, worker: _WorkerHandle):
+        # Fresh queue: tasks left in a dead worker's queue were already failed
+        worker.tasks = self._ctx.Queue()
+        worker.ready = False
+        worker.started_at = time.monotonic()
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.index, worker.tasks, self._results, self.factory, self.factory_kwargs),
+            name=f"stt-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+
+    async def submit(self, task: str, audio, language: str, **options):
+        """Run `task` in a worker; audio is a float32 clip, a list of clips or encoded bytes."""
+        future, job_id, worker, shm = self._dispatch(task, audio, language, options, items=None)
+        try:
+            return await future
+        finally:
+            self._release(worker, job_id, shm)
+
+    async def stream(self, task: str, audio, language: str, **options) -> AsyncIterator[Any]:
+        """Run a generator task in a worker and yield its items as they arrive."""
+        items: asyncio.Queue = asyncio.Queue()
+        future, job_id, worker, shm = self._dispatch(task, audio, language, options, items=items)
+        try:
+            while True:
+                get = asyncio.ensure_future(items.get())
+                await asyncio.wait({get, future}, return_when=asyncio.FIRST_COMPLETED)
+                if get.done():
+                    yield get.result()
+                    continue
+                get.cancel()
+                # items are queued before the completion that follows them
+                while not items.empty():
+                    yield items.get_nowait()
+                future.result()  # raises the worker's error
+                return
+        finally:
+            # an abandoned stream (client gone) still runs to completion in the worker
+            self._release(worker, job_id, shm)
+
+    def _dispatch(self, task, audio, language, options, items):
+        if self._stopping:
+            raise WorkerCrashed("STT worker pool is stopped.")
+        alive = [w for w in self._workers if w.process is not None and w.process.is_alive()]
+        if not alive:
+            # All workers are between a crash and their (backed-off) restart
+            raise WorkerCrashed("No STT worker available.")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        shm, kind, lengths = _share(audio)
+        job_id = next(self._jobs)
+        with self._lock:
+            worker = min(alive, key=lambda w: (not w.ready, len(w.inflight)))
+            worker.inflight[job_id] = (future, loop, shm, items)
+            worker.tasks.put((job_id, task, shm.name, kind, lengths, language, options))
+        return future, job_id, worker, shm
+
+    def _release(self, worker: _WorkerHandle, job_id: int, shm: shared_memory.SharedMemory):
+        with self._lock:
+            worker.inflight.pop(job_id, None)
+        shm.close()
+        shm.unlink()
+
+    def _read_results(self):
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            index, job_id, status, payload = message
+            worker = self._workers[index]
+            if job_id is None:
+                if payload.get("stats") is not None:
+                    worker.handler_stats = payload["stats"]
+                if "pid" in payload:
+                    worker.ready = True
+                    worker.restart_delay = 0.0
+                    print(f"STT worker {index} ready (pid {payload['pid']})")
+                continue
+            with self._lock:
+                entry = worker.inflight.get(job_id)
+                if status == DONE:
+                    worker.completed += 1
+                elif status == FAILED:
+                    worker.failed += 1
+            if entry is None:
+                continue
+            future, loop, _, items = entry
+            if status == ITEM:
+                if items is not None:
+                    loop.call_soon_threadsafe(items.put_nowait, payload)
+                continue
+            error = None if status == DONE else RuntimeError(payload)
+            loop.call_soon_threadsafe(_resolve, future, payload, error)
+
+    def _monitor(self):
+        while not self._stopping:
+            time.sleep(self.poll_interval)
+            now = time.monotonic()
+            for worker in self._workers:
+                if self._stopping or worker.process.is_alive():
+                    continue
+                if worker.restart_at == 0.0:
+                    self._on_exit(worker, now)
+                if now >= worker.restart_at:
+                    worker.restart_at = 0.0
+                    worker.restarts += 1
+                    self._spawn(worker)
+
+    def _on_exit(self, worker: _WorkerHandle, now: float):
+        exitcode = worker.process.exitcode
+        print(f"Warning: STT worker {worker.index} exited with code {exitcode}, restarting")
+        worker.ready = False
+        with self._lock:
+            lost = list(worker.inflight.values())
+            worker.inflight.clear()
+        for future, loop, _, _ in lost:
+            loop.call_soon_threadsafe(
+                _resolve, future, None, WorkerCrashed(f"STT worker {worker.index} exited with code {exitcode}")
+            )
+        # Back off when a worker dies right after starting (bad model, OOM at load...)
+        if now - worker.started_at < 10.0:
+            worker.restart_delay = min(max(worker.restart_delay * 2, 1.0), self.max_restart_delay)
+        else:
+            worker.restart_delay = 0.0
+        worker.restart_at = now + worker.restart_delay
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping = True
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.tasks.put(None)
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            for future, loop, _, _ in list(worker.inflight.values()):
+                loop.call_soon_threadsafe(_resolve, future, None, WorkerCrashed("STT worker pool stopped."))
+        self._results.put(None)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "worker": worker.index,
+                "pid": worker.process.pid if worker.process is not None else None,
+                "alive": worker.process is not None and worker.process.is_alive(),
+                "ready": worker.ready,
+                "queue_depth": len(worker.inflight),
+                "completed": worker.completed,
+                "failed": worker.failed,
+                "restarts": worker.restarts,
+                "models": worker.handler_stats,
+            }
+            for worker in self._workers
+        ]
+
+
+def _resolve(future: asyncio.Future, result, error: Optional[BaseException]):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from stt_batching import MicroBatcher
+
+
+class FakeBatchDecoder:
+    """Records batch sizes; cost is per batch, not per clip"""
+
+    def __init__(self, seconds_per_batch=0.05):
+        self.seconds_per_batch = seconds_per_batch
+        self.sizes = []
+        self.lock = threading.Lock()
+
+    def __call__(self, clips, language):
+        with self.lock:
+            self.sizes.append(len(clips))
+        time.sleep(self.seconds_per_batch)
+        return [{"text": f"{language}:{len(clip)}", "language": language} for clip in clips]
+
+
+def run(decoder, requests, **kwargs):
+    async def scenario():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            batcher = MicroBatcher(decoder, executor, **kwargs)
+            return batcher, await asyncio.gather(*(batcher.submit(np.zeros(n), lang) for n, lang in requests))
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_clips_share_a_batch_and_get_their_own_result():
+    decoder = FakeBatchDecoder()
+    batcher, texts = run(decoder, [(1000 + i, "fr") for i in range(6)], max_batch_size=8, max_wait_ms=20)
+    assert decoder.sizes == [6]
+    assert [r["text"] for r in texts] == [f"fr:{1000 + i}" for i in range(6)]
+    assert batcher.stats()["avg_batch_size"] == 6
+
+
+def test_batch_size_is_capped_and_languages_are_not_mixed():
+    decoder = FakeBatchDecoder()
+    requests = [(100, "fr")] * 5 + [(200, "en")] * 2
+    batcher, texts = run(decoder, requests, max_batch_size=4, max_wait_ms=20)
+    assert sorted(decoder.sizes) == [1, 2, 4]
+    assert [r["text"] for r in texts] == ["fr:100"] * 5 + ["en:200"] * 2
+    assert batcher.stats()["largest_batch"] == 4
+
+
+def test_errors_are_scattered_to_every_caller():
+    def broken(clips, language):
+        raise RuntimeError("decoder crashed")
+
+    async def scenario():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = MicroBatcher(broken, executor, max_wait_ms=5)
+            return await asyncio.gather(*(batcher.submit(np.zeros(10), "fr") for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(scenario()))
+
+
+class FakeFeatureExtractor:
+    nb_max_frames = 10
+
+    def __call__(self, clip):
+        return np.full((4, self.nb_max_frames), float(clip[0]), dtype=np.float32)
+
+
+class FakeWhisperModel:
+    """faster-whisper model stand-in: clips louder than 0.5 are English, the others French"""
+
+    WORDS = {"<|startoftranscript|>": 50258, "<|en|>": 50259, "<|fr|>": 50265, "<|transcribe|>": 50359,
+             "<|notimestamps|>": 50363, "<|endoftext|>": 50257, "hello": 1, "bonjour": 2}
+
+    def __init__(self):
+        self.hf_tokenizer = self
+        self.model = self
+        self.is_multilingual = True
+        self.max_length = 448
+        self.feature_extractor = FakeFeatureExtractor()
+        self.prompts = []
+        self.detections = 0
+
+    def token_to_id(self, token):
+        return self.WORDS.get(token)
+
+    def decode(self, ids):
+        names = {v: k for k, v in self.WORDS.items()}
+        return " ".join(names[i] for i in ids)
+
+    def encode(self, features):
+        return np.array(features)
+
+    def detect_language(self, encoder_output):
+        self.detections += 1
+        return [[("<|en|>", 0.9)] if item[0, 0] > 0.5 else [("<|fr|>", 0.8)] for item in encoder_output]
+
+    def generate(self, encoder_output, prompts, **options):
+        self.prompts.append(prompts)
+        word = {50259: 1, 50265: 2}
+        return [type("Result", (), {"sequences_ids": [[word[prompt[1]], 50257]]}) for prompt in prompts]
+
+
+def test_batch_decoder_returns_each_clips_detected_language():
+    pytest.importorskip("faster_whisper")
+    from stt_batching import WhisperBatchDecoder
+
+    model = FakeWhisperModel()
+    decoder = WhisperBatchDecoder(model)
+    clips = [np.full(1600, 0.9, dtype=np.float32), np.full(1600, 0.1, dtype=np.float32)]
+
+    assert decoder(clips, None) == [{"text": "hello", "language": "en"}, {"text": "bonjour", "language": "fr"}]
+    assert model.detections == 1 and len(model.prompts) == 1  # one detect and one generate for the whole batch
+
+    # A requested language is used as is, without detection
+    assert [r["language"] for r in decoder(clips, "fr")] == ["fr", "fr"]
+    assert model.detections == 1
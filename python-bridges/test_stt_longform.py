@@ -0,0 +1,69 @@
+import asyncio
+
+import numpy as np
+
+from long_form import Chunk, plan_chunks, stitch_segments
+from stt_longform import transcribe_long
+
+SR = 16000
+
+
+def speech_with_pauses(words, word_seconds=1.5, pause_seconds=0.5):
+    """Word k is a tone burst of amplitude 0.1 + 0.01 k, so a fake decoder can read it back"""
+    t = np.arange(int(word_seconds * SR)) / SR
+    parts = []
+    for k in range(words):
+        parts.append(((0.1 + 0.01 * k) * np.sin(2 * np.pi * 300 * t)).astype(np.float32))
+        parts.append(np.zeros(int(pause_seconds * SR), dtype=np.float32))
+    return np.concatenate(parts)
+
+
+async def fake_decode(chunk):
+    """Returns one segment per tone burst found in the chunk, times relative to the chunk"""
+    frame = SR // 100
+    envelope = np.abs(chunk[: len(chunk) - len(chunk) % frame]).reshape(-1, frame).max(axis=1)
+    voiced = np.concatenate(([False], envelope > 0.05, [False]))
+    edges = np.flatnonzero(np.diff(voiced.astype(int)))
+    segments = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        k = round((envelope[start:end].max() - 0.1) / 0.01)
+        segments.append({"start": start * frame / SR, "end": end * frame / SR, "text": f"w{k}"})
+    await asyncio.sleep(0)
+    return segments
+
+
+def test_cuts_land_in_pauses_and_chunks_overlap():
+    audio = speech_with_pauses(60)  # 120 s
+    chunks = plan_chunks(audio, SR, chunk_seconds=20, overlap_seconds=1)
+
+    assert len(chunks) >= 6
+    assert chunks[0].own_start == 0 and chunks[-1].own_end == len(audio)
+    for a, b in zip(chunks, chunks[1:]):
+        assert a.own_end == b.own_start
+        assert b.start < a.end  # overlap
+        assert np.abs(audio[a.own_end - 160:a.own_end + 160]).max() == 0  # cut in silence
+        assert a.own_end - a.own_start <= 20 * SR
+
+
+def test_parallel_long_form_keeps_every_word_once_in_order():
+    audio = speech_with_pauses(60)
+    result = asyncio.run(transcribe_long(audio, fake_decode, SR, chunk_seconds=20, overlap_seconds=1))
+
+    assert result["text"] == " ".join(f"w{k}" for k in range(60))
+    starts = [s["start"] for s in result["segments"]]
+    assert starts == sorted(starts)
+    assert abs(result["segments"][10]["start"] - 20.0) < 0.02  # original timeline
+    assert result["chunks"] >= 6
+
+
+def test_stitch_drops_duplicates_across_a_cut():
+    chunks = [Chunk(0, 0, 11 * SR, 0, 10 * SR), Chunk(1, 9 * SR, 20 * SR, 10 * SR, 20 * SR)]
+    results = [
+        [{"start": 8.0, "end": 10.4, "text": "Bonjour Jarvis."}],
+        # same words seen again from the next chunk (starts at 9 s), midpoint slightly after the cut
+        [{"start": 0.2, "end": 2.2, "text": "bonjour jarvis"}, {"start": 3.0, "end": 4.0, "text": "Allume"}],
+    ]
+    segments = stitch_segments(chunks, results, SR)
+    assert [s["text"] for s in segments] == ["Bonjour Jarvis.", "Allume"]
+    assert [s["id"] for s in segments] == [0, 1]
+
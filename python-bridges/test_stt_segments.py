@@ -0,0 +1,70 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from stt_segments import encode_event, iterate_in_thread, stream_transcript
+
+
+async def decoder_events():
+    yield {"type": "info", "language": "fr", "duration": 4.0}
+    yield {"type": "segment", "id": 0, "start": 0.0, "end": 1.5, "text": "Bonjour Jarvis."}
+    yield {"type": "segment", "id": 1, "start": 1.5, "end": 4.0, "text": "Allume la lumière."}
+
+
+async def collect(body):
+    return [chunk async for chunk in body]
+
+
+def test_ndjson_stream_ends_with_done_event():
+    lines = asyncio.run(collect(stream_transcript(decoder_events(), "ndjson")))
+    events = [json.loads(line) for line in lines]
+
+    assert [e["type"] for e in events] == ["info", "segment", "segment", "done"]
+    assert "first_segment_ms" in events[1] and "first_segment_ms" not in events[2]
+    assert events[-1]["text"] == "Bonjour Jarvis. Allume la lumière."
+    assert events[-1]["language"] == "fr" and events[-1]["segments"] == 2
+
+    sse = encode_event({"type": "segment", "text": "é"}, "sse").decode()
+    assert sse == 'event: segment\ndata: {"type": "segment", "text": "é"}\n\n'
+
+
+def test_decoder_error_is_reported_in_band():
+    async def failing():
+        yield {"type": "segment", "id": 0, "start": 0.0, "end": 1.0, "text": "Bonjour"}
+        raise RuntimeError("decoder crashed")
+
+    events = [json.loads(line) for line in asyncio.run(collect(stream_transcript(failing(), "ndjson")))]
+    assert [e["type"] for e in events] == ["segment", "error"]
+    assert events[-1]["detail"] == "decoder crashed"
+
+
+def test_items_reach_the_loop_before_the_iterator_finishes():
+    release = threading.Event()
+
+    def blocking_segments():
+        yield "first"
+        assert release.wait(5)  # still decoding while the consumer handles "first"
+        yield "second"
+
+    async def scenario(executor):
+        received = []
+        async for item in iterate_in_thread(executor, blocking_segments):
+            received.append(item)
+            release.set()
+        return received
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert asyncio.run(scenario(executor)) == ["first", "second"]
+
+        def broken():
+            yield "first"
+            raise ValueError("bad audio")
+
+        async def failing():
+            return [item async for item in iterate_in_thread(executor, broken)]
+
+        with pytest.raises(ValueError):
+            asyncio.run(failing())
@@ -0,0 +1,66 @@
+import asyncio
+
+import numpy as np
+
+from stt_streaming import SAMPLE_RATE, EnergyVAD, StreamingTranscriber
+
+WORDS = "bonjour jarvis quelle heure est-il".split()
+
+
+def pcm(seconds, amplitude=0.0, seed=0):
+    noise = np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE))
+    return (noise * amplitude * 32767).clip(-32768, 32767).astype("<i2").tobytes()
+
+
+async def fake_decode(audio, final):
+    # One more word every 0.3 s of audio; the last word flickers until the final pass
+    count = min(len(WORDS), int(len(audio) / SAMPLE_RATE / 0.3))
+    words = WORDS[:count]
+    if words and not final:
+        words[-1] = words[-1].upper()
+    return " ".join(words)
+
+
+def run(chunks, **kwargs):
+    async def scenario():
+        transcriber = StreamingTranscriber(fake_decode, partial_interval=0.3, **kwargs)
+        events = []
+        for chunk in chunks:
+            # 20 ms frames, as a microphone client would send them
+            for offset in range(0, len(chunk), 640):
+                events += await transcriber.feed(chunk[offset:offset + 640])
+        return events + await transcriber.flush()
+
+    return asyncio.run(scenario())
+
+
+def test_vad_detects_speech_boundaries():
+    vad = EnergyVAD()
+    silence = np.zeros(vad.frame_size, dtype=np.float32)
+    speech = np.full(vad.frame_size, 0.2, dtype=np.float32)
+    boundaries = [vad.process(f) for f in [silence] * 5 + [speech] * 5 + [silence] * 20]
+    assert boundaries.index("start") == 7  # third voiced frame
+    assert boundaries.index("end") == 10 + vad.end_frames - 1
+
+
+def test_partials_then_final_at_end_of_speech():
+    events = run([pcm(0.5), pcm(1.5, 0.3), pcm(1.0)])
+    types = [e["type"] for e in events]
+    assert types[0] == "speech_start" and types[-1] == "final"
+    assert types.count("final") == 1 and "partial" in types
+
+    partials = [e for e in events if e["type"] == "partial"]
+    # Stable text only grows and never contains the flickering last word
+    stable = [e["stable"] for e in partials]
+    assert all(later.startswith(earlier) for earlier, later in zip(stable, stable[1:]))
+    assert stable[-1] and stable[-1].islower()
+
+    final = events[-1]
+    assert final["text"] == " ".join(WORDS)
+    assert 0.2 <= final["start"] <= 0.5
+    assert final["end"] > 2.0
+
+
+def test_flush_finalizes_speech_in_progress():
+    events = run([pcm(0.3), pcm(1.0, 0.3)])
+    assert events[-1]["type"] == "final" and events[-1]["text"]
@@ -0,0 +1,44 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from stt_upload import UploadError, pcm16_to_float, read_body
+
+
+async def chunked(data, size=1000):
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+def test_body_fills_preallocated_buffer_and_pcm_is_wrapped():
+    pcm = (np.sin(np.arange(16000) / 10) * 16000).astype("<i2").tobytes()
+
+    body = asyncio.run(read_body(chunked(pcm), len(pcm)))
+    audio = pcm16_to_float(body)
+
+    assert len(body) == len(pcm) and bytes(body) == pcm
+    assert audio.dtype == np.float32 and len(audio) == 16000
+    assert np.abs(audio).max() == pytest.approx(16000 / 32768, abs=1e-3)
+
+
+def test_chunked_body_without_length():
+    body = asyncio.run(read_body(chunked(b"OggS" + b"\0" * 5000), None))
+    assert bytes(body[:4]) == b"OggS" and len(body) == 5004
+
+
+def test_oversized_or_mismatched_uploads_are_rejected():
+    with pytest.raises(UploadError) as error:
+        asyncio.run(read_body(chunked(b""), 10_000_000))
+    assert error.value.status_code == 413
+
+    with pytest.raises(UploadError) as error:
+        asyncio.run(read_body(chunked(b"\0" * 3000), None, max_bytes=2000))
+    assert error.value.status_code == 413
+
+    with pytest.raises(UploadError) as error:
+        asyncio.run(read_body(chunked(b"\0" * 3000), 2000))
+    assert error.value.status_code == 400
+
+    with pytest.raises(UploadError):
+        pcm16_to_float(memoryview(b"\0\0\0"))
@@ -0,0 +1,167 @@
+import asyncio
+import io
+import os
+import time
+
+import numpy as np
+import pytest
+
+from stt_workers import WorkerCrashed, WorkerPool
+
+
+class FakeWorker:
+    """Reports what it received through shared memory, and which process ran it"""
+
+    def transcribe(self, audio, language):
+        if isinstance(audio, io.BytesIO):
+            return {"text": audio.read().decode(), "language": language, "pid": os.getpid()}
+        return {"text": f"{len(audio)}:{float(audio.sum()):.1f}", "language": language, "pid": os.getpid()}
+
+    def batch(self, clips, language):
+        return [f"{language}:{len(clip)}:{float(clip[0]):.1f}" for clip in clips]
+
+    def slow(self, audio, language, seconds=0.3):
+        time.sleep(seconds)
+        return os.getpid()
+
+    def crash(self, audio, language):
+        os._exit(3)  # simulates a segfault in native inference
+
+    def count(self, audio, language, upto=3, fail=False):
+        for i in range(upto):
+            time.sleep(0.1)
+            yield {"i": i, "at": time.time(), "samples": len(audio)}
+        if fail:
+            raise ValueError("decoder failed")
+
+
+def make_fake_worker():
+    return FakeWorker()
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(make_fake_worker, workers=2, poll_interval=0.05)
+    pool.start()
+    deadline = time.monotonic() + 30
+    while not all(w["ready"] for w in pool.stats()):
+        assert time.monotonic() < deadline, "workers did not start"
+        time.sleep(0.05)
+    yield pool
+    pool.stop()
+
+
+def test_audio_round_trips_through_shared_memory(pool):
+    async def scenario():
+        pcm = await pool.submit("transcribe", np.full(16000, 0.5, dtype=np.float32), "fr")
+        encoded = await pool.submit("transcribe", io.BytesIO(b"RIFF....WAVE"), "fr")
+        batch = await pool.submit("batch", [np.full(n, n / 1000, dtype=np.float32) for n in (100, 2500)], "en")
+        return pcm, encoded, batch
+
+    pcm, encoded, batch = asyncio.run(scenario())
+    assert pcm["text"] == "16000:8000.0" and pcm["pid"] != os.getpid()
+    assert encoded["text"] == "RIFF....WAVE"
+    assert batch == ["en:100:0.1", "en:2500:2.5"]
+
+
+def test_jobs_spread_over_workers_and_depth_is_reported(pool):
+    async def scenario():
+        jobs = [asyncio.ensure_future(pool.submit("slow", np.zeros(10, dtype=np.float32), "fr")) for _ in range(4)]
+        await asyncio.sleep(0.1)
+        depths = [w["queue_depth"] for w in pool.stats()]
+        return depths, await asyncio.gather(*jobs)
+
+    depths, pids = asyncio.run(scenario())
+    assert depths == [2, 2]
+    assert len(set(pids)) == 2
+    assert [w["completed"] for w in pool.stats()] == [2, 2]
+
+
+def test_dead_worker_fails_its_jobs_and_is_restarted(pool):
+    async def scenario():
+        with pytest.raises(WorkerCrashed):
+            await pool.submit("crash", np.zeros(10, dtype=np.float32), "fr")
+        deadline = time.monotonic() + 30
+        while not all(w["ready"] for w in pool.stats()):
+            assert time.monotonic() < deadline, "worker was not restarted"
+            await asyncio.sleep(0.05)
+        return await pool.submit("transcribe", np.ones(4, dtype=np.float32), "fr")
+
+    result = asyncio.run(scenario())
+    assert result["text"] == "4:4.0"
+    assert sum(w["restarts"] for w in pool.stats()) == 1
+
+
+def test_generator_tasks_stream_items_as_they_are_produced(pool):
+    async def scenario():
+        received = []
+        async for item in pool.stream("count", np.zeros(8, dtype=np.float32), "fr"):
+            received.append((item, time.time()))
+        with pytest.raises(RuntimeError, match="decoder failed"):
+            async for _ in pool.stream("count", np.zeros(8, dtype=np.float32), "fr", upto=1, fail=True):
+                pass
+        return received
+
+    received = asyncio.run(scenario())
+    assert [item["i"] for item, _ in received] == [0, 1, 2]
+    assert all(item["samples"] == 8 for item, _ in received)
+    # the first item arrived before the worker produced the last one
+    assert received[0][1] < received[-1][0]["at"]
+    assert sum(w["queue_depth"] for w in pool.stats()) == 0
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+    def transcribe(self, audio, language=None, **options):
+        return [type("Segment", (), {"text": f"{self.name}:{len(audio)}"})()], type("Info", (), {"language": language})()
+
+
+def test_whisper_worker_serves_several_model_sizes_under_budget():
+    from stt_models import ModelRegistry
+    from stt_workers import WhisperWorker
+
+    registry = ModelRegistry(FakeModel, budget_mb=1900, idle_seconds=900, pinned=["large-v3"])
+    worker = WhisperWorker(registry, default_model="large-v3")
+
+    assert worker.transcribe(np.zeros(10), "fr")["text"] == "large-v3:10"
+    assert worker.transcribe(np.zeros(5), "fr", model="base")["text"] == "base:5"
+    assert [m["model"] for m in worker.stats()["resident"]] == ["large-v3", "base"]
+
+    # 1575 + 105 + 315 > 1900 MB, but large-v3 is pinned and base is held by a running task
+    with registry.use("base"):
+        worker.transcribe(np.zeros(1), "fr", model="small")
+        assert [m["model"] for m in worker.stats()["resident"]] == ["large-v3", "base", "small"]
+        assert worker.stats()["evictions"]["budget"] == 0
+
+    # Once released, the least recently used unpinned models make room
+    worker.transcribe(np.zeros(1), "fr", model="tiny")
+    stats = worker.stats()
+    assert [m["model"] for m in stats["resident"]] == ["large-v3", "tiny"]
+    assert stats["evictions"] == {"budget": 2, "idle": 0} and stats["loads"] == 4
+
+    registry.idle_seconds = 0.01
+    time.sleep(0.05)
+    worker.maintain()
+    assert [m["model"] for m in worker.stats()["resident"]] == ["large-v3"]
+    assert [e["event"] for e in worker.stats()["recent_events"]][-1] == "unload"
+
+
+def test_model_size_table_matches_backend_registry():
+    """Both services budget Whisper models with the same estimates"""
+    import importlib.util
+    import pathlib
+
+    import stt_models
+
+    path = pathlib.Path(__file__).resolve().parent.parent / "backend-python-bridges" / "model_registry.py"
+    if not path.exists():
+        pytest.skip("backend-python-bridges is not checked out next to this service")
+    pytest.importorskip("loguru")
+    spec = importlib.util.spec_from_file_location("backend_model_registry", path)
+    backend = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(backend)
+
+    assert stt_models.WHISPER_MODEL_MB == backend.WHISPER_MODEL_MB
+    assert stt_models.WHISPER_INT8_RATIO == backend.WHISPER_INT8_RATIO
@@ -0,0 +1,82 @@
+"""
+Batch transcription of long recordings (meetings): the audio is split at
+silences into overlapping chunks, transcribed in parallel by a pool of worker
+processes, then stitched back into one ordered segment list.
+
+Usage: python transcribe_long.py recording.wav [more.wav ...] --workers 3 --model large-v3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from faster_whisper import decode_audio
+
+from stt_longform import SAMPLE_RATE, transcribe_long
+from stt_workers import WorkerPool, load_whisper_worker
+
+
+async def run(args):
+    pool = WorkerPool(
+        load_whisper_worker,
+        {
+            "default_model": args.model,
+            "preload": (args.model,),
+            "device": "cpu",
+            "compute_type": "int8",
+            # Explicitly limiting threads per worker to avoid CPU thrashing between workers
+            "cpu_threads": args.threads,
+        },
+        workers=args.workers,
+    )
+    pool.start()
+    try:
+        for path in args.files:
+            print(f"Decoding {path}...")
+            try:
+                audio = decode_audio(path, sampling_rate=SAMPLE_RATE)
+            except (FileNotFoundError, OSError) as e:
+                logging.error(f"File not found or IO error (NAS disconnected?): {e}")
+                continue
+
+            async def transcribe_chunk(chunk):
+                return await pool.submit("segments", chunk, args.language)
+
+            result = await transcribe_long(audio, transcribe_chunk, SAMPLE_RATE, args.chunk_seconds, args.overlap)
+
+            if args.json:
+                print(json.dumps(result, ensure_ascii=False))
+                continue
+            print(f"\n--- {path} ---")
+            for segment in result["segments"]:
+                print(f"[{segment['start']:.2f}s -> {segment['end']:.2f}s] {segment['text']}")
+            print(
+                f"\n{result['duration_seconds']:.0f}s of audio in {result['elapsed_seconds']:.0f}s "
+                f"({result['chunks']} chunks, RTF {result['realtime_factor']:.2f})\n"
+            )
+    finally:
+        pool.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--model", default="large-v3")
+    parser.add_argument("--language", default="fr")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes (one model each)")
+    parser.add_argument("--threads", type=int, default=4, help="CPU threads per worker")
+    parser.add_argument("--chunk-seconds", type=float, default=28.0)
+    parser.add_argument("--overlap", type=float, default=1.0, help="Seconds of context on each side of a cut")
+    parser.add_argument("--json", action="store_true", help="One JSON result per file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    asyncio.run(run(args))
+    if not args.json:
+        print(f"Done in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
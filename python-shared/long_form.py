@@ -0,0 +1,125 @@
+"""
+Transcription longue - module partagé par python-bridges et backend-python-bridges
+Découpage des enregistrements longs aux silences en blocs chevauchants, puis
+recollage des segments transcrits sur la chronologie d'origine
+
+Chaque bloc fait foi pour l'intervalle entre ses deux coupes ; le chevauchement
+de part et d'autre ne sert que de contexte au décodeur. Un segment est gardé par
+le bloc dont la zone propre contient son milieu : les mots décodés deux fois dans
+un chevauchement sont écartés par horodatage, pas par comparaison de texte.
+
+Les deux images Docker copient ce fichier (contexte de build nommé `shared`),
+les deux services coupent donc un enregistrement aux mêmes endroits.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+CHUNK_SECONDS = 28.0  # un bloc et son chevauchement tiennent dans la fenêtre de 30 s de Whisper
+OVERLAP_SECONDS = 1.0
+SEARCH_SECONDS = 6.0
+FRAME_MS = 20
+QUIET_RATIO = 1.5  # trames à moins de 1,5 fois le RMS minimum : la pause
+QUIET_FLOOR = 1e-5
+
+
+@dataclass
+class Chunk:
+    """Bloc transcrit : [start, end[ envoyé au modèle, [own_start, own_end[ dont il fait foi (échantillons)"""
+    index: int
+    start: int
+    end: int
+    own_start: int
+    own_end: int
+
+
+def frame_rms(audio: np.ndarray, frame_size: int) -> np.ndarray:
+    """Énergie RMS par trame (la dernière trame incomplète est complétée par des zéros)"""
+    n_frames = -(-len(audio) // frame_size)
+    padded = np.zeros(n_frames * frame_size, dtype=np.float32)
+    padded[:len(audio)] = audio
+    frames = padded.reshape(n_frames, frame_size)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_size)
+
+
+def quietest_point(rms: np.ndarray) -> int:
+    """Milieu de la plus longue suite de trames proches du minimum : le cœur de la pause la plus nette"""
+    quiet = rms <= rms.min() * QUIET_RATIO + QUIET_FLOOR
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], quiet.astype(np.int8), [0]))))
+    starts, ends = edges[::2], edges[1::2]
+    longest = int(np.argmax(ends - starts))
+    return int((starts[longest] + ends[longest]) // 2)
+
+
+def plan_chunks(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    chunk_seconds: float = CHUNK_SECONDS,
+    overlap_seconds: float = OVERLAP_SECONDS,
+    search_seconds: float = SEARCH_SECONDS,
+    frame_ms: int = FRAME_MS
+) -> List[Chunk]:
+    """Couper toutes les ~`chunk_seconds` dans la pause la plus nette des `search_seconds` précédentes"""
+    total = len(audio)
+    chunk = int(chunk_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    frame = max(1, sample_rate * frame_ms // 1000)
+    rms = frame_rms(audio, frame)
+    search_frames = max(1, int(search_seconds * sample_rate) // frame)
+
+    cuts = [0]
+    while total - cuts[-1] > chunk:
+        target = (cuts[-1] + chunk) // frame
+        lo = max(target - search_frames, cuts[-1] // frame + 1)
+        window = rms[lo:target]
+        cuts.append((lo + quietest_point(window)) * frame if len(window) else cuts[-1] + chunk)
+    cuts.append(total)
+
+    return [
+        Chunk(index=i, start=max(0, a - overlap), end=min(total, b + overlap), own_start=a, own_end=b)
+        for i, (a, b) in enumerate(zip(cuts, cuts[1:]))
+    ]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w]+", " ", text.lower()).strip()
+
+
+def stitch_segments(
+    chunks: List[Chunk],
+    results: List[List[Dict[str, Any]]],
+    sample_rate: int = SAMPLE_RATE
+) -> List[Dict[str, Any]]:
+    """Recoller les segments (temps relatifs au bloc) en une liste ordonnée sur la chronologie d'origine"""
+    merged = []
+    for chunk, segments in zip(chunks, results):
+        offset = chunk.start / sample_rate
+        own_start, own_end = chunk.own_start / sample_rate, chunk.own_end / sample_rate
+        last = chunk.index == len(chunks) - 1
+        for segment in segments:
+            start, end = segment["start"] + offset, segment["end"] + offset
+            middle = (start + end) / 2
+            if middle < own_start or (middle >= own_end and not last):
+                continue  # appartient au bloc voisin
+            merged.append({**segment, "start": round(start, 3), "end": round(end, 3), "chunk": chunk.index})
+
+    merged.sort(key=lambda s: s["start"])
+    # Segment à cheval sur une coupe, rendu par les deux blocs avec des temps légèrement différents
+    stitched: List[Dict[str, Any]] = []
+    for segment in merged:
+        previous = stitched[-1] if stitched else None
+        if (
+            previous is not None
+            and segment["start"] < previous["end"]
+            and _normalize(segment["text"]) == _normalize(previous["text"])
+        ):
+            continue
+        stitched.append(segment)
+    for i, segment in enumerate(stitched):
+        segment["id"] = i
+    return stitched